@@ -4,11 +4,14 @@ Agricultural AI assistant powered by SmolLM2 model
 """
 
 import os
+import sys
 import json
+import asyncio
 import logging
+import threading
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
 
 import torch
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
@@ -23,6 +26,7 @@ from transformers import (
     BitsAndBytesConfig
 )
 import psycopg2
+from psycopg2 import pool as pg_pool
 from psycopg2.extras import RealDictCursor
 import redis
 
@@ -35,6 +39,26 @@ model = None
 tokenizer = None
 db_pool = None
 redis_client = None
+embedding_model = None
+
+# Context vector index written by the web backend (CONTEXT_VECTOR_INDEX_DIR), mapped read-only
+# with the backend's own reader from its source tree
+WEB_BACKEND_SRC = os.getenv(
+    "WEB_BACKEND_SRC",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "web-backend", "src")
+)
+embedding_model_name = os.getenv("CONTEXT_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+vector_index_type = None
+context_index = None
+context_index_lock = threading.Lock()
+
+# Candidates scored per requested context, widened by this factor while the domain filter leaves too few
+CONTEXT_CANDIDATE_FACTOR = 4
+CONTEXT_CANDIDATE_LIMIT = 1024
+
+# Per-language full-text columns added by the web backend's migrations, looked up once
+CONTEXT_SEARCH_LANGUAGES = ("en", "fr", "sw", "pt", "ar", "mg")
+context_search_columns: Optional[set] = None
 
 class ChatRequest(BaseModel):
     message: str = Field(..., description="User message to process")
@@ -97,20 +121,136 @@ def init_database():
     global db_pool
 
     try:
-        db_pool = psycopg2.connect(
+        db_pool = pg_pool.ThreadedConnectionPool(
+            int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            int(os.getenv("DB_POOL_MAX_SIZE", "10")),
             host=os.getenv("DB_HOST", "localhost"),
             port=int(os.getenv("DB_PORT", "5432")),
             database=os.getenv("DB_NAME", "fataplus"),
             user=os.getenv("DB_USER", "fataplus"),
             password=os.getenv("DB_PASSWORD", ""),
-            cursor_factory=RealDictCursor
+            cursor_factory=RealDictCursor,
+            options=f"-c statement_timeout={int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '10000'))}"
         )
-        logger.info("Database connection established")
+        logger.info("Database connection pool established")
         return True
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
         return False
 
+@contextmanager
+def db_cursor():
+    """Borrow a pooled connection, discarding it if the connection broke"""
+    conn = db_pool.getconn()
+    broken = False
+    try:
+        with conn.cursor() as cursor:
+            yield cursor
+        conn.commit()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        if not broken and not conn.closed:
+            conn.rollback()
+        db_pool.putconn(conn, close=broken or bool(conn.closed))
+
+def init_context_vectors():
+    """Load the embedding model and index reader used to query the shared context vector index"""
+    global embedding_model, vector_index_type
+
+    index_dir = os.getenv("CONTEXT_VECTOR_INDEX_DIR", "")
+    if not index_dir:
+        return False
+
+    try:
+        if WEB_BACKEND_SRC not in sys.path:
+            sys.path.append(WEB_BACKEND_SRC)
+        from context.vector_index import VectorIndex
+        from sentence_transformers import SentenceTransformer
+
+        embedding_model = SentenceTransformer(embedding_model_name, device="cpu")
+        vector_index_type = VectorIndex
+        logger.info(f"Context embedding model loaded for index {index_dir}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to load context vector index support: {e}")
+        return False
+
+def load_context_vectors():
+    """Map the context vector index, reopening it after the web backend publishes new rows
+
+    An index built with another model, dimension or dtype opens empty, so queries fall back to text search.
+    """
+    global context_index
+
+    if embedding_model is None or vector_index_type is None:
+        return None
+
+    with context_index_lock:
+        if context_index is None or context_index.changed_on_disk():
+            context_index = vector_index_type.open(
+                os.getenv("CONTEXT_VECTOR_INDEX_DIR", ""),
+                embedding_model.get_sentence_embedding_dimension(),
+                os.getenv("CONTEXT_VECTOR_DTYPE", "float32"),
+                embedding_model_name,
+                read_only=True
+            )
+        return context_index
+
+def search_context_vectors(cursor, query: str, domain: str, limit: int) -> List[Dict[str, Any]]:
+    """Published contexts of a domain nearest to the query embedding, best first"""
+    index = load_context_vectors()
+    if index is None or not len(index):
+        return []
+
+    query_vector = embedding_model.encode([query], normalize_embeddings=True, convert_to_numpy=True)[0]
+    candidates = limit * CONTEXT_CANDIDATE_FACTOR
+    while True:
+        context_ids = [context_id for context_id, _ in index.search(query_vector, candidates)]
+        cursor.execute("""
+            SELECT id, title, content, metadata
+            FROM contexts
+            WHERE id = ANY(%s) AND domain = %s AND status = 'published'
+            ORDER BY array_position(%s, id)
+            LIMIT %s
+        """, (context_ids, domain, context_ids, limit))
+        results = cursor.fetchall()
+        # Nearest neighbours can all belong to other domains: widen until enough match or every row was scored
+        if len(results) >= limit or len(context_ids) < candidates or candidates >= CONTEXT_CANDIDATE_LIMIT:
+            return results
+        candidates = min(candidates * CONTEXT_CANDIDATE_FACTOR, CONTEXT_CANDIDATE_LIMIT)
+
+def search_context_text(cursor, query: str, domain: str, limit: int, language: str) -> List[Dict[str, Any]]:
+    """Full-text search over the per-language search vectors, or a substring match without them"""
+    global context_search_columns
+
+    if context_search_columns is None:
+        cursor.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = 'contexts' AND column_name = ANY(%s)
+        """, ([f"search_{code}" for code in CONTEXT_SEARCH_LANGUAGES],))
+        context_search_columns = {row["column_name"] for row in cursor.fetchall()}
+
+    search_column = f"search_{language}" if language in CONTEXT_SEARCH_LANGUAGES else "search_en"
+    if search_column in context_search_columns:
+        config = {"en": "english", "fr": "french", "pt": "portuguese", "ar": "arabic"}.get(language, "simple")
+        cursor.execute(f"""
+            SELECT id, title, content, metadata
+            FROM contexts, websearch_to_tsquery(%s::regconfig, %s) q
+            WHERE domain = %s AND status = 'published' AND {search_column} @@ q
+            ORDER BY ts_rank_cd({search_column}, q) DESC
+            LIMIT %s
+        """, (config, query, domain, limit))
+    else:
+        cursor.execute("""
+            SELECT id, title, content, metadata
+            FROM contexts
+            WHERE domain = %s AND status = 'published' AND content->>'summary' ILIKE %s
+            LIMIT %s
+        """, (domain, f"%{query}%", limit))
+    return cursor.fetchall()
+
 def init_redis():
     """Initialize Redis connection"""
     global redis_client
@@ -139,6 +279,7 @@ async def lifespan(app: FastAPI):
     model_loaded = load_smollm2_model()
     db_connected = init_database()
     redis_connected = init_redis()
+    init_context_vectors()
 
     if not model_loaded:
         logger.warning("Model loading failed, but continuing with limited functionality")
@@ -160,7 +301,7 @@ async def lifespan(app: FastAPI):
         torch.cuda.empty_cache()
 
     if db_pool is not None:
-        db_pool.close()
+        db_pool.closeall()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -192,23 +333,17 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     # For now, accept any token (implement proper verification)
     return credentials.credentials
 
-def get_context_from_db(query: str, domain: str, limit: int = 5) -> List[Dict[str, Any]]:
-    """Search for relevant context in database"""
+def get_context_from_db(query: str, domain: str, limit: int = 5, language: str = "en") -> List[Dict[str, Any]]:
+    """Search for relevant context, semantically when the vector index is available"""
     if not db_pool:
         logger.warning("Database not available, returning empty context")
         return []
 
     try:
-        with db_pool.cursor() as cursor:
-            # Simple text search - in production, use full-text search or vector similarity
-            cursor.execute("""
-                SELECT id, title, content, metadata
-                FROM contexts
-                WHERE domain = %s AND content->>'summary' ILIKE %s
-                LIMIT %s
-            """, (domain, f"%{query}%", limit))
-
-            results = cursor.fetchall()
+        with db_cursor() as cursor:
+            results = search_context_vectors(cursor, query, domain, limit)
+            if not results:
+                results = search_context_text(cursor, query, domain, limit, language)
             return [dict(row) for row in results]
     except Exception as e:
         logger.error(f"Context search failed: {e}")
@@ -323,7 +458,8 @@ async def chat(
         # Get relevant context
         context_data = []
         if request.context and "query" in request.context:
-            context_data = get_context_from_db(
+            context_data = await asyncio.to_thread(
+                get_context_from_db,
                 request.context["query"],
                 request.context.get("domain", "agritech"),
                 3
@@ -388,16 +524,18 @@ async def search_context(
     """Search agricultural knowledge base"""
     try:
         # Check cache
-        cache_key = f"context_search:{hash(request.query + request.domain)}"
+        cache_key = f"context_search:{hash(request.query + request.domain + (request.language or 'en'))}"
         cached_response = get_cached_response(cache_key)
         if cached_response:
             return cached_response
 
         # Search database
-        results = get_context_from_db(
+        results = await asyncio.to_thread(
+            get_context_from_db,
             request.query,
             request.domain,
-            request.limit
+            request.limit,
+            request.language or "en"
         )
 
         response = {
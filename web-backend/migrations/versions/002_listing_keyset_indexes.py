@@ -0,0 +1,47 @@
+"""Add keyset pagination indexes for user and organization listings
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns) ordered to match the (created_at, id) seek predicate
+KEYSET_INDEXES = [
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+    ('ix_users_organization_id_created_at_id', 'users', ['organization_id', 'created_at', 'id']),
+    ('ix_organizations_created_at_id', 'organizations', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Create composite indexes backing keyset pagination."""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    for name, table, columns in KEYSET_INDEXES:
+        # Tables created from the ORM models may differ from the initial schema
+        if table not in tables:
+            continue
+        existing_columns = {column['name'] for column in inspector.get_columns(table)}
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table)}
+        if set(columns) <= existing_columns and name not in existing_indexes:
+            op.create_index(name, table, columns)
+
+    # Refresh planner statistics used for approximate listing totals
+    for table in {table for _, table, _ in KEYSET_INDEXES if table in tables}:
+        op.execute(f'ANALYZE {table}')
+
+
+def downgrade() -> None:
+    """Drop keyset pagination indexes."""
+    for name, table, _ in reversed(KEYSET_INDEXES):
+        op.execute(f'DROP INDEX IF EXISTS {name}')
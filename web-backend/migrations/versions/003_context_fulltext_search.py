@@ -0,0 +1,129 @@
+"""Add per-language full-text search vectors for knowledge base contexts
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# (language, text search configuration); Postgres ships no Swahili or Malagasy stemmer
+SEARCH_LANGUAGES = [
+    ('en', 'english'),
+    ('fr', 'french'),
+    ('sw', 'simple'),
+    ('pt', 'portuguese'),
+    ('ar', 'arabic'),
+    ('mg', 'simple'),
+]
+
+# Column types of the context service's contexts table; the contexts table of the initial
+# schema (plain text title and content) is a different model and gets no search vectors
+REQUIRED_COLUMN_TYPES = {
+    'title': postgresql.JSONB,
+    'content': postgresql.JSONB,
+    'tags': sa.ARRAY,
+}
+
+# Title ranks above tags and summary, which rank above details
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION context_search_vector(
+    config regconfig, lang text, title jsonb, content jsonb, tags text[]
+) RETURNS tsvector
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT setweight(to_tsvector(config, COALESCE(title->>lang, '')), 'A')
+        || setweight(to_tsvector(config, COALESCE(array_to_string(tags, ' '), '')), 'B')
+        || setweight(to_tsvector(config, COALESCE(content->'summary'->>lang, '')), 'B')
+        || setweight(to_tsvector(config, COALESCE(
+               CASE WHEN jsonb_typeof(content->'details') = 'object'
+                    THEN content->'details'->>lang
+                    ELSE content->>'details'
+               END, '')), 'C')
+$$
+"""
+
+
+def _vector_expression(language: str, config: str, row: str = '') -> str:
+    prefix = f'{row}.' if row else ''
+    return (f"context_search_vector('{config}'::regconfig, '{language}', "
+            f"{prefix}title, {prefix}content, {prefix}tags)")
+
+
+def upgrade() -> None:
+    """Create search vector columns, their maintenance trigger and GIN indexes."""
+    inspector = sa.inspect(op.get_bind())
+    # The contexts table is owned by the context service and may not exist yet
+    if 'contexts' not in inspector.get_table_names():
+        return
+
+    column_types = {column['name']: column['type'] for column in inspector.get_columns('contexts')}
+    if not all(isinstance(column_types.get(name), column_type)
+               for name, column_type in REQUIRED_COLUMN_TYPES.items()):
+        return
+
+    existing_columns = set(column_types)
+    for language, _ in SEARCH_LANGUAGES:
+        if f'search_{language}' not in existing_columns:
+            op.execute(f'ALTER TABLE contexts ADD COLUMN search_{language} tsvector')
+
+    op.execute(SEARCH_VECTOR_FUNCTION)
+    assignments = '\n'.join(
+        f'    NEW.search_{language} := {_vector_expression(language, config, "NEW")};'
+        for language, config in SEARCH_LANGUAGES
+    )
+    op.execute(f"""
+CREATE OR REPLACE FUNCTION contexts_search_vector_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+{assignments}
+    RETURN NEW;
+END
+$$
+""")
+    op.execute('DROP TRIGGER IF EXISTS contexts_search_vector_update ON contexts')
+    op.execute("""
+        CREATE TRIGGER contexts_search_vector_update
+        BEFORE INSERT OR UPDATE OF title, content, tags ON contexts
+        FOR EACH ROW EXECUTE FUNCTION contexts_search_vector_update()
+    """)
+
+    # Backfill existing rows
+    op.execute('UPDATE contexts SET ' + ', '.join(
+        f'search_{language} = {_vector_expression(language, config)}'
+        for language, config in SEARCH_LANGUAGES
+    ))
+
+    # Search only ever returns published contexts
+    existing_indexes = {index['name'] for index in inspector.get_indexes('contexts')}
+    for language, _ in SEARCH_LANGUAGES:
+        name = f'ix_contexts_search_{language}'
+        if name not in existing_indexes:
+            op.execute(
+                f"CREATE INDEX {name} ON contexts USING GIN (search_{language}) "
+                f"WHERE status = 'published'"
+            )
+
+    op.execute('ANALYZE contexts')
+
+
+def downgrade() -> None:
+    """Drop search vector indexes, trigger and columns."""
+    inspector = sa.inspect(op.get_bind())
+    if 'contexts' not in inspector.get_table_names():
+        return
+
+    for language, _ in reversed(SEARCH_LANGUAGES):
+        op.execute(f'DROP INDEX IF EXISTS ix_contexts_search_{language}')
+    op.execute('DROP TRIGGER IF EXISTS contexts_search_vector_update ON contexts')
+    op.execute('DROP FUNCTION IF EXISTS contexts_search_vector_update()')
+    op.execute('DROP FUNCTION IF EXISTS context_search_vector(regconfig, text, jsonb, jsonb, text[])')
+    for language, _ in reversed(SEARCH_LANGUAGES):
+        op.execute(f'ALTER TABLE contexts DROP COLUMN IF EXISTS search_{language}')
@@ -0,0 +1,141 @@
+"""Add slugs and materialised paths to the context taxonomy
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+import json
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+# Same rule as context.taxonomy.slugify
+SLUG_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+# A node's path is its parent's path followed by its own id, e.g. /root/parent/node/
+PATH_FUNCTION = """
+CREATE OR REPLACE FUNCTION taxonomies_path_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    parent_path text;
+BEGIN
+    IF NEW.parent_id IS NOT NULL THEN
+        SELECT path INTO parent_path FROM taxonomies WHERE id = NEW.parent_id;
+    END IF;
+    NEW.path := COALESCE(parent_path, '/') || NEW.id || '/';
+    RETURN NEW;
+END
+$$
+"""
+
+# Moving a node rewrites the path prefix of everything below it. The prefix is compared
+# literally: ids may contain _ or %, which LIKE would treat as wildcards
+DESCENDANT_PATH_FUNCTION = """
+CREATE OR REPLACE FUNCTION taxonomies_descendant_path_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE taxonomies
+    SET path = NEW.path || substr(path, length(OLD.path) + 1)
+    WHERE left(path, length(OLD.path)) = OLD.path AND id <> NEW.id;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def _slugify(value: str) -> str:
+    ascii_value = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode()
+    return SLUG_SEPARATORS.sub('-', ascii_value.lower()).strip('-')
+
+
+def upgrade() -> None:
+    """Create slug and path columns, backfill them and keep paths current with triggers."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # The taxonomies table is owned by the context service and may not exist yet
+    if 'taxonomies' not in inspector.get_table_names():
+        return
+
+    existing_columns = {column['name'] for column in inspector.get_columns('taxonomies')}
+    if 'slug' not in existing_columns:
+        op.add_column('taxonomies', sa.Column('slug', sa.String(255), nullable=True))
+    if 'path' not in existing_columns:
+        op.add_column('taxonomies', sa.Column('path', sa.Text(), nullable=True))
+
+    # Backfill slugs from the English name, falling back to any translation
+    rows = bind.execute(sa.text('SELECT id, name FROM taxonomies WHERE slug IS NULL')).fetchall()
+    for node_id, name in rows:
+        if isinstance(name, str):
+            name = json.loads(name)
+        name = name or {}
+        slug = _slugify(name.get('en') or next(iter(name.values()), '')) or _slugify(node_id)
+        bind.execute(
+            sa.text('UPDATE taxonomies SET slug = :slug WHERE id = :id'),
+            {'slug': slug, 'id': node_id}
+        )
+
+    # Backfill paths top-down; nodes on a parent cycle become roots
+    op.execute("""
+        WITH RECURSIVE tree AS (
+            SELECT t.id, '/' || t.id || '/' AS path
+            FROM taxonomies t
+            LEFT JOIN taxonomies p ON p.id = t.parent_id
+            WHERE p.id IS NULL
+            UNION ALL
+            SELECT child.id, tree.path || child.id || '/'
+            FROM taxonomies child
+            JOIN tree ON child.parent_id = tree.id
+        )
+        UPDATE taxonomies SET path = tree.path FROM tree WHERE taxonomies.id = tree.id
+    """)
+    op.execute("UPDATE taxonomies SET path = '/' || id || '/' WHERE path IS NULL")
+
+    op.execute(PATH_FUNCTION)
+    op.execute('DROP TRIGGER IF EXISTS taxonomies_path_update ON taxonomies')
+    op.execute("""
+        CREATE TRIGGER taxonomies_path_update
+        BEFORE INSERT OR UPDATE OF parent_id ON taxonomies
+        FOR EACH ROW EXECUTE FUNCTION taxonomies_path_update()
+    """)
+    op.execute(DESCENDANT_PATH_FUNCTION)
+    op.execute('DROP TRIGGER IF EXISTS taxonomies_descendant_path_update ON taxonomies')
+    op.execute("""
+        CREATE TRIGGER taxonomies_descendant_path_update
+        AFTER UPDATE OF path ON taxonomies
+        FOR EACH ROW WHEN (OLD.path IS DISTINCT FROM NEW.path)
+        EXECUTE FUNCTION taxonomies_descendant_path_update()
+    """)
+
+    # Slug lookups are per domain; subtree queries are path prefix scans
+    existing_indexes = {index['name'] for index in inspector.get_indexes('taxonomies')}
+    if 'ix_taxonomies_domain_slug' not in existing_indexes:
+        op.create_index('ix_taxonomies_domain_slug', 'taxonomies', ['domain', 'slug'])
+    if 'ix_taxonomies_path' not in existing_indexes:
+        op.execute('CREATE INDEX ix_taxonomies_path ON taxonomies (path text_pattern_ops)')
+
+    op.execute('ANALYZE taxonomies')
+
+
+def downgrade() -> None:
+    """Drop taxonomy path triggers, indexes and columns."""
+    inspector = sa.inspect(op.get_bind())
+    if 'taxonomies' not in inspector.get_table_names():
+        return
+
+    op.execute('DROP INDEX IF EXISTS ix_taxonomies_path')
+    op.execute('DROP INDEX IF EXISTS ix_taxonomies_domain_slug')
+    op.execute('DROP TRIGGER IF EXISTS taxonomies_descendant_path_update ON taxonomies')
+    op.execute('DROP FUNCTION IF EXISTS taxonomies_descendant_path_update()')
+    op.execute('DROP TRIGGER IF EXISTS taxonomies_path_update ON taxonomies')
+    op.execute('DROP FUNCTION IF EXISTS taxonomies_path_update()')
+    op.execute('ALTER TABLE taxonomies DROP COLUMN IF EXISTS path')
+    op.execute('ALTER TABLE taxonomies DROP COLUMN IF EXISTS slug')
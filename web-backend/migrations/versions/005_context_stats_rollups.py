@@ -0,0 +1,149 @@
+"""Add trigger-maintained rollups for knowledge base context statistics
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+# Columns the rollups aggregate; the contexts table of the initial schema has no domain,
+# topic or quality score and gets no rollups
+ROLLUP_COLUMNS = {'domain', 'status', 'topic', 'quality_score', 'created_at'}
+
+# Adds delta contexts to one (domain, status, topic) rollup row
+ROLLUP_APPLY_FUNCTION = """
+CREATE OR REPLACE FUNCTION context_stats_rollup_apply(
+    p_domain text, p_status text, p_topic text, p_quality double precision, p_delta integer
+) RETURNS void
+LANGUAGE sql AS $$
+    INSERT INTO context_stats_rollup AS rollup
+        (domain, status, topic, context_count, quality_sum, quality_count)
+    VALUES (
+        p_domain, p_status, COALESCE(p_topic, ''), p_delta,
+        COALESCE(p_quality, 0) * p_delta,
+        CASE WHEN p_quality IS NULL THEN 0 ELSE p_delta END
+    )
+    ON CONFLICT (domain, status, topic) DO UPDATE SET
+        context_count = rollup.context_count + EXCLUDED.context_count,
+        quality_sum = rollup.quality_sum + EXCLUDED.quality_sum,
+        quality_count = rollup.quality_count + EXCLUDED.quality_count
+$$
+"""
+
+# An update moves the context from its old rollup row to its new one
+ROLLUP_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION contexts_stats_rollup_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM context_stats_rollup_apply(
+            OLD.domain::text, OLD.status::text, OLD.topic::text, OLD.quality_score, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM context_stats_rollup_apply(
+            NEW.domain::text, NEW.status::text, NEW.topic::text, NEW.quality_score, 1);
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO context_activity_daily AS activity (day, contexts_created)
+        VALUES (NEW.created_at::date, 1)
+        ON CONFLICT (day) DO UPDATE SET contexts_created = activity.contexts_created + 1;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE context_activity_daily
+        SET contexts_created = contexts_created - 1
+        WHERE day = OLD.created_at::date;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    """Create rollup tables, backfill them and keep them current with triggers."""
+    inspector = sa.inspect(op.get_bind())
+    # The contexts table is owned by the context service and may not exist yet
+    if 'contexts' not in inspector.get_table_names():
+        return
+
+    existing_columns = {column['name'] for column in inspector.get_columns('contexts')}
+    if not ROLLUP_COLUMNS <= existing_columns:
+        return
+
+    existing_tables = set(inspector.get_table_names())
+    if 'context_stats_rollup' not in existing_tables:
+        op.create_table(
+            'context_stats_rollup',
+            sa.Column('domain', sa.String(50), nullable=False),
+            sa.Column('status', sa.String(50), nullable=False),
+            sa.Column('topic', sa.String(255), nullable=False),
+            sa.Column('context_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('quality_sum', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('quality_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.PrimaryKeyConstraint('domain', 'status', 'topic')
+        )
+    if 'context_activity_daily' not in existing_tables:
+        op.create_table(
+            'context_activity_daily',
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('contexts_created', sa.Integer(), nullable=False, server_default='0'),
+            sa.PrimaryKeyConstraint('day')
+        )
+
+    op.execute(ROLLUP_APPLY_FUNCTION)
+    op.execute(ROLLUP_TRIGGER_FUNCTION)
+
+    # Hold off writers so no change lands between the backfill and the triggers
+    op.execute('LOCK TABLE contexts IN SHARE ROW EXCLUSIVE MODE')
+    op.execute('DROP TRIGGER IF EXISTS contexts_stats_rollup_write ON contexts')
+    op.execute("""
+        CREATE TRIGGER contexts_stats_rollup_write
+        AFTER INSERT OR DELETE ON contexts
+        FOR EACH ROW EXECUTE FUNCTION contexts_stats_rollup_update()
+    """)
+    op.execute('DROP TRIGGER IF EXISTS contexts_stats_rollup_update ON contexts')
+    op.execute("""
+        CREATE TRIGGER contexts_stats_rollup_update
+        AFTER UPDATE OF domain, status, topic, quality_score ON contexts
+        FOR EACH ROW
+        WHEN ((OLD.domain, OLD.status, OLD.topic, OLD.quality_score)
+              IS DISTINCT FROM (NEW.domain, NEW.status, NEW.topic, NEW.quality_score))
+        EXECUTE FUNCTION contexts_stats_rollup_update()
+    """)
+
+    # Backfill from the current contents
+    op.execute('DELETE FROM context_stats_rollup')
+    op.execute("""
+        INSERT INTO context_stats_rollup (domain, status, topic, context_count, quality_sum, quality_count)
+        SELECT domain::text, status::text, COALESCE(topic::text, ''), COUNT(*),
+               COALESCE(SUM(quality_score), 0), COUNT(quality_score)
+        FROM contexts
+        GROUP BY 1, 2, 3
+    """)
+    op.execute('DELETE FROM context_activity_daily')
+    op.execute("""
+        INSERT INTO context_activity_daily (day, contexts_created)
+        SELECT created_at::date, COUNT(*)
+        FROM contexts
+        GROUP BY 1
+    """)
+
+
+def downgrade() -> None:
+    """Drop rollup triggers, functions and tables."""
+    inspector = sa.inspect(op.get_bind())
+    if 'contexts' in inspector.get_table_names():
+        op.execute('DROP TRIGGER IF EXISTS contexts_stats_rollup_update ON contexts')
+        op.execute('DROP TRIGGER IF EXISTS contexts_stats_rollup_write ON contexts')
+    op.execute('DROP FUNCTION IF EXISTS contexts_stats_rollup_update()')
+    op.execute('DROP FUNCTION IF EXISTS context_stats_rollup_apply(text, text, text, double precision, integer)')
+    op.execute('DROP TABLE IF EXISTS context_activity_daily')
+    op.execute('DROP TABLE IF EXISTS context_stats_rollup')
@@ -0,0 +1,48 @@
+"""Add keyset pagination indexes for knowledge base context listings
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+# (index name, columns): equality filters lead, then the (sort field, id) seek columns.
+# Other filter and sort combinations fall back to the status indexes.
+KEYSET_INDEXES = [
+    ('ix_contexts_updated_at_id', ['updated_at', 'id']),
+    ('ix_contexts_status_updated_at_id', ['status', 'updated_at', 'id']),
+    ('ix_contexts_status_created_at_id', ['status', 'created_at', 'id']),
+    ('ix_contexts_status_quality_score_id', ['status', 'quality_score', 'id']),
+    ('ix_contexts_domain_status_updated_at_id', ['domain', 'status', 'updated_at', 'id']),
+    ('ix_contexts_author_status_updated_at_id', ['author', 'status', 'updated_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Create composite indexes backing keyset pagination of contexts."""
+    inspector = sa.inspect(op.get_bind())
+    # The contexts table is owned by the context service and may not exist yet
+    if 'contexts' not in inspector.get_table_names():
+        return
+
+    existing_columns = {column['name'] for column in inspector.get_columns('contexts')}
+    existing_indexes = {index['name'] for index in inspector.get_indexes('contexts')}
+    for name, columns in KEYSET_INDEXES:
+        if set(columns) <= existing_columns and name not in existing_indexes:
+            op.create_index(name, 'contexts', columns)
+
+    op.execute('ANALYZE contexts')
+
+
+def downgrade() -> None:
+    """Drop context keyset pagination indexes."""
+    for name, _ in reversed(KEYSET_INDEXES):
+        op.execute(f'DROP INDEX IF EXISTS {name}')
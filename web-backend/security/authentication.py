@@ -7,7 +7,6 @@ Comprehensive authentication system for African agricultural platform
 import os
 import sys
 import json
-import bcrypt
 import jwt
 import time
 import uuid
@@ -19,7 +18,6 @@ from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 from dataclasses import dataclass, asdict
 import redis
-import psycopg2
 from psycopg2 import sql, extras
 import requests
 from cryptography.fernet import Fernet
@@ -32,6 +30,10 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 
 from infrastructure.docker.config_management import get_config
 from infrastructure.logging.logging_config import get_logger
+from security.password_hashing import password_hasher, PasswordHashingBusy
+from security.login_tracking import LoginAttemptTracker, LoginWriteBehind
+from security.database_pool import DatabasePool, get_database_pool
+from security.service_registry import lazy_service
 
 # Configure logging
 logger = get_logger('security', 'kenya', 'production')
@@ -120,8 +122,8 @@ class AuthenticationManager:
             decode_responses=True
         )
 
-        # Initialize database connection
-        self.db_connection = self._get_database_connection()
+        # Shared database connection pool
+        self.db = self._get_database_pool()
 
         # JWT configuration
         self.jwt_secret = self.config.security.jwt_secret_key
@@ -137,6 +139,16 @@ class AuthenticationManager:
         self.lockout_duration = timedelta(minutes=30)
         self.session_timeout = timedelta(hours=24)
 
+        # Failed attempts live in Redis; last-login is written behind in batches
+        self.login_attempts = LoginAttemptTracker(
+            self.redis_client,
+            max_attempts=self.max_login_attempts,
+            lockout_seconds=self.lockout_duration.total_seconds()
+        )
+        self.last_login_writer = LoginWriteBehind(
+            self.redis_client, "authentication", self._apply_last_login_batch
+        )
+
         # OAuth2 providers
         self.oauth2_providers = {
             'google': {
@@ -155,14 +167,15 @@ class AuthenticationManager:
             }
         }
 
-    def _get_database_connection(self):
-        """Get database connection"""
-        return psycopg2.connect(
+    def _get_database_pool(self) -> DatabasePool:
+        """Get the shared database pool"""
+        return get_database_pool(
             host=self.config.database.host,
             port=self.config.database.port,
             database=self.config.database.database,
             user=self.config.database.username,
-            password=self.config.database.password
+            password=self.config.database.password,
+            cursor_factory=extras.DictCursor
         )
 
     def _generate_encryption_key(self):
@@ -179,14 +192,12 @@ class AuthenticationManager:
         return key
 
     def hash_password(self, password: str) -> str:
-        """Hash password using bcrypt"""
-        salt = bcrypt.gensalt(rounds=12)
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        """Hash password using bcrypt on the bounded hashing pool"""
+        return password_hasher.hash_sync(password, rounds=12)
 
     def verify_password(self, password: str, hashed_password: str) -> bool:
-        """Verify password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+        """Verify password against hash on the bounded hashing pool"""
+        return password_hasher.verify_sync(password, hashed_password)
 
     def generate_jwt_token(self, user: AuthUser, additional_claims: Dict[str, Any] = None) -> Tuple[str, str]:
         """Generate JWT access and refresh tokens"""
@@ -264,7 +275,7 @@ class AuthenticationManager:
             user_id = self._generate_user_id(tenant_id)
 
             # Create user in database
-            with self.db_connection.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO users (
                         id, username, email, password_hash, first_name, last_name,
@@ -291,7 +302,7 @@ class AuthenticationManager:
                 ))
 
                 result = cursor.fetchone()
-                self.db_connection.commit()
+                cursor.connection.commit()
 
             # Create user object
             user = AuthUser(
@@ -323,6 +334,8 @@ class AuthenticationManager:
                 refresh_token=refresh_token
             )
 
+        except PasswordHashingBusy:
+            raise
         except Exception as e:
             self.logger.error(f"User creation failed: {e}")
             return AuthResult(
@@ -342,10 +355,14 @@ class AuthenticationManager:
                 )
 
             # Check if user is locked out
-            if user.locked_until and user.locked_until > datetime.utcnow():
+            locked_until = user.locked_until
+            lockout_remaining = self.login_attempts.lockout_remaining(user.id)
+            if lockout_remaining:
+                locked_until = datetime.utcnow() + timedelta(seconds=lockout_remaining)
+            if locked_until and locked_until > datetime.utcnow():
                 return AuthResult(
                     success=False,
-                    error_message=f"Account locked. Try again after {user.locked_until.strftime('%Y-%m-%d %H:%M:%S')}"
+                    error_message=f"Account locked. Try again after {locked_until.strftime('%Y-%m-%d %H:%M:%S')}"
                 )
 
             # Check user status
@@ -372,6 +389,8 @@ class AuthenticationManager:
             # Successful authentication
             return self._handle_successful_login(user)
 
+        except PasswordHashingBusy:
+            raise
         except Exception as e:
             self.logger.error(f"Authentication failed: {e}")
             return AuthResult(
@@ -382,14 +401,12 @@ class AuthenticationManager:
     def _handle_successful_login(self, user: AuthUser) -> AuthResult:
         """Handle successful login"""
         try:
-            # Reset failed login attempts
-            self._reset_failed_attempts(user.id)
-
-            # Update last login time
-            self._update_last_login(user.id)
-
-            # Generate session
-            session_id = self._create_session(user)
+            # Reset attempts, queue last login and create the session in one round trip
+            pipe = self.redis_client.pipeline(transaction=False)
+            self.login_attempts.reset(user.id, pipe)
+            self._update_last_login(user.id, pipe)
+            session_id = self._create_session(user, pipe)
+            pipe.execute()
 
             # Generate tokens
             additional_claims = {
@@ -418,13 +435,11 @@ class AuthenticationManager:
     def _handle_failed_login(self, user: AuthUser) -> AuthResult:
         """Handle failed login attempt"""
         try:
-            # Increment failed login attempts
-            failed_attempts = self._increment_failed_attempts(user.id)
+            # Increment failed login attempts, locking atomically at the limit
+            failed_attempts, locked_for = self.login_attempts.register_failure(user.id)
 
-            # Check if account should be locked
-            if failed_attempts >= self.max_login_attempts:
-                lock_until = datetime.utcnow() + self.lockout_duration
-                self._lock_user_account(user.id, lock_until)
+            if locked_for:
+                lock_until = datetime.utcnow() + timedelta(seconds=locked_for)
 
                 return AuthResult(
                     success=False,
@@ -445,7 +460,7 @@ class AuthenticationManager:
 
     def _user_exists(self, username: str, email: str) -> bool:
         """Check if user exists by username or email"""
-        with self.db_connection.cursor() as cursor:
+        with self.db.cursor() as cursor:
             cursor.execute(
                 "SELECT COUNT(*) FROM users WHERE username = %s OR email = %s",
                 (username, email)
@@ -455,7 +470,7 @@ class AuthenticationManager:
 
     def _get_user_by_username(self, username: str) -> Optional[AuthUser]:
         """Get user by username"""
-        with self.db_connection.cursor(cursor_factory=extras.DictCursor) as cursor:
+        with self.db.cursor(cursor_factory=extras.DictCursor) as cursor:
             cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
             row = cursor.fetchone()
 
@@ -492,7 +507,7 @@ class AuthenticationManager:
         hash_input = f"{tenant_id}_{int(time.time())}_{uuid.uuid4()}"
         return abs(int(hashlib.sha256(hash_input.encode()).hexdigest(), 16)) % (2**31)
 
-    def _create_session(self, user: AuthUser) -> str:
+    def _create_session(self, user: AuthUser, pipe=None) -> str:
         """Create user session in Redis"""
         session_id = str(uuid.uuid4())
         session_data = {
@@ -508,60 +523,40 @@ class AuthenticationManager:
         }
 
         # Store session in Redis
-        self.redis_client.setex(
+        client = self.redis_client if pipe is None else pipe
+        client.setex(
             f"session:{session_id}",
             int(self.session_timeout.total_seconds()),
             json.dumps(session_data)
         )
 
         # Store user sessions list
-        self.redis_client.sadd(f"user_sessions:{user.id}", session_id)
+        client.sadd(f"user_sessions:{user.id}", session_id)
 
         return session_id
 
-    def _reset_failed_attempts(self, user_id: int):
-        """Reset failed login attempts"""
-        with self.db_connection.cursor() as cursor:
-            cursor.execute(
-                "UPDATE users SET failed_login_attempts = 0, locked_until = NULL WHERE id = %s",
-                (user_id,)
-            )
-            self.db_connection.commit()
-
-    def _increment_failed_attempts(self, user_id: int) -> int:
-        """Increment failed login attempts and return new count"""
-        with self.db_connection.cursor() as cursor:
-            cursor.execute(
-                "UPDATE users SET failed_login_attempts = failed_login_attempts + 1 WHERE id = %s RETURNING failed_login_attempts",
-                (user_id,)
-            )
-            count = cursor.fetchone()[0]
-            self.db_connection.commit()
-            return count
-
-    def _lock_user_account(self, user_id: int, lock_until: datetime):
-        """Lock user account"""
-        with self.db_connection.cursor() as cursor:
-            cursor.execute(
-                "UPDATE users SET locked_until = %s WHERE id = %s",
-                (lock_until, user_id)
-            )
-            self.db_connection.commit()
-
-    def _update_last_login(self, user_id: int):
-        """Update user's last login time"""
-        with self.db_connection.cursor() as cursor:
-            cursor.execute(
-                "UPDATE users SET last_login_at = %s WHERE id = %s",
-                (datetime.utcnow(), user_id)
-            )
-            self.db_connection.commit()
+    def _update_last_login(self, user_id: int, pipe=None):
+        """Queue the user's last login time for the next batched write"""
+        self.last_login_writer.record(user_id, {'last_login_at': datetime.utcnow().isoformat()}, pipe=pipe)
+
+    def _apply_last_login_batch(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        """Write coalesced last-login times and clear stale lockouts in one transaction"""
+        rows = [(int(user_id), entry['last_login_at']) for user_id, entry in batch]
+        with self.db.cursor() as cursor:
+            extras.execute_values(cursor, """
+                UPDATE users AS u
+                SET last_login_at = v.last_login_at,
+                    failed_login_attempts = 0,
+                    locked_until = NULL
+                FROM (VALUES %s) AS v(id, last_login_at)
+                WHERE u.id = v.id
+            """, rows, template="(%s, %s::timestamp)")
 
     def _verify_biometric(self, user_id: int, biometric_data: str) -> bool:
         """Verify biometric data"""
         try:
             # Get stored biometric data
-            with self.db_connection.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute(
                     "SELECT biometric_hash, expires_at FROM biometric_data WHERE user_id = %s",
                     (user_id,)
@@ -691,7 +686,7 @@ class AuthenticationManager:
 
     def _get_user_by_id(self, user_id: int) -> Optional[AuthUser]:
         """Get user by ID"""
-        with self.db_connection.cursor(cursor_factory=extras.DictCursor) as cursor:
+        with self.db.cursor(cursor_factory=extras.DictCursor) as cursor:
             cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
             row = cursor.fetchone()
 
@@ -786,13 +781,16 @@ class AuthenticationManager:
             self.logger.error(f"Session cleanup failed: {e}")
 
 
-# Global authentication manager instance
-auth_manager = AuthenticationManager()
+# Global authentication manager instance, built on first use
+auth_manager = lazy_service(
+    "auth_manager", AuthenticationManager,
+    on_shutdown=lambda manager: manager.last_login_writer.stop()
+)
 
 
 def get_auth_manager() -> AuthenticationManager:
     """Get global authentication manager instance"""
-    return auth_manager
+    return auth_manager.get()
 
 
 if __name__ == "__main__":
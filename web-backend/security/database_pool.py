@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Fataplus Database Pool
+Shared, health-checked PostgreSQL connection pool for service singletons
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extras import RealDictCursor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pool Configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "5"))
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "10000"))
+
+# Errors after which a connection cannot be trusted and is discarded
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class DatabasePoolTimeout(Exception):
+    """Raised when no connection becomes free within the acquire timeout"""
+
+
+class DatabasePool:
+    """Thread-safe pool handing out health-checked connections"""
+
+    def __init__(self, min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE,
+                 acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT,
+                 health_check_interval: float = DB_POOL_HEALTH_CHECK_INTERVAL,
+                 statement_timeout_ms: int = DB_STATEMENT_TIMEOUT_MS,
+                 **connect_kwargs):
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size)
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.statement_timeout_ms = statement_timeout_ms
+
+        connect_kwargs.setdefault("cursor_factory", RealDictCursor)
+        if statement_timeout_ms:
+            connect_kwargs.setdefault("options", f"-c statement_timeout={statement_timeout_ms}")
+        self.connect_kwargs = connect_kwargs
+
+        self._pool: Optional[pg_pool.ThreadedConnectionPool] = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._last_used: Dict[int, float] = {}
+
+        # Metrics
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.in_use = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.failed_health_checks = 0
+        self.total_wait_seconds = 0.0
+
+    def _get_pool(self) -> pg_pool.ThreadedConnectionPool:
+        """Open the pool on first use"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pg_pool.ThreadedConnectionPool(
+                        self.min_size, self.max_size, **self.connect_kwargs
+                    )
+                    logger.info(f"Database pool opened (max {self.max_size} connections)")
+        return self._pool
+
+    def _is_healthy(self, conn) -> bool:
+        """Ping connections that have been idle longer than the check interval"""
+        if conn.closed:
+            return False
+
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.health_check_interval:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except CONNECTION_ERRORS:
+            with self._metrics_lock:
+                self.failed_health_checks += 1
+            return False
+
+    def _release(self, conn, discard: bool = False) -> None:
+        """Return a connection to the pool, closing it if it is broken"""
+        discard = discard or bool(conn.closed)
+        if discard:
+            self._last_used.pop(id(conn), None)
+            with self._metrics_lock:
+                self.discarded += 1
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+
+        try:
+            self._get_pool().putconn(conn, close=discard)
+        finally:
+            with self._metrics_lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Check out a healthy connection, waiting up to the acquire timeout for a free slot"""
+        started_at = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise DatabasePoolTimeout(f"No database connection available within {self.acquire_timeout}s")
+
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.total_wait_seconds += time.perf_counter() - started_at
+
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            if not self._is_healthy(conn):
+                # Replace a dropped connection transparently
+                pool.putconn(conn, close=True)
+                with self._metrics_lock:
+                    self.discarded += 1
+                conn = pool.getconn()
+        except Exception:
+            with self._metrics_lock:
+                self.in_use -= 1
+            self._slots.release()
+            raise
+
+        discard = False
+        try:
+            yield conn
+        except CONNECTION_ERRORS:
+            discard = True
+            raise
+        finally:
+            if not discard and not conn.closed:
+                try:
+                    conn.rollback()
+                except CONNECTION_ERRORS:
+                    discard = True
+            self._release(conn, discard)
+
+    @contextmanager
+    def cursor(self, cursor_factory=None, timeout_ms: Optional[int] = None):
+        """Run statements in one transaction, committed on success and rolled back on error"""
+        with self.connection() as conn:
+            with conn.cursor(cursor_factory=cursor_factory) as cursor:
+                if timeout_ms is not None and timeout_ms != self.statement_timeout_ms:
+                    cursor.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
+                yield cursor
+            conn.commit()
+
+    def health_check(self) -> bool:
+        """Check that a connection can be obtained and used"""
+        try:
+            with self.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except Exception as e:
+            logger.error(f"Database health check failed: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool metrics"""
+        with self._metrics_lock:
+            return {
+                'max_size': self.max_size,
+                'in_use': self.in_use,
+                'available': self.max_size - self.in_use,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'discarded': self.discarded,
+                'failed_health_checks': self.failed_health_checks,
+                'avg_wait_ms': self.total_wait_seconds / self.checkouts * 1000 if self.checkouts else 0.0
+            }
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+                self._last_used.clear()
+
+
+_pools: Dict[Tuple, DatabasePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_database_pool(**connect_kwargs) -> DatabasePool:
+    """Get the shared pool for a set of connection settings, defaulting to the DB_* environment"""
+    if not connect_kwargs:
+        connect_kwargs = {
+            "host": os.getenv("DB_HOST", "localhost"),
+            "port": int(os.getenv("DB_PORT", "5432")),
+            "database": os.getenv("DB_NAME", "fataplus"),
+            "user": os.getenv("DB_USER", "fataplus"),
+            "password": os.getenv("DB_PASSWORD", "")
+        }
+
+    key = tuple(sorted(connect_kwargs.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = DatabasePool(**connect_kwargs)
+        return _pools[key]
+
+
+def close_database_pools() -> None:
+    """Close every shared pool"""
+    with _pools_lock:
+        for database_pool in _pools.values():
+            database_pool.close()
@@ -7,6 +7,8 @@ Implements JWT token generation, validation, and API endpoint protection
 import os
 import json
 import time
+import asyncio
+import hashlib
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List, Tuple
@@ -21,7 +23,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field, validator
 
 # Import our authentication manager
-from .authentication import AuthenticationManager, AuthResult, AuthMethod
+from .authentication import AuthenticationManager, AuthResult, AuthMethod, auth_manager
+from .local_cache import TTLCache, BloomFilter, MISSING
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -34,6 +37,15 @@ JWT_REFRESH_TOKEN_EXPIRE_DAYS = 7
 JWT_ISSUER = "fataplus-api"
 JWT_AUDIENCE = "fataplus-client"
 
+# Verified token cache and revocation filter configuration
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("JWT_VERIFIED_CACHE_SIZE", "50000"))
+VERIFIED_TOKEN_CACHE_TTL = int(os.getenv("JWT_VERIFIED_CACHE_TTL", "300"))
+REVOCATION_FILTER_CAPACITY = int(os.getenv("JWT_REVOCATION_FILTER_CAPACITY", "100000"))
+REVOCATION_FILTER_ERROR_RATE = 0.001
+REVOCATION_SYNC_INTERVAL = float(os.getenv("JWT_REVOCATION_SYNC_INTERVAL", "1"))
+REVOCATION_REBUILD_INTERVAL = 600  # Full rebuild drops expired entries
+REVOCATION_RETENTION = JWT_REFRESH_TOKEN_EXPIRE_DAYS * 86400  # Longest token lifetime
+
 # Redis Configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 redis_client = redis.from_url(REDIS_URL)
@@ -58,7 +70,7 @@ class TokenPayload:
     permissions: List[str]
     auth_method: str
     token_type: str
-    iat: int  # Issued at
+    iat: float  # Issued at, seconds with millisecond precision
     exp: int  # Expiration
     iss: str  # Issuer
     aud: str  # Audience
@@ -83,12 +95,22 @@ class TokenValidationResult:
 
 
 class TokenBlacklist:
-    """Token blacklist management using Redis"""
+    """Token blacklist management using Redis with a local Bloom filter of revocations"""
 
     def __init__(self, redis_client: redis.Redis):
         self.redis_client = redis_client
         self.blacklist_prefix = "token:blacklist"
         self.refresh_token_prefix = "token:refresh"
+        self.user_revoked_prefix = "token:user_revoked"
+        self.revocation_log_key = "token:revocation_log"
+        self.revocation_generation_key = "token:revocation_generation"
+
+        # Local replica of the revocation log, built lazily on first check
+        self.revoked_filter: Optional[BloomFilter] = None
+        self._generation = None
+        self._synced_until = 0.0
+        self._last_sync = 0.0
+        self._last_rebuild = 0.0
 
     def blacklist_token(self, token_jti: str, expires_at: datetime) -> None:
         """Add token to blacklist until expiration"""
@@ -96,13 +118,29 @@ class TokenBlacklist:
         if ttl > 0:
             key = f"{self.blacklist_prefix}:{token_jti}"
             self.redis_client.setex(key, ttl, "blacklisted")
+            self._record_revocation(token_jti)
             logger.info(f"Token {token_jti} blacklisted until {expires_at}")
 
     def is_blacklisted(self, token_jti: str) -> bool:
         """Check if token is blacklisted"""
+        if not self._might_be_revoked(token_jti):
+            return False
+
         key = f"{self.blacklist_prefix}:{token_jti}"
         return self.redis_client.exists(key) > 0
 
+    def is_user_revoked(self, user_id: str, issued_at: float) -> bool:
+        """Check if a token issued at the given time predates a user-wide revocation"""
+        if not self._might_be_revoked(f"user:{user_id}"):
+            return False
+
+        revoked_at = self.redis_client.get(f"{self.user_revoked_prefix}:{user_id}")
+        if revoked_at is None:
+            return False
+
+        # Cut-offs are in milliseconds so a token issued right after a revoke-all survives it
+        return round(issued_at * 1000) <= int(revoked_at)
+
     def store_refresh_token(self, token_jti: str, user_id: str, expires_at: datetime) -> None:
         """Store refresh token for validation"""
         ttl = int((expires_at - datetime.utcnow()).total_seconds())
@@ -117,10 +155,80 @@ class TokenBlacklist:
         return stored_user_id and stored_user_id.decode() == user_id
 
     def revoke_user_tokens(self, user_id: str) -> None:
-        """Revoke all tokens for a user"""
-        # This would require tracking user tokens, for now just blacklist refresh tokens
+        """Revoke all tokens issued to a user up to now"""
+        self.redis_client.setex(
+            f"{self.user_revoked_prefix}:{user_id}",
+            REVOCATION_RETENTION,
+            int(time.time() * 1000)  # Same clock as the iat claim, in milliseconds
+        )
+        self._record_revocation(f"user:{user_id}")
         logger.info(f"Revoking all tokens for user {user_id}")
-        # Implementation would depend on how we track user tokens
+
+    def _record_revocation(self, entry: str) -> None:
+        """Publish a revocation to the shared log and the local filter"""
+        pipe = self.redis_client.pipeline()
+        pipe.zadd(self.revocation_log_key, {entry: time.time()})
+        pipe.incr(self.revocation_generation_key)
+        pipe.execute()
+
+        if self.revoked_filter is not None:
+            self.revoked_filter.add(entry)
+
+    def _might_be_revoked(self, entry: str) -> bool:
+        """Check the local filter, falling back to Redis when it cannot be synced"""
+        try:
+            self._sync_filter()
+        except redis.RedisError as e:
+            logger.warning(f"Revocation filter sync failed, checking Redis directly: {e}")
+            return True
+
+        return entry in self.revoked_filter
+
+    def _sync_filter(self) -> None:
+        """Rebuild or incrementally update the filter from the revocation log"""
+        now = time.monotonic()
+        if self.revoked_filter is None or now - self._last_rebuild > REVOCATION_REBUILD_INTERVAL:
+            self._rebuild_filter()
+            return
+
+        if now - self._last_sync < REVOCATION_SYNC_INTERVAL:
+            return
+        self._last_sync = now
+
+        generation = self.redis_client.get(self.revocation_generation_key)
+        if generation == self._generation:
+            return
+
+        # Overlap by the sync interval to tolerate writers with slightly skewed clocks
+        entries = self.redis_client.zrangebyscore(
+            self.revocation_log_key, self._synced_until - REVOCATION_SYNC_INTERVAL, "+inf", withscores=True
+        )
+        for entry, revoked_at in entries:
+            self.revoked_filter.add(entry.decode() if isinstance(entry, bytes) else entry)
+            self._synced_until = max(self._synced_until, revoked_at)
+        self._generation = generation
+
+    def _rebuild_filter(self) -> None:
+        """Rebuild the filter from unexpired revocations"""
+        pipe = self.redis_client.pipeline()
+        pipe.zremrangebyscore(self.revocation_log_key, "-inf", time.time() - REVOCATION_RETENTION)
+        pipe.get(self.revocation_generation_key)
+        pipe.zrange(self.revocation_log_key, 0, -1, withscores=True)
+        _, generation, entries = pipe.execute()
+
+        revoked_filter = BloomFilter(
+            max(REVOCATION_FILTER_CAPACITY, 2 * len(entries)), REVOCATION_FILTER_ERROR_RATE
+        )
+        synced_until = 0.0
+        for entry, revoked_at in entries:
+            revoked_filter.add(entry.decode() if isinstance(entry, bytes) else entry)
+            synced_until = max(synced_until, revoked_at)
+
+        self.revoked_filter = revoked_filter
+        self._generation = generation
+        self._synced_until = synced_until
+        self._last_sync = self._last_rebuild = time.monotonic()
+        logger.info(f"Rebuilt token revocation filter with {len(entries)} entries")
 
 
 class JWTManager:
@@ -130,6 +238,7 @@ class JWTManager:
         self.secret_key = secret_key
         self.algorithm = algorithm
         self.token_blacklist = TokenBlacklist(redis_client)
+        self.verified_tokens = TTLCache(VERIFIED_TOKEN_CACHE_SIZE, VERIFIED_TOKEN_CACHE_TTL)
 
     def generate_token(self, payload: TokenPayload) -> str:
         """Generate JWT token from payload"""
@@ -140,25 +249,38 @@ class JWTManager:
     def decode_token(self, token: str) -> TokenValidationResult:
         """Decode and validate JWT token"""
         try:
-            # Decode token
-            payload_dict = jwt.decode(
-                token,
-                self.secret_key,
-                algorithms=[self.algorithm],
-                issuer=JWT_ISSUER,
-                audience=JWT_AUDIENCE
-            )
+            # Reuse the payload of a token whose signature was already verified
+            token_digest = hashlib.sha256(token.encode()).digest()
+            payload = self.verified_tokens.get(token_digest)
+
+            if payload is MISSING or payload.exp <= time.time():
+                # Decode token
+                payload_dict = jwt.decode(
+                    token,
+                    self.secret_key,
+                    algorithms=[self.algorithm],
+                    issuer=JWT_ISSUER,
+                    audience=JWT_AUDIENCE
+                )
+
+                # Convert to TokenPayload
+                payload = TokenPayload(**payload_dict)
+                self.verified_tokens.set(
+                    token_digest, payload, min(VERIFIED_TOKEN_CACHE_TTL, payload.exp - time.time())
+                )
 
             # Check if token is blacklisted
-            token_jti = payload_dict.get('jti')
-            if token_jti and self.token_blacklist.is_blacklisted(token_jti):
+            if payload.jti and self.token_blacklist.is_blacklisted(payload.jti):
                 return TokenValidationResult(
                     is_valid=False,
                     error="Token has been revoked"
                 )
 
-            # Convert to TokenPayload
-            payload = TokenPayload(**payload_dict)
+            if self.token_blacklist.is_user_revoked(payload.sub, payload.iat):
+                return TokenValidationResult(
+                    is_valid=False,
+                    error="Token has been revoked"
+                )
 
             return TokenValidationResult(is_valid=True, payload=payload)
 
@@ -173,9 +295,10 @@ class JWTManager:
                            email: str, roles: List[str], permissions: List[str],
                            auth_method: str = AuthMethod.PASSWORD) -> Tuple[str, datetime]:
         """Generate access token"""
-        now = datetime.utcnow()
+        issued_at = time.time()
+        now = datetime.utcfromtimestamp(issued_at)
         expires_at = now + timedelta(minutes=JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
-        token_jti = f"access_{user_id}_{int(now.timestamp())}"
+        token_jti = f"access_{user_id}_{int(issued_at)}"
 
         payload = TokenPayload(
             sub=user_id,
@@ -186,8 +309,8 @@ class JWTManager:
             permissions=permissions,
             auth_method=auth_method,
             token_type=TokenType.ACCESS.value,
-            iat=int(now.timestamp()),
-            exp=int(expires_at.timestamp()),
+            iat=int(issued_at * 1000) / 1000,
+            exp=int(issued_at) + JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60,
             iss=JWT_ISSUER,
             aud=JWT_AUDIENCE,
             jti=token_jti
@@ -198,9 +321,10 @@ class JWTManager:
 
     def generate_refresh_token(self, user_id: str) -> Tuple[str, datetime]:
         """Generate refresh token"""
-        now = datetime.utcnow()
+        issued_at = time.time()
+        now = datetime.utcfromtimestamp(issued_at)
         expires_at = now + timedelta(days=JWT_REFRESH_TOKEN_EXPIRE_DAYS)
-        token_jti = f"refresh_{user_id}_{int(now.timestamp())}"
+        token_jti = f"refresh_{user_id}_{int(issued_at)}"
 
         payload = TokenPayload(
             sub=user_id,
@@ -211,8 +335,8 @@ class JWTManager:
             permissions=[],
             auth_method="refresh",
             token_type=TokenType.REFRESH.value,
-            iat=int(now.timestamp()),
-            exp=int(expires_at.timestamp()),
+            iat=int(issued_at * 1000) / 1000,
+            exp=int(issued_at) + JWT_REFRESH_TOKEN_EXPIRE_DAYS * 86400,
             iss=JWT_ISSUER,
             aud=JWT_AUDIENCE,
             jti=token_jti
@@ -290,6 +414,7 @@ class JWTManager:
             if result.is_valid and result.payload:
                 expires_at = datetime.fromtimestamp(result.payload.exp)
                 self.token_blacklist.blacklist_token(result.payload.jti, expires_at)
+                self.verified_tokens.pop(hashlib.sha256(token.encode()).digest())
                 return True
             return False
         except Exception as e:
@@ -401,8 +526,9 @@ class JWTAuthAPI:
 
     async def login(self, request: TokenRequest) -> TokenResponse:
         """User login endpoint"""
-        # Authenticate user
-        auth_result = self.auth_manager.authenticate_user(
+        # Authenticate user off the event loop; password checks run on the hashing pool
+        auth_result = await asyncio.to_thread(
+            self.auth_manager.authenticate_user,
             username=request.username,
             password=request.password,
             auth_method=request.auth_method,
@@ -490,8 +616,8 @@ class JWTAuthAPI:
 
 
 # Global instances
+# The authentication manager is shared with security.authentication and built on first use
 jwt_manager = JWTManager()
-auth_manager = AuthenticationManager()
 jwt_auth_api = JWTAuthAPI(jwt_manager, auth_manager)
 auth_middleware = APIAuthMiddleware(jwt_manager, auth_manager)
 
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Fataplus Login Tracking
+Atomic failed-attempt lockouts and write-behind last-login bookkeeping
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Tracking Configuration
+LOGIN_ATTEMPTS_PREFIX = "login_attempts"
+LOGIN_LOCKOUT_PREFIX = "login_lockout"
+LOGIN_WRITEBEHIND_PREFIX = "login_writebehind"
+LOGIN_FLUSH_INTERVAL = float(os.getenv("LOGIN_FLUSH_INTERVAL", "5"))
+LOGIN_FLUSH_BATCH_SIZE = int(os.getenv("LOGIN_FLUSH_BATCH_SIZE", "500"))
+LOGIN_EVENTS_PER_USER = 20
+
+# Count a failure and lock the account once the limit is reached, in one round trip
+FAILURE_SCRIPT = """
+local attempts = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if attempts >= tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[2], attempts, 'EX', ARGV[3])
+    redis.call('DEL', KEYS[1])
+end
+return {attempts, redis.call('TTL', KEYS[2])}
+"""
+
+# Coalesce a pending login record, keeping the newest fields and appending events
+RECORD_SCRIPT = """
+local entry = cjson.decode(ARGV[2])
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if current then
+    local previous = cjson.decode(current)
+    if type(previous.events) == 'table' and type(entry.events) == 'table' then
+        local merged = {}
+        for _, event in ipairs(previous.events) do table.insert(merged, event) end
+        for _, event in ipairs(entry.events) do table.insert(merged, event) end
+        local limit = tonumber(ARGV[3])
+        while #merged > limit do table.remove(merged, 1) end
+        entry.events = merged
+    end
+end
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(entry))
+return redis.call('HLEN', KEYS[1])
+"""
+
+# Take up to ARGV[1] pending records atomically so concurrent flushers never overlap
+DRAIN_SCRIPT = """
+local fields = redis.call('HKEYS', KEYS[1])
+local limit = math.min(#fields, tonumber(ARGV[1]))
+local drained = {}
+for i = 1, limit do
+    table.insert(drained, fields[i])
+    table.insert(drained, redis.call('HGET', KEYS[1], fields[i]))
+    redis.call('HDEL', KEYS[1], fields[i])
+end
+return drained
+"""
+
+
+class LoginAttemptTracker:
+    """Tracks failed logins and lockouts in Redis"""
+
+    def __init__(self, redis_client: redis.Redis, max_attempts: int, lockout_seconds: int,
+                 attempt_window_seconds: Optional[int] = None):
+        self.redis_client = redis_client
+        self.max_attempts = max_attempts
+        self.lockout_seconds = int(lockout_seconds)
+        self.attempt_window_seconds = int(attempt_window_seconds or lockout_seconds)
+        self._failure_script = redis_client.register_script(FAILURE_SCRIPT)
+
+    def _attempts_key(self, user_id: Any) -> str:
+        return f"{LOGIN_ATTEMPTS_PREFIX}:{user_id}"
+
+    def _lockout_key(self, user_id: Any) -> str:
+        return f"{LOGIN_LOCKOUT_PREFIX}:{user_id}"
+
+    def lockout_remaining(self, user_id: Any) -> int:
+        """Get seconds left on a lockout, or 0 if not locked"""
+        try:
+            return max(0, self.redis_client.ttl(self._lockout_key(user_id)))
+        except redis.RedisError as e:
+            logger.error(f"Failed to check lockout for user {user_id}: {e}")
+            return 0
+
+    def is_locked(self, user_id: Any) -> bool:
+        """Check if a user is locked out"""
+        return self.lockout_remaining(user_id) > 0
+
+    def register_failure(self, user_id: Any) -> Tuple[int, int]:
+        """Record a failed login, returning (attempts, lockout seconds remaining)"""
+        attempts, lockout_ttl = self._failure_script(
+            keys=[self._attempts_key(user_id), self._lockout_key(user_id)],
+            args=[self.max_attempts, self.attempt_window_seconds, self.lockout_seconds]
+        )
+        return int(attempts), max(0, int(lockout_ttl))
+
+    def reset(self, user_id: Any, pipe=None) -> None:
+        """Clear failed attempts after a successful login"""
+        (self.redis_client if pipe is None else pipe).delete(self._attempts_key(user_id), self._lockout_key(user_id))
+
+
+class LoginWriteBehind:
+    """Coalesces last-login bookkeeping in Redis and applies it to the database in batches"""
+
+    def __init__(self, redis_client: redis.Redis, name: str,
+                 apply_batch: Callable[[List[Tuple[str, Dict[str, Any]]]], None],
+                 flush_interval: float = LOGIN_FLUSH_INTERVAL,
+                 batch_size: int = LOGIN_FLUSH_BATCH_SIZE):
+        self.redis_client = redis_client
+        self.pending_key = f"{LOGIN_WRITEBEHIND_PREFIX}:{name}"
+        self.apply_batch = apply_batch
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._record_script = redis_client.register_script(RECORD_SCRIPT)
+        self._drain_script = redis_client.register_script(DRAIN_SCRIPT)
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
+
+    def record(self, user_id: Any, fields: Dict[str, Any], events: Optional[List[Dict[str, Any]]] = None,
+               pipe=None) -> None:
+        """Queue a login record, merging with any record not yet flushed"""
+        entry = dict(fields)
+        if events:
+            entry['events'] = events
+
+        self._record_script(
+            keys=[self.pending_key],
+            args=[str(user_id), json.dumps(entry, default=str), LOGIN_EVENTS_PER_USER],
+            client=self.redis_client if pipe is None else pipe
+        )
+        self.start()
+
+    def flush(self) -> int:
+        """Apply pending records to the database, returning how many were written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                drained = self._drain_script(keys=[self.pending_key], args=[self.batch_size])
+                if not drained:
+                    return written
+
+                batch = []
+                for user_id, raw in zip(drained[0::2], drained[1::2]):
+                    entry = json.loads(raw)
+                    # cjson encodes an empty array as an object
+                    if not isinstance(entry.get('events'), list):
+                        entry['events'] = []
+                    batch.append((user_id, entry))
+
+                try:
+                    self.apply_batch(batch)
+                except Exception:
+                    self._requeue(drained)
+                    raise
+
+                written += len(batch)
+                if len(batch) < self.batch_size:
+                    return written
+
+    def _requeue(self, drained: List[str]) -> None:
+        """Put records back after a failed write without overwriting newer ones"""
+        pipe = self.redis_client.pipeline()
+        for user_id, raw in zip(drained[0::2], drained[1::2]):
+            pipe.hsetnx(self.pending_key, user_id, raw)
+        pipe.execute()
+
+    def _flush_periodically(self):
+        """Periodically flush pending records"""
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                written = self.flush()
+                if written:
+                    logger.debug(f"Flushed {written} login records from {self.pending_key}")
+            except Exception as e:
+                logger.error(f"Error flushing login records: {e}")
+
+    def start(self) -> None:
+        """Start the background flusher if it is not running"""
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+
+        with self._start_lock:
+            if self._flush_thread is None or not self._flush_thread.is_alive():
+                self._stop_event.clear()
+                self._flush_thread = threading.Thread(
+                    target=self._flush_periodically,
+                    name=f"{self.pending_key}-flush",
+                    daemon=True
+                )
+                self._flush_thread.start()
+
+    def stop(self) -> None:
+        """Stop the background flusher and write out remaining records"""
+        self._stop_event.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout=self.flush_interval + 1)
+            self._flush_thread = None
+
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error flushing login records on shutdown: {e}")
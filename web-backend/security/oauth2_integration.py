@@ -6,13 +6,14 @@ Support for multiple OAuth2 providers with token management and security
 
 import os
 import json
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
 from dataclasses import dataclass, field
 import redis
-import requests
+import httpx
 from fastapi import HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field, validator
@@ -21,6 +22,8 @@ import secrets
 import hashlib
 import base64
 
+from .local_cache import TTLCache, MISSING
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -37,6 +40,21 @@ OAUTH2_TOKEN_EXPIRE_MINUTES = 60
 OAUTH2_STATE_EXPIRE_MINUTES = 10
 OAUTH2_CODE_EXPIRE_MINUTES = 5
 
+# Provider HTTP client Configuration
+OAUTH2_HTTP_TIMEOUT = float(os.getenv("OAUTH2_HTTP_TIMEOUT", "10"))
+OAUTH2_HTTP_CONNECT_TIMEOUT = float(os.getenv("OAUTH2_HTTP_CONNECT_TIMEOUT", "3"))
+OAUTH2_HTTP_RETRIES = int(os.getenv("OAUTH2_HTTP_RETRIES", "2"))
+OAUTH2_HTTP_RETRY_BACKOFF = float(os.getenv("OAUTH2_HTTP_RETRY_BACKOFF", "0.2"))
+OAUTH2_HTTP_MAX_CONNECTIONS = int(os.getenv("OAUTH2_HTTP_MAX_CONNECTIONS", "100"))
+OAUTH2_HTTP_MAX_KEEPALIVE = int(os.getenv("OAUTH2_HTTP_MAX_KEEPALIVE", "20"))
+OAUTH2_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("OAUTH2_HTTP_KEEPALIVE_EXPIRY", "60"))
+OAUTH2_DISCOVERY_CACHE_TTL = int(os.getenv("OAUTH2_DISCOVERY_CACHE_TTL", "3600"))
+OAUTH2_DISCOVERY_RETRY_SECONDS = 60
+
+# Provider responses worth retrying on idempotent requests
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+GITHUB_EMAILS_URL = "https://api.github.com/user/emails"
+
 
 class OAuth2Provider(Enum):
     """Supported OAuth2 providers"""
@@ -104,13 +122,18 @@ class OAuth2UserInfo:
 class OAuth2Manager:
     """OAuth2 integration manager"""
 
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(self, redis_client: redis.Redis, transport: Optional[httpx.AsyncBaseTransport] = None):
         self.redis_client = redis_client
         self.state_prefix = "oauth2_state"
         self.code_prefix = "oauth2_code"
         self.token_prefix = "oauth2_token"
         self.provider_configs = self._load_provider_configs()
 
+        # Pooled provider client, opened on first use; a transport can point it at a stub provider
+        self._transport = transport
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._discovery_cache = TTLCache(max_entries=32, default_ttl=OAUTH2_DISCOVERY_CACHE_TTL)
+
     def _load_provider_configs(self) -> Dict[str, OAuth2Config]:
         """Load OAuth2 provider configurations"""
         configs = {}
@@ -125,7 +148,10 @@ class OAuth2Manager:
                 token_url="https://oauth2.googleapis.com/token",
                 user_info_url="https://www.googleapis.com/oauth2/v2/userinfo",
                 scopes=["openid", "email", "profile"],
-                redirect_uri=os.getenv("OAUTH2_REDIRECT_URI", "http://localhost:8000/auth/oauth2/callback")
+                redirect_uri=os.getenv("OAUTH2_REDIRECT_URI", "http://localhost:8000/auth/oauth2/callback"),
+                additional_config={
+                    "discovery_url": "https://accounts.google.com/.well-known/openid-configuration"
+                }
             )
 
         # Facebook OAuth2
@@ -177,7 +203,10 @@ class OAuth2Manager:
                 token_url="https://github.com/login/oauth/access_token",
                 user_info_url="https://api.github.com/user",
                 scopes=["user:email", "read:user"],
-                redirect_uri=os.getenv("OAUTH2_REDIRECT_URI", "http://localhost:8000/auth/oauth2/callback")
+                redirect_uri=os.getenv("OAUTH2_REDIRECT_URI", "http://localhost:8000/auth/oauth2/callback"),
+                additional_config={
+                    "emails_url": GITHUB_EMAILS_URL
+                }
             )
 
         # Mobile Money OAuth2 (African providers)
@@ -193,7 +222,8 @@ class OAuth2Manager:
                 redirect_uri=os.getenv("OAUTH2_REDIRECT_URI", "http://localhost:8000/auth/oauth2/callback"),
                 additional_config={
                     "supports_african_providers": True,
-                    "country_codes": ["KE", "NG", "GH", "ZA"]
+                    "country_codes": ["KE", "NG", "GH", "ZA"],
+                    "discovery_url": os.getenv("MOBILE_MONEY_DISCOVERY_URL", "")
                 }
             )
 
@@ -207,6 +237,72 @@ class OAuth2Manager:
         """Get list of enabled OAuth2 providers"""
         return [p for p, config in self.provider_configs.items() if config.enabled]
 
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Open the pooled keep-alive client on first use"""
+        if self._http_client is None or self._http_client.is_closed:
+            # Transport-level retries only cover failed connects, so they are safe for any method
+            transport = self._transport or httpx.AsyncHTTPTransport(
+                retries=OAUTH2_HTTP_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=OAUTH2_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=OAUTH2_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=OAUTH2_HTTP_KEEPALIVE_EXPIRY
+                )
+            )
+            self._http_client = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(OAUTH2_HTTP_TIMEOUT, connect=OAUTH2_HTTP_CONNECT_TIMEOUT)
+            )
+        return self._http_client
+
+    async def _request(self, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """Send a provider request, retrying transient failures when the request is idempotent"""
+        attempts = 1 + (OAUTH2_HTTP_RETRIES if idempotent else 0)
+        for attempt in range(attempts):
+            try:
+                response = await self._get_http_client().request(method, url, **kwargs)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt == attempts - 1:
+                    return response
+                logger.warning(f"Provider returned {response.status_code} for {url}, retrying")
+            except httpx.TransportError as e:
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"Provider request to {url} failed ({e}), retrying")
+
+            await asyncio.sleep(OAUTH2_HTTP_RETRY_BACKOFF * 2 ** attempt)
+
+    async def _get_endpoints(self, config: OAuth2Config) -> Dict[str, str]:
+        """Resolve token and user info endpoints, preferring cached provider discovery"""
+        endpoints = {'token_url': config.token_url, 'user_info_url': config.user_info_url}
+        discovery_url = config.additional_config.get('discovery_url')
+        if not discovery_url:
+            return endpoints
+
+        discovered = self._discovery_cache.get(discovery_url)
+        if discovered is MISSING:
+            try:
+                response = await self._request('GET', discovery_url)
+                response.raise_for_status()
+                document = response.json()
+                discovered = {
+                    'token_url': document.get('token_endpoint'),
+                    'user_info_url': document.get('userinfo_endpoint')
+                }
+                self._discovery_cache.set(discovery_url, discovered)
+            except (httpx.HTTPError, ValueError) as e:
+                # Fall back to the configured endpoints and try discovery again shortly
+                logger.warning(f"OAuth2 discovery failed for provider {config.provider}: {e}")
+                discovered = {}
+                self._discovery_cache.set(discovery_url, discovered, ttl=OAUTH2_DISCOVERY_RETRY_SECONDS)
+
+        return {name: discovered.get(name) or url for name, url in endpoints.items()}
+
+    async def aclose(self) -> None:
+        """Close pooled provider connections"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
     def generate_auth_url(self, provider: str, tenant_id: str, redirect_uri: str = None) -> str:
         """Generate OAuth2 authorization URL"""
         config = self.get_provider_config(provider)
@@ -294,7 +390,7 @@ class OAuth2Manager:
             state_dict['is_used'] = True
             self.redis_client.set(state_key, json.dumps(state_dict))
 
-    def exchange_code_for_token(self, provider: str, code: str, state_id: str) -> Optional[OAuth2Token]:
+    async def exchange_code_for_token(self, provider: str, code: str, state_id: str) -> Optional[OAuth2Token]:
         """Exchange authorization code for access token"""
         config = self.get_provider_config(provider)
         if not config:
@@ -314,12 +410,12 @@ class OAuth2Manager:
                 'client_secret': config.client_secret
             }
 
-            # Make token request
+            # Make token request; authorization codes are single use, so never resend it
             headers = {'Accept': 'application/json'}
-            if provider == OAuth2Provider.GITHUB.value:
-                headers['Accept'] = 'application/json'
-
-            response = requests.post(config.token_url, data=token_data, headers=headers)
+            endpoints = await self._get_endpoints(config)
+            response = await self._request(
+                'POST', endpoints['token_url'], idempotent=False, data=token_data, headers=headers
+            )
             response.raise_for_status()
 
             token_response = response.json()
@@ -344,14 +440,24 @@ class OAuth2Manager:
 
             return oauth2_token
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Token exchange failed for provider {provider}: {e}")
             return None
         except Exception as e:
             logger.error(f"Unexpected error during token exchange: {e}")
             return None
 
-    def get_user_info(self, provider: str, access_token: str) -> Optional[OAuth2UserInfo]:
+    async def _get_github_primary_email(self, emails_url: str, headers: Dict[str, str]) -> str:
+        """Get the primary email of a GitHub user, or an empty string"""
+        try:
+            response = await self._request('GET', emails_url, headers=headers)
+            if response.status_code == 200:
+                return next((e['email'] for e in response.json() if e['primary']), '')
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Failed to get GitHub user emails: {e}")
+        return ''
+
+    async def get_user_info(self, provider: str, access_token: str) -> Optional[OAuth2UserInfo]:
         """Get user information from OAuth2 provider"""
         config = self.get_provider_config(provider)
         if not config:
@@ -359,32 +465,34 @@ class OAuth2Manager:
 
         try:
             headers = {'Authorization': f'Bearer {access_token}'}
+            endpoints = await self._get_endpoints(config)
 
-            # Special handling for different providers
-            if provider == OAuth2Provider.FACEBOOK.value:
-                response = requests.get(config.user_info_url, headers=headers)
-            elif provider == OAuth2Provider.GITHUB.value:
-                response = requests.get(config.user_info_url, headers=headers)
-            elif provider == OAuth2Provider.MICROSOFT.value:
-                response = requests.get(config.user_info_url, headers=headers)
-            elif provider == OAuth2Provider.GOOGLE.value:
-                response = requests.get(config.user_info_url, headers=headers)
+            github_email = None
+            if provider == OAuth2Provider.GITHUB.value:
+                # Fetch the email list alongside the profile instead of after it
+                response, github_email = await asyncio.gather(
+                    self._request('GET', endpoints['user_info_url'], headers=headers),
+                    self._get_github_primary_email(
+                        config.additional_config.get('emails_url', GITHUB_EMAILS_URL), headers
+                    )
+                )
             else:
-                response = requests.get(config.user_info_url, headers=headers)
+                response = await self._request('GET', endpoints['user_info_url'], headers=headers)
 
             response.raise_for_status()
             user_data = response.json()
 
             # Parse user information based on provider
             if provider == OAuth2Provider.GOOGLE.value:
+                # The discovered OpenID Connect endpoint names the id `sub` rather than `id`
                 user_info = OAuth2UserInfo(
                     provider=provider,
-                    provider_user_id=user_data['id'],
+                    provider_user_id=user_data.get('id') or user_data['sub'],
                     email=user_data['email'],
                     name=user_data['name'],
                     profile_picture=user_data.get('picture'),
                     additional_info={
-                        'verified_email': user_data.get('verified_email', False),
+                        'verified_email': user_data.get('verified_email', user_data.get('email_verified', False)),
                         'locale': user_data.get('locale')
                     }
                 )
@@ -400,13 +508,8 @@ class OAuth2Manager:
                     }
                 )
             elif provider == OAuth2Provider.GITHUB.value:
-                # Get email from separate endpoint if not provided
-                email = user_data.get('email')
-                if not email:
-                    email_response = requests.get('https://api.github.com/user/emails', headers=headers)
-                    if email_response.status_code == 200:
-                        emails = email_response.json()
-                        email = next((e['email'] for e in emails if e['primary']), '')
+                # Prefer the profile email, falling back to the primary address
+                email = user_data.get('email') or github_email
 
                 user_info = OAuth2UserInfo(
                     provider=provider,
@@ -445,7 +548,7 @@ class OAuth2Manager:
 
             return user_info
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Failed to get user info from provider {provider}: {e}")
             return None
         except Exception as e:
@@ -502,7 +605,7 @@ class OAuth2Manager:
 
         return True
 
-    def refresh_oauth2_token(self, provider: str, refresh_token: str) -> Optional[OAuth2Token]:
+    async def refresh_oauth2_token(self, provider: str, refresh_token: str) -> Optional[OAuth2Token]:
         """Refresh OAuth2 access token"""
         config = self.get_provider_config(provider)
         if not config:
@@ -516,7 +619,12 @@ class OAuth2Manager:
                 'client_secret': config.client_secret
             }
 
-            response = requests.post(config.token_url, data=token_data)
+            # Providers may rotate refresh tokens, so a sent refresh is never resent
+            endpoints = await self._get_endpoints(config)
+            response = await self._request(
+                'POST', endpoints['token_url'], idempotent=False, data=token_data,
+                headers={'Accept': 'application/json'}
+            )
             response.raise_for_status()
 
             token_response = response.json()
@@ -539,7 +647,7 @@ class OAuth2Manager:
 
             return oauth2_token
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Token refresh failed for provider {provider}: {e}")
             return None
         except Exception as e:
@@ -626,7 +734,7 @@ class OAuth2API:
         """Handle OAuth2 callback"""
         try:
             # Exchange code for token
-            oauth2_token = self.oauth2_manager.exchange_code_for_token(
+            oauth2_token = await self.oauth2_manager.exchange_code_for_token(
                 provider=request.provider,
                 code=request.code,
                 state_id=request.state
@@ -639,7 +747,7 @@ class OAuth2API:
                 )
 
             # Get user information
-            user_info = self.oauth2_manager.get_user_info(
+            user_info = await self.oauth2_manager.get_user_info(
                 provider=request.provider,
                 access_token=oauth2_token.access_token
             )
@@ -682,7 +790,7 @@ class OAuth2API:
     async def refresh_token(self, request: OAuth2TokenRequest) -> OAuth2TokenResponse:
         """Refresh OAuth2 token"""
         try:
-            refreshed_token = self.oauth2_manager.refresh_oauth2_token(
+            refreshed_token = await self.oauth2_manager.refresh_oauth2_token(
                 provider=request.provider,
                 refresh_token=request.refresh_token
             )
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Fataplus Password Hashing Pool
+Runs password key-derivation work on a bounded worker pool off the event loop
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pool Configuration
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+KDF_POOL_WORKERS = int(os.getenv("KDF_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+KDF_POOL_QUEUE_LIMIT = int(os.getenv("KDF_POOL_QUEUE_LIMIT", "64"))
+KDF_RETRY_AFTER_SECONDS = 1
+
+
+class PasswordHashingBusy(HTTPException):
+    """Raised when the hashing pool queue is full"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": str(KDF_RETRY_AFTER_SECONDS)}
+        )
+
+
+class PasswordHasher:
+    """Bounded pool dedicated to password hashing and verification"""
+
+    def __init__(self, max_workers: int = KDF_POOL_WORKERS, queue_limit: int = KDF_POOL_QUEUE_LIMIT):
+        self.max_workers = max(1, max_workers)
+        self.queue_limit = max(0, queue_limit)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_limit)
+
+        # Metrics
+        self._metrics_lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker pool on first use"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # bcrypt releases the GIL, so threads give real parallelism
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="kdf"
+                    )
+        return self._executor
+
+    def _admit(self) -> None:
+        """Reserve a queue slot or reject with backpressure"""
+        if not self._slots.acquire(blocking=False):
+            with self._metrics_lock:
+                self.rejected += 1
+            logger.warning("Password hashing pool saturated, rejecting request")
+            raise PasswordHashingBusy()
+
+        with self._metrics_lock:
+            self.submitted += 1
+            self.in_flight += 1
+
+    def _instrument(self, enqueued_at: float, func: Callable, *args) -> Any:
+        """Run KDF work in a worker, recording timings and freeing the slot"""
+        started_at = time.perf_counter()
+        success = False
+        try:
+            result = func(*args)
+            success = True
+            return result
+        finally:
+            finished_at = time.perf_counter()
+            with self._metrics_lock:
+                self.in_flight -= 1
+                self.total_wait_seconds += started_at - enqueued_at
+                self.total_run_seconds += finished_at - started_at
+                if success:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            self._slots.release()
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Run KDF work on the pool without blocking the event loop"""
+        self._admit()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), self._instrument, time.perf_counter(), func, *args
+        )
+
+    def run_sync(self, func: Callable, *args) -> Any:
+        """Run KDF work on the pool from synchronous code, waiting for the result"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            # Waiting here would stall every request on the loop for the whole KDF run
+            raise RuntimeError("run_sync called from the event loop; await run() instead")
+        self._admit()
+        return self._get_executor().submit(self._instrument, time.perf_counter(), func, *args).result()
+
+    async def hash(self, password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+        """Hash password using bcrypt"""
+        return await self.run(_bcrypt_hash, password, rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify password against bcrypt hash"""
+        return await self.run(_bcrypt_verify, password, hashed_password)
+
+    def hash_sync(self, password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+        """Hash password using bcrypt from synchronous code"""
+        return self.run_sync(_bcrypt_hash, password, rounds)
+
+    def verify_sync(self, password: str, hashed_password: str) -> bool:
+        """Verify password against bcrypt hash from synchronous code"""
+        return self.run_sync(_bcrypt_verify, password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool metrics"""
+        with self._metrics_lock:
+            finished = self.completed + self.failed
+            return {
+                'max_workers': self.max_workers,
+                'queue_limit': self.queue_limit,
+                'in_flight': self.in_flight,
+                'queued': max(0, self.in_flight - self.max_workers),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'avg_wait_ms': self.total_wait_seconds / finished * 1000 if finished else 0.0,
+                'avg_run_ms': self.total_run_seconds / finished * 1000 if finished else 0.0
+            }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _bcrypt_hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _bcrypt_verify(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+# Global instance
+password_hasher = PasswordHasher()
@@ -6,7 +6,13 @@ Implements comprehensive role and permission management for multi-tenant archite
 
 import os
 import json
+import time
+import calendar
+import hashlib
 import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 from typing import Dict, List, Set, Optional, Any, Tuple
 from enum import Enum
@@ -16,6 +22,8 @@ from fastapi import HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field, validator
 
+from security.local_cache import TTLCache, MISSING
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -23,6 +31,25 @@ logger = logging.getLogger(__name__)
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 redis_client = redis.from_url(REDIS_URL)
 
+# Permission cache configuration
+PERMISSION_CACHE_PREFIX = "user_permissions"
+PERMISSION_VERSION_PREFIX = "user_permissions_version"
+PERMISSION_CACHE_TTL = 3600  # Redis copy, 1 hour
+PERMISSION_LOCAL_TTL = int(os.getenv("RBAC_LOCAL_CACHE_TTL", "300"))
+PERMISSION_VERSION_CHECK_INTERVAL = float(os.getenv("RBAC_VERSION_CHECK_INTERVAL", "5"))
+PERMISSION_LOCAL_MAX_ENTRIES = 10000
+
+# Reverse index configuration
+ROLE_USERS_PREFIX = "rbac_role_users"
+PERMISSION_USERS_PREFIX = "rbac_permission_users"
+INDEX_STATE_PREFIX = "rbac_index_state"  # Per-user hash of the roles and permissions the index holds
+GRANT_EXPIRY_PREFIX = "rbac_grant_expiry"  # Per-tenant ZSET of users scored by grant expiry
+
+# Request-scoped permission memo, active inside RBACManager.request_scope()
+_request_permissions: ContextVar[Optional[Dict[Tuple[str, str], "UserPermission"]]] = ContextVar(
+    "rbac_request_permissions", default=None
+)
+
 
 class Permission(Enum):
     """System permissions"""
@@ -108,6 +135,14 @@ class UserPermission:
     custom_permissions: Dict[str, Any] = field(default_factory=dict)
     effective_date: datetime = field(default_factory=datetime.utcnow)
     expiry_date: Optional[datetime] = None
+    permission_mask: int = 0
+
+
+@dataclass
+class AccessFilter:
+    """Resources a user may access for one resource type and action"""
+    allowed: bool
+    resource_ids: Optional[Set[str]] = None  # None means every resource in the tenant
 
 
 @dataclass
@@ -126,6 +161,11 @@ class RBACManager:
         self.redis_client = redis_client
         self.role_definitions = self._initialize_role_definitions()
         self.permission_hierarchy = self._build_permission_hierarchy()
+        self._compile_permission_model()
+
+        # Per-process caches: (tenant, user, version) -> grants and (tenant, user) -> version
+        self._local_permissions = TTLCache(PERMISSION_LOCAL_MAX_ENTRIES, PERMISSION_LOCAL_TTL)
+        self._local_versions = TTLCache(PERMISSION_LOCAL_MAX_ENTRIES, PERMISSION_VERSION_CHECK_INTERVAL)
 
     def _initialize_role_definitions(self) -> Dict[str, RoleDefinition]:
         """Initialize system role definitions"""
@@ -274,30 +314,183 @@ class RBACManager:
             Permission.ALERT_CREATE.value: [Permission.ALERT_READ.value],
         }
 
+    def _compile_permission_model(self) -> None:
+        """Compile permissions, hierarchy closure and roles into bitmasks"""
+        # Bit positions follow the Permission enum order; custom permissions are appended by
+        # register_permission, which replaces the dict so readers always see a complete copy
+        self._permission_lock = threading.Lock()
+        self.permission_bits: Dict[str, int] = {}
+        for permission in Permission:
+            self.permission_bits[permission.value] = 1 << len(self.permission_bits)
+
+        # Signature of the bit layout, stored with cached masks so a changed enum invalidates them
+        self.mask_signature = hashlib.sha256(
+            ",".join(self.permission_bits).encode()
+        ).hexdigest()[:16]
+        self._system_permission_count = len(self.permission_bits)
+
+        # Transitive closure of the permission hierarchy
+        self.permission_closure: Dict[str, int] = {}
+        for permission in list(self.permission_bits):
+            self.permission_closure[permission] = self._closure_mask(permission)
+
+        # Role masks include every implied permission
+        self.role_masks: Dict[str, int] = {
+            role_name: self.compile_permissions(role_def.permissions)
+            for role_name, role_def in self.role_definitions.items()
+        }
+        self._required_masks: Dict[Tuple[str, ...], int] = {}
+
+    def _permission_bit(self, permission: str) -> int:
+        """Get the bit for a permission, or 0 for an unregistered one that nobody can hold"""
+        return self.permission_bits.get(permission, 0)
+
+    def register_permission(self, permission: str) -> int:
+        """Allocate a bit for a custom permission"""
+        bit = self.permission_bits.get(permission)
+        if bit is not None:
+            return bit
+
+        with self._permission_lock:
+            bit = self.permission_bits.get(permission)
+            if bit is None:
+                permission_bits = dict(self.permission_bits)
+                bit = 1 << len(permission_bits)
+                permission_bits[permission] = bit
+                self.permission_bits = permission_bits
+                logger.info(f"Registered custom permission {permission}")
+        return bit
+
+    def _closure_mask(self, permission: str) -> int:
+        """Get the mask of a permission and everything it transitively implies"""
+        mask = 0
+        pending = [permission]
+        seen = set()
+
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            mask |= self._permission_bit(current)
+            pending.extend(self.permission_hierarchy.get(current, []))
+
+        return mask
+
+    def compile_permissions(self, permissions) -> int:
+        """Compile permission names into a mask including implied permissions"""
+        mask = 0
+        for permission in permissions:
+            closure = self.permission_closure.get(permission)
+            if closure is None:
+                closure = self._closure_mask(permission)
+                if permission in self.permission_bits:
+                    self.permission_closure[permission] = closure
+            mask |= closure
+        return mask
+
+    def decode_permissions(self, mask: int) -> Set[str]:
+        """Expand a permission mask back into permission names"""
+        return {permission for permission, bit in self.permission_bits.items() if mask & bit}
+
+    def _required_mask(self, permissions: List[str]) -> Optional[int]:
+        """Get the mask of exact bits for required permissions, or None if any is unregistered"""
+        key = tuple(permissions)
+        mask = self._required_masks.get(key)
+        if mask is None:
+            mask = 0
+            for permission in permissions:
+                bit = self.permission_bits.get(permission)
+                if bit is None:
+                    # Never granted; not cached so arbitrary input cannot grow the cache
+                    return None
+                mask |= bit
+            self._required_masks[key] = mask
+        return mask
+
+    def _compute_user_mask(self, user_permission: UserPermission) -> int:
+        """Compute effective mask from direct permissions and roles"""
+        mask = self.compile_permissions(user_permission.permissions)
+        for role in user_permission.roles:
+            mask |= self.role_masks.get(role, 0)
+        return mask
+
     def get_role_permissions(self, role_name: str) -> Set[str]:
         """Get all permissions for a role including inherited permissions"""
-        role_def = self.role_definitions.get(role_name)
-        if not role_def:
-            return set()
+        return self.decode_permissions(self.role_masks.get(role_name, 0))
+
+    @contextmanager
+    def request_scope(self):
+        """Memoize permission lookups for the duration of one request"""
+        if _request_permissions.get() is not None:
+            # Nested scopes share the outer memo
+            yield
+            return
+
+        token = _request_permissions.set({})
+        try:
+            yield
+        finally:
+            _request_permissions.reset(token)
+
+    def get_user_permissions(self, user_id: str, tenant_id: str, use_cache: bool = True) -> UserPermission:
+        """Get user permissions from request memo, local cache, Redis or database"""
+        if not use_cache:
+            return self._load_user_permissions(user_id, tenant_id)[0]
+
+        memo = _request_permissions.get()
+        if memo is not None:
+            user_permission = memo.get((tenant_id, user_id))
+            if user_permission is not None:
+                return user_permission
+
+        version = self._local_versions.get((tenant_id, user_id))
+        if version is MISSING:
+            version = self._get_permission_version(user_id, tenant_id)
+            self._local_versions.set((tenant_id, user_id), version)
+
+        user_permission = self._local_permissions.get((tenant_id, user_id, version))
+        if user_permission is MISSING:
+            user_permission, version = self._load_user_permissions(user_id, tenant_id)
+            self._remember_locally(user_permission, version)
+
+        if memo is not None:
+            memo[(tenant_id, user_id)] = user_permission
+
+        return user_permission
 
-        permissions = set(role_def.permissions)
+    def _get_permission_version(self, user_id: str, tenant_id: str) -> int:
+        """Get the current permission version for a user"""
+        version = self.redis_client.get(f"{PERMISSION_VERSION_PREFIX}:{tenant_id}:{user_id}")
+        return int(version) if version else 0
 
-        # Add inherited permissions
-        for perm in role_def.permissions:
-            if perm in self.permission_hierarchy:
-                permissions.update(self.permission_hierarchy[perm])
+    def _remember_locally(self, user_permission: UserPermission, version: int) -> None:
+        """Store grants in the per-process cache under their version"""
+        key = (user_permission.tenant_id, user_permission.user_id)
+        self._local_versions.set(key, version)
+        self._local_permissions.set(key + (version,), user_permission)
 
-        return permissions
+        memo = _request_permissions.get()
+        if memo is not None:
+            memo.pop(key, None)
 
-    def get_user_permissions(self, user_id: str, tenant_id: str) -> UserPermission:
-        """Get user permissions from cache or database"""
-        cache_key = f"user_permissions:{tenant_id}:{user_id}"
+    def _load_user_permissions(self, user_id: str, tenant_id: str) -> Tuple[UserPermission, int]:
+        """Load user permissions and their version from Redis or database"""
+        cache_key = f"{PERMISSION_CACHE_PREFIX}:{tenant_id}:{user_id}"
 
         # Try to get from cache
-        cached_data = self.redis_client.get(cache_key)
+        pipe = self.redis_client.pipeline()
+        pipe.get(cache_key)
+        pipe.get(f"{PERMISSION_VERSION_PREFIX}:{tenant_id}:{user_id}")
+        cached_data, version = pipe.execute()
+        version = int(version) if version else 0
+
         if cached_data:
             data = json.loads(cached_data)
-            return UserPermission(
+            # Custom permissions were registered by the worker that granted them
+            for permission in data.get('extra_permissions', []):
+                self.register_permission(permission)
+            user_permission = UserPermission(
                 user_id=data['user_id'],
                 tenant_id=data['tenant_id'],
                 permissions=set(data['permissions']),
@@ -307,6 +500,16 @@ class RBACManager:
                 expiry_date=datetime.fromisoformat(data['expiry_date']) if data.get('expiry_date') else None
             )
 
+            if data.get('mask_signature') == self.mask_signature:
+                # System permissions come from the stored mask, custom ones are compiled locally
+                user_permission.permission_mask = int(data['permission_mask'], 16) | self.compile_permissions(
+                    data.get('extra_permissions', [])
+                )
+            else:
+                user_permission.permission_mask = self._compute_user_mask(user_permission)
+
+            return user_permission, version
+
         # For demo, create default permissions
         # In production, this would query the database
         default_roles = [Role.VIEWER.value]
@@ -321,60 +524,42 @@ class RBACManager:
             permissions=permissions,
             roles=set(default_roles)
         )
+        # Not written back: the fallback is not a grant and must not enter the reverse index
+        user_permission.permission_mask = self._compute_user_mask(user_permission)
 
-        # Cache for 1 hour
-        self.redis_client.setex(cache_key, 3600, json.dumps({
-            'user_id': user_permission.user_id,
-            'tenant_id': user_permission.tenant_id,
-            'permissions': list(user_permission.permissions),
-            'roles': list(user_permission.roles),
-            'custom_permissions': user_permission.custom_permissions,
-            'effective_date': user_permission.effective_date.isoformat(),
-            'expiry_date': user_permission.expiry_date.isoformat() if user_permission.expiry_date else None
-        }))
-
-        return user_permission
+        return user_permission, version
 
     def check_permission(self, user_id: str, tenant_id: str, required_permission: str,
                         context: Optional[PermissionContext] = None) -> bool:
         """Check if user has specific permission"""
-        user_permission = self.get_user_permissions(user_id, tenant_id)
-
-        # Check if permission expired
-        if user_permission.expiry_date and user_permission.expiry_date < datetime.utcnow():
-            return False
-
-        # Check direct permission
-        if required_permission in user_permission.permissions:
-            return True
-
-        # Check role-based permissions
-        for role in user_permission.roles:
-            role_permissions = self.get_role_permissions(role)
-            if required_permission in role_permissions:
-                return True
-
-        # Check inherited permissions
-        for permission in user_permission.permissions:
-            if permission in self.permission_hierarchy:
-                if required_permission in self.permission_hierarchy[permission]:
-                    return True
-
-        return False
+        return self.check_all_permissions(user_id, tenant_id, [required_permission])
 
     def check_any_permission(self, user_id: str, tenant_id: str, required_permissions: List[str]) -> bool:
         """Check if user has any of the required permissions"""
-        return any(
-            self.check_permission(user_id, tenant_id, perm)
-            for perm in required_permissions
-        )
+        user_mask = self._get_active_mask(user_id, tenant_id)
+        any_mask = 0
+        for permission in required_permissions:
+            any_mask |= self._permission_bit(permission)
+        return bool(user_mask & any_mask)
 
     def check_all_permissions(self, user_id: str, tenant_id: str, required_permissions: List[str]) -> bool:
         """Check if user has all of the required permissions"""
-        return all(
-            self.check_permission(user_id, tenant_id, perm)
-            for perm in required_permissions
-        )
+        # Loading the user first registers any custom permissions they were granted
+        user_mask = self._get_active_mask(user_id, tenant_id)
+        required_mask = self._required_mask(required_permissions)
+        if required_mask is None:
+            return False
+        return user_mask & required_mask == required_mask
+
+    def _get_active_mask(self, user_id: str, tenant_id: str) -> int:
+        """Get the user's permission mask, or 0 if the grant has expired"""
+        user_permission = self.get_user_permissions(user_id, tenant_id)
+
+        # Check if permission expired
+        if user_permission.expiry_date and user_permission.expiry_date < datetime.utcnow():
+            return 0
+
+        return user_permission.permission_mask
 
     def assign_role(self, user_id: str, tenant_id: str, role_name: str, assigned_by: str) -> bool:
         """Assign role to user"""
@@ -383,7 +568,7 @@ class RBACManager:
             return False
 
         # Get current user permissions
-        user_permission = self.get_user_permissions(user_id, tenant_id)
+        user_permission = self.get_user_permissions(user_id, tenant_id, use_cache=False)
         user_permission.roles.add(role_name)
 
         # Add role permissions
@@ -400,7 +585,7 @@ class RBACManager:
 
     def remove_role(self, user_id: str, tenant_id: str, role_name: str, removed_by: str) -> bool:
         """Remove role from user"""
-        user_permission = self.get_user_permissions(user_id, tenant_id)
+        user_permission = self.get_user_permissions(user_id, tenant_id, use_cache=False)
 
         if role_name not in user_permission.roles:
             return False
@@ -426,8 +611,9 @@ class RBACManager:
     def grant_custom_permission(self, user_id: str, tenant_id: str, permission: str,
                                context: Optional[Dict[str, Any]] = None, granted_by: str = "") -> bool:
         """Grant custom permission to user"""
-        user_permission = self.get_user_permissions(user_id, tenant_id)
+        user_permission = self.get_user_permissions(user_id, tenant_id, use_cache=False)
 
+        self.register_permission(permission)
         user_permission.permissions.add(permission)
         if context:
             user_permission.custom_permissions[permission] = context
@@ -440,7 +626,7 @@ class RBACManager:
 
     def revoke_custom_permission(self, user_id: str, tenant_id: str, permission: str, revoked_by: str = "") -> bool:
         """Revoke custom permission from user"""
-        user_permission = self.get_user_permissions(user_id, tenant_id)
+        user_permission = self.get_user_permissions(user_id, tenant_id, use_cache=False)
 
         user_permission.permissions.discard(permission)
         user_permission.custom_permissions.pop(permission, None)
@@ -452,9 +638,16 @@ class RBACManager:
         return True
 
     def _cache_user_permissions(self, user_permission: UserPermission) -> None:
-        """Cache user permissions"""
-        cache_key = f"user_permissions:{user_permission.tenant_id}:{user_permission.user_id}"
-        ttl = 3600  # 1 hour
+        """Cache user permissions, bumping the version so other workers drop stale copies"""
+        tenant_id = user_permission.tenant_id
+        user_id = user_permission.user_id
+        cache_key = f"{PERMISSION_CACHE_PREFIX}:{tenant_id}:{user_id}"
+        version_key = f"{PERMISSION_VERSION_PREFIX}:{tenant_id}:{user_id}"
+        state_key = f"{INDEX_STATE_PREFIX}:{tenant_id}:{user_id}"
+        ttl = PERMISSION_CACHE_TTL
+
+        user_permission.permission_mask = self._compute_user_mask(user_permission)
+        system_mask = user_permission.permission_mask & ((1 << self._system_permission_count) - 1)
 
         data = {
             'user_id': user_permission.user_id,
@@ -463,22 +656,137 @@ class RBACManager:
             'roles': list(user_permission.roles),
             'custom_permissions': user_permission.custom_permissions,
             'effective_date': user_permission.effective_date.isoformat(),
-            'expiry_date': user_permission.expiry_date.isoformat() if user_permission.expiry_date else None
+            'expiry_date': user_permission.expiry_date.isoformat() if user_permission.expiry_date else None,
+            'permission_mask': format(system_mask, 'x'),
+            'mask_signature': self.mask_signature,
+            'extra_permissions': [
+                permission for permission in user_permission.permissions
+                if self._permission_bit(permission) >> self._system_permission_count
+            ]
         }
 
-        self.redis_client.setex(cache_key, ttl, json.dumps(data))
+        # Expired grants are kept out of the reverse index, live ones until they expire
+        expired = user_permission.expiry_date is not None and user_permission.expiry_date < datetime.utcnow()
+        roles = set() if expired else set(user_permission.roles)
+        permissions = set() if expired else self.decode_permissions(user_permission.permission_mask)
+
+        with self.redis_client.pipeline() as pipe:
+            while True:
+                try:
+                    # Diff against what the index recorded for this user, not the caller's view
+                    pipe.watch(state_key)
+                    indexed = self._decode_index_state(pipe.hgetall(state_key))
+                    pipe.multi()
+                    pipe.setex(cache_key, ttl, json.dumps(data))
+                    pipe.incr(version_key)
+                    self._update_reverse_index(pipe, tenant_id, user_id, indexed, roles, permissions)
+                    if user_permission.expiry_date and not expired:
+                        pipe.zadd(f"{GRANT_EXPIRY_PREFIX}:{tenant_id}",
+                                  {user_id: calendar.timegm(user_permission.expiry_date.utctimetuple())})
+                    else:
+                        pipe.zrem(f"{GRANT_EXPIRY_PREFIX}:{tenant_id}", user_id)
+                    version = pipe.execute()[1]
+                    break
+                except redis.WatchError:
+                    continue
+
+        self._remember_locally(user_permission, int(version) if version else 0)
+
+    def _decode_index_state(self, state: Dict) -> Tuple[Set[str], Set[str]]:
+        """Parse the roles and permissions recorded in a user's index state hash"""
+        state = {
+            (key.decode() if isinstance(key, bytes) else key): value
+            for key, value in state.items()
+        }
+        return set(json.loads(state.get('roles') or '[]')), set(json.loads(state.get('permissions') or '[]'))
+
+    def _update_reverse_index(self, pipe, tenant_id: str, user_id: str,
+                              indexed: Tuple[Set[str], Set[str]],
+                              roles: Set[str], permissions: Set[str]) -> None:
+        """Queue role->users and permission->users index updates and record the new state"""
+        indexed_roles, indexed_permissions = indexed
+
+        for role in roles - indexed_roles:
+            pipe.sadd(f"{ROLE_USERS_PREFIX}:{tenant_id}:{role}", user_id)
+        for role in indexed_roles - roles:
+            pipe.srem(f"{ROLE_USERS_PREFIX}:{tenant_id}:{role}", user_id)
+
+        for permission in permissions - indexed_permissions:
+            pipe.sadd(f"{PERMISSION_USERS_PREFIX}:{tenant_id}:{permission}", user_id)
+        for permission in indexed_permissions - permissions:
+            pipe.srem(f"{PERMISSION_USERS_PREFIX}:{tenant_id}:{permission}", user_id)
+
+        state_key = f"{INDEX_STATE_PREFIX}:{tenant_id}:{user_id}"
+        if roles or permissions:
+            pipe.hset(state_key, mapping={
+                'roles': json.dumps(sorted(roles)),
+                'permissions': json.dumps(sorted(permissions))
+            })
+        else:
+            pipe.delete(state_key)
+
+    def _expire_grants(self, tenant_id: str) -> None:
+        """Drop users whose grants have expired from the tenant's reverse index"""
+        expiry_key = f"{GRANT_EXPIRY_PREFIX}:{tenant_id}"
+        now = int(time.time())
+
+        for member in self.redis_client.zrangebyscore(expiry_key, "-inf", now):
+            user_id = member.decode() if isinstance(member, bytes) else member
+            state_key = f"{INDEX_STATE_PREFIX}:{tenant_id}:{user_id}"
+
+            with self.redis_client.pipeline() as pipe:
+                while True:
+                    try:
+                        pipe.watch(state_key, expiry_key)
+                        score = pipe.zscore(expiry_key, user_id)
+                        if score is None or score > now:
+                            # Extended or already dropped by another writer
+                            pipe.unwatch()
+                            break
+                        indexed = self._decode_index_state(pipe.hgetall(state_key))
+                        pipe.multi()
+                        self._update_reverse_index(pipe, tenant_id, user_id, indexed, set(), set())
+                        pipe.zrem(expiry_key, user_id)
+                        pipe.execute()
+                        break
+                    except redis.WatchError:
+                        continue
 
     def clear_user_cache(self, user_id: str, tenant_id: str) -> None:
         """Clear user permissions cache"""
-        cache_key = f"user_permissions:{tenant_id}:{user_id}"
-        self.redis_client.delete(cache_key)
+        pipe = self.redis_client.pipeline()
+        pipe.delete(f"{PERMISSION_CACHE_PREFIX}:{tenant_id}:{user_id}")
+        pipe.incr(f"{PERMISSION_VERSION_PREFIX}:{tenant_id}:{user_id}")
+        pipe.execute()
+
+        self._local_versions.pop((tenant_id, user_id))
+        memo = _request_permissions.get()
+        if memo is not None:
+            memo.pop((tenant_id, user_id), None)
+
         logger.info(f"Cleared permissions cache for user {user_id} in tenant {tenant_id}")
 
     def get_users_with_permission(self, tenant_id: str, permission: str) -> List[str]:
         """Get all users with a specific permission in a tenant"""
-        # This would typically query a database
-        # For now, return empty list
-        return []
+        self._expire_grants(tenant_id)
+        members = self.redis_client.smembers(f"{PERMISSION_USERS_PREFIX}:{tenant_id}:{permission}")
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+    def get_users_with_any_permission(self, tenant_id: str, permissions: List[str]) -> List[str]:
+        """Get all users holding at least one of the permissions in a tenant"""
+        if not permissions:
+            return []
+        self._expire_grants(tenant_id)
+        members = self.redis_client.sunion(
+            [f"{PERMISSION_USERS_PREFIX}:{tenant_id}:{permission}" for permission in permissions]
+        )
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
+
+    def get_users_with_role(self, tenant_id: str, role_name: str) -> List[str]:
+        """Get all users assigned a role in a tenant"""
+        self._expire_grants(tenant_id)
+        members = self.redis_client.smembers(f"{ROLE_USERS_PREFIX}:{tenant_id}:{role_name}")
+        return [m.decode() if isinstance(m, bytes) else m for m in members]
 
     def get_effective_permissions(self, user_id: str, tenant_id: str) -> Dict[str, Any]:
         """Get effective permissions for user"""
@@ -500,16 +808,106 @@ class RBACManager:
         """Validate permission request with resource context"""
         permission = f"{resource_type}:{action}"
 
-        if not self.check_permission(user_id, tenant_id, permission):
+        if not self.validate_permission_requests(user_id, tenant_id, [(resource_type, action, resource_id)])[0]:
             return False, f"Permission denied: {permission}"
 
-        # Additional resource-specific validation could go here
-        if resource_id:
-            # Check if user has access to specific resource
-            pass
-
         return True, "Permission granted"
 
+    def validate_permission_requests(self, user_id: str, tenant_id: str,
+                                     requests: List[Tuple[str, str, Optional[str]]]) -> List[bool]:
+        """Validate many (resource_type, action, resource_id) requests, returning an allow mask"""
+        with self.request_scope():
+            filters: Dict[Tuple[str, str], AccessFilter] = {}
+            allowed = []
+
+            for resource_type, action, resource_id in requests:
+                access = filters.get((resource_type, action))
+                if access is None:
+                    access = self.get_access_filter(user_id, tenant_id, resource_type, action)
+                    filters[(resource_type, action)] = access
+
+                allowed.append(
+                    access.allowed and (
+                        access.resource_ids is None or
+                        resource_id is None or
+                        str(resource_id) in access.resource_ids
+                    )
+                )
+
+            return allowed
+
+    def get_access_filter(self, user_id: str, tenant_id: str, resource_type: str, action: str) -> AccessFilter:
+        """Get which resources of a type the user may access for an action"""
+        permission = f"{resource_type}:{action}"
+        user_permission = self.get_user_permissions(user_id, tenant_id)
+
+        if user_permission.expiry_date and user_permission.expiry_date < datetime.utcnow():
+            return AccessFilter(allowed=False)
+
+        required_mask = self._required_mask([permission])
+        if required_mask is None or user_permission.permission_mask & required_mask != required_mask:
+            return AccessFilter(allowed=False)
+
+        # Permissions held only through a custom grant may be limited to specific resources
+        role_mask = 0
+        for role in user_permission.roles:
+            role_mask |= self.role_masks.get(role, 0)
+
+        scope = user_permission.custom_permissions.get(permission) or {}
+        if role_mask & required_mask != required_mask and scope.get('resource_ids') is not None:
+            return AccessFilter(allowed=True, resource_ids={str(r) for r in scope['resource_ids']})
+
+        return AccessFilter(allowed=True)
+
+    def filter_query(self, query, user_id: str, tenant_id: str, resource_type: str, action: str,
+                     id_column, tenant_column=None):
+        """Restrict a SQLAlchemy query to the resources the user may access"""
+        from sqlalchemy import false
+
+        access = self.get_access_filter(user_id, tenant_id, resource_type, action)
+        if not access.allowed:
+            return query.filter(false())
+
+        if tenant_column is not None:
+            query = query.filter(tenant_column == tenant_id)
+        if access.resource_ids is not None:
+            query = query.filter(id_column.in_(list(access.resource_ids)))
+
+        return query
+
+    def build_sql_filter(self, user_id: str, tenant_id: str, resource_type: str, action: str,
+                         id_column: str = "id", tenant_column: Optional[str] = None) -> Tuple[str, List[Any]]:
+        """Build a raw SQL condition and parameters restricting rows to accessible resources"""
+        access = self.get_access_filter(user_id, tenant_id, resource_type, action)
+        if not access.allowed:
+            return "FALSE", []
+
+        conditions, params = [], []
+        if tenant_column is not None:
+            conditions.append(f"{tenant_column}::text = %s")
+            params.append(str(tenant_id))
+        if access.resource_ids is not None:
+            conditions.append(f"{id_column}::text = ANY(%s)")
+            params.append(list(access.resource_ids))
+
+        return " AND ".join(conditions) or "TRUE", params
+
+
+class RBACRequestScopeMiddleware:
+    """ASGI middleware sharing one permission memo across every check made while serving a request"""
+
+    def __init__(self, app, rbac_manager: Optional[RBACManager] = None):
+        self.app = app
+        self.rbac_manager = rbac_manager
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with (self.rbac_manager or rbac_manager).request_scope():
+            await self.app(scope, receive, send)
+
 
 class RBACMiddleware:
     """FastAPI middleware for RBAC"""
@@ -751,8 +1149,9 @@ def require_permission(permission: str, resource_id: Optional[str] = None):
     """Decorator for requiring specific permission"""
     def decorator(func):
         async def wrapper(request: Request, *args, **kwargs):
-            await rbac_middleware.require_permission(request, permission, resource_id)
-            return await func(request, *args, **kwargs)
+            with rbac_manager.request_scope():
+                await rbac_middleware.require_permission(request, permission, resource_id)
+                return await func(request, *args, **kwargs)
         return wrapper
     return decorator
 
@@ -761,8 +1160,9 @@ def require_any_permission(permissions: List[str]):
     """Decorator for requiring any of specified permissions"""
     def decorator(func):
         async def wrapper(request: Request, *args, **kwargs):
-            await rbac_middleware.require_any_permission(request, permissions)
-            return await func(request, *args, **kwargs)
+            with rbac_manager.request_scope():
+                await rbac_middleware.require_any_permission(request, permissions)
+                return await func(request, *args, **kwargs)
         return wrapper
     return decorator
 
@@ -771,8 +1171,9 @@ def require_all_permissions(permissions: List[str]):
     """Decorator for requiring all of specified permissions"""
     def decorator(func):
         async def wrapper(request: Request, *args, **kwargs):
-            await rbac_middleware.require_all_permissions(request, permissions)
-            return await func(request, *args, **kwargs)
+            with rbac_manager.request_scope():
+                await rbac_middleware.require_all_permissions(request, permissions)
+                return await func(request, *args, **kwargs)
         return wrapper
     return decorator
 
@@ -781,8 +1182,9 @@ def require_role(roles: List[str]):
     """Decorator for requiring specific role"""
     def decorator(func):
         async def wrapper(request: Request, *args, **kwargs):
-            await rbac_middleware.require_role(request, roles)
-            return await func(request, *args, **kwargs)
+            with rbac_manager.request_scope():
+                await rbac_middleware.require_role(request, roles)
+                return await func(request, *args, **kwargs)
         return wrapper
     return decorator
 
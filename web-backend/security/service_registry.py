@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Fataplus Service Registry
+Lazily constructed service singletons with concurrent warm-up and shutdown
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """Proxy that builds its service on first use and delegates attribute access to it"""
+
+    def __init__(self, name: str, factory: Callable[[], Any],
+                 on_shutdown: Optional[Callable[[Any], None]] = None):
+        self._name = name
+        self._factory = factory
+        self._on_shutdown = on_shutdown
+        self._instance = None
+        self._lock = threading.Lock()
+        self.init_seconds: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> Any:
+        """Get the service, constructing it on first call"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started_at = time.perf_counter()
+                    instance = self._factory()
+                    self.init_seconds = time.perf_counter() - started_at
+                    self._instance = instance
+                    logger.info(f"Service {self._name} initialized in {self.init_seconds * 1000:.1f}ms")
+        return self._instance
+
+    def shutdown(self) -> None:
+        """Run the shutdown hook and drop the instance if the service was built"""
+        with self._lock:
+            instance, self._instance = self._instance, None
+        if instance is not None and self._on_shutdown is not None:
+            self._on_shutdown(instance)
+
+    def __getattr__(self, item: str) -> Any:
+        # Never build the service for dunder lookups made by copy, pickle or inspection
+        if item.startswith('__'):
+            raise AttributeError(item)
+        return getattr(self.get(), item)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self.initialized else "pending"
+        return f"<LazyService {self._name} ({state})>"
+
+
+_services: Dict[str, LazyService] = {}
+_services_lock = threading.Lock()
+
+
+def lazy_service(name: str, factory: Callable[[], Any],
+                 on_shutdown: Optional[Callable[[Any], None]] = None) -> LazyService:
+    """Register a lazily constructed service, returning the existing one if the name is taken"""
+    with _services_lock:
+        if name not in _services:
+            _services[name] = LazyService(name, factory, on_shutdown)
+        return _services[name]
+
+
+def get_services() -> Dict[str, LazyService]:
+    """Get all registered services"""
+    with _services_lock:
+        return dict(_services)
+
+
+async def warm_up(names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Build services concurrently off the event loop, returning per-service timings"""
+    services = get_services()
+    selected = [services[name] for name in names] if names is not None else list(services.values())
+
+    async def build(service: LazyService) -> Dict[str, Any]:
+        started_at = time.perf_counter()
+        try:
+            await asyncio.to_thread(service.get)
+            return {'status': 'ready', 'seconds': time.perf_counter() - started_at}
+        except Exception as e:
+            logger.error(f"Service {service.name} failed to initialize: {e}")
+            return {'status': 'failed', 'seconds': time.perf_counter() - started_at, 'error': str(e)}
+
+    results = await asyncio.gather(*(build(service) for service in selected))
+    return {service.name: result for service, result in zip(selected, results)}
+
+
+def shutdown_services() -> None:
+    """Shut down every service that was initialized"""
+    for service in get_services().values():
+        try:
+            service.shutdown()
+        except Exception as e:
+            logger.error(f"Service {service.name} failed to shut down: {e}")
+
+
+def service_stats() -> Dict[str, Dict[str, Any]]:
+    """Get initialization state and cost of each registered service"""
+    return {
+        name: {'initialized': service.initialized, 'init_seconds': service.init_seconds}
+        for name, service in get_services().items()
+    }
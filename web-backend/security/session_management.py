@@ -7,6 +7,7 @@ Redis-based session management with security features and multi-tenant support
 import os
 import json
 import time
+import calendar
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple, Union
@@ -21,6 +22,8 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field, validator
 import asyncio
 
+from security.local_cache import TTLCache, MISSING
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -39,6 +42,25 @@ SESSION_CLEANUP_INTERVAL = 300  # 5 minutes
 MAX_SESSIONS_PER_USER = 5
 MAX_SESSIONS_PER_TENANT = 1000
 
+# Session statistics configuration
+SESSION_STATS_PREFIX = "session_stats"
+SESSION_EXPIRY_INDEX = "session_expiry"
+SESSION_DAU_PREFIX = "session_dau"
+SESSION_MAU_PREFIX = "session_mau"
+SESSION_RECENT_PREFIX = "session_recent"
+SESSION_STATS_GLOBAL = "global"
+DAU_RETENTION = 35 * 86400  # Keep daily sketches for a month
+MAU_RETENTION = 400 * 86400  # Keep monthly sketches for a year
+RECENT_LOGINS_LIMIT = 10
+SESSION_DURATION_BUCKETS = [60, 300, 900, 1800, 3600, 14400, 43200, 86400]  # Upper bounds in seconds
+ACTIVE_USER_RECORD_INTERVAL = 60  # Seconds between active-user sketch updates per user
+ACTIVE_USER_RECORD_MAX_ENTRIES = 100000
+
+
+def _epoch_seconds(value: datetime) -> int:
+    """Unix time of a naive UTC datetime, independent of the host timezone"""
+    return calendar.timegm(value.utctimetuple())
+
 
 class SessionStatus(Enum):
     """Session status"""
@@ -89,6 +111,11 @@ class SessionStats:
     sessions_by_user: Dict[str, int]
     average_session_duration: float
     recent_logins: List[Dict[str, Any]]
+    expired_sessions: int = 0
+    revoked_sessions: int = 0
+    daily_active_users: int = 0
+    monthly_active_users: int = 0
+    duration_histogram: Dict[str, int] = field(default_factory=dict)
 
 
 class SessionManager:
@@ -98,6 +125,8 @@ class SessionManager:
         self.redis_client = redis_client
         self.cleanup_task = None
         self.session_secret = os.getenv("SESSION_SECRET", "fataplus-session-secret")
+        # Users already counted in the active-user sketches by this worker within the interval
+        self._active_users_recorded = TTLCache(ACTIVE_USER_RECORD_MAX_ENTRIES, ACTIVE_USER_RECORD_INTERVAL)
 
     async def start(self):
         """Start session manager background tasks"""
@@ -145,6 +174,9 @@ class SessionManager:
         # Update indexes
         self._update_session_indexes(session)
 
+        # Update statistics
+        self._record_session_created(session)
+
         logger.info(f"Created session {session_id} for user {user_id} in tenant {tenant_id}")
 
         return session
@@ -205,7 +237,7 @@ class SessionManager:
 
     def _update_session_indexes(self, session: SessionData):
         """Update session search indexes"""
-        timestamp_score = int(session.created_at.timestamp())
+        timestamp_score = _epoch_seconds(session.created_at)
 
         # User index
         user_key = f"{SESSION_USER_PREFIX}:{session.user_id}:{session.tenant_id}"
@@ -255,6 +287,7 @@ class SessionManager:
         if datetime.utcnow() > session.expires_at:
             session.status = SessionStatus.EXPIRED
             self._store_session(session)
+            self._record_session_ended(session, SessionStatus.EXPIRED)
             return None
 
         # Check if session is active
@@ -275,6 +308,9 @@ class SessionManager:
         session.last_accessed = datetime.utcnow()
         self._store_session(session)
 
+        # Count the user as active today
+        self._record_active_user(session.user_id, session.tenant_id)
+
         return session
 
     def update_session(self, session_id: str, updates: Dict[str, Any]) -> bool:
@@ -291,6 +327,12 @@ class SessionManager:
         # Update expiration if timeout changed
         if 'timeout' in updates:
             session.expires_at = session.last_accessed + timedelta(seconds=updates['timeout'])
+            if session.status == SessionStatus.ACTIVE:
+                self.redis_client.zadd(
+                    SESSION_EXPIRY_INDEX,
+                    {self._expiry_member(session): _epoch_seconds(session.expires_at)},
+                    xx=True
+                )
 
         self._store_session(session)
         return True
@@ -320,6 +362,9 @@ class SessionManager:
         # Remove from indexes
         self._remove_session_from_indexes(session)
 
+        # Update statistics
+        self._record_session_ended(session, SessionStatus.REVOKED)
+
         logger.info(f"Revoked session {session_id} by {revoked_by}: {reason}")
 
         return True
@@ -401,84 +446,208 @@ class SessionManager:
                 logger.error(f"Error in session cleanup task: {e}")
 
     async def _cleanup_sessions(self):
-        """Clean up expired and invalid sessions"""
+        """Account for sessions that expired through Redis TTL"""
         try:
-            # This is a simplified cleanup
-            # In production, you might want to scan all session keys
-            # and check their expiration status
+            now = int(time.time())
+            expired_members = self.redis_client.zrangebyscore(
+                SESSION_EXPIRY_INDEX, "-inf", now, withscores=True
+            )
+
+            for member, expires_ts in expired_members:
+                member = member.decode() if isinstance(member, bytes) else member
+                session_id, user_id, tenant_id, session_type, created_ts = json.loads(member)
+
+                self._finalize_session_stats(
+                    member, tenant_id, user_id, session_type, SessionStatus.EXPIRED,
+                    max(0, int(expires_ts) - int(created_ts))
+                )
 
-            # For now, we'll rely on Redis TTL
-            pass
+                # Drop the expired session from the lookup indexes
+                self.redis_client.zrem(f"{SESSION_USER_PREFIX}:{user_id}:{tenant_id}", session_id)
+                self.redis_client.zrem(f"{SESSION_TENANT_PREFIX}:{tenant_id}", session_id)
+
+            if expired_members:
+                logger.info(f"Recorded {len(expired_members)} expired sessions")
 
         except Exception as e:
             logger.error(f"Error cleaning up sessions: {e}")
 
+    def _expiry_member(self, session: SessionData) -> str:
+        """Build the expiry index member carrying everything needed for stats, as JSON so IDs may hold any character"""
+        return json.dumps([
+            session.session_id,
+            session.user_id,
+            session.tenant_id,
+            session.session_type.value,
+            _epoch_seconds(session.created_at)
+        ], separators=(",", ":"))
+
+    def _record_session_created(self, session: SessionData):
+        """Update counters, sketches and recent logins for a new session"""
+        session_type = session.session_type.value
+        login = json.dumps({
+            'session_id': session.session_id,
+            'user_id': session.user_id,
+            'tenant_id': session.tenant_id,
+            'created_at': session.created_at.isoformat(),
+            'session_type': session_type,
+            'ip_address': session.ip_address
+        })
+
+        pipe = self.redis_client.pipeline()
+        for scope in (session.tenant_id, SESSION_STATS_GLOBAL):
+            stats_key = f"{SESSION_STATS_PREFIX}:{scope}"
+            pipe.hincrby(stats_key, "total", 1)
+            pipe.hincrby(stats_key, "active", 1)
+            pipe.hincrby(stats_key, f"type:{session_type}", 1)
+
+            recent_key = f"{SESSION_RECENT_PREFIX}:{scope}"
+            pipe.lpush(recent_key, login)
+            pipe.ltrim(recent_key, 0, RECENT_LOGINS_LIMIT - 1)
+
+        pipe.hincrby(f"{SESSION_STATS_PREFIX}:{session.tenant_id}:users", session.user_id, 1)
+        pipe.hincrby(f"{SESSION_STATS_PREFIX}:{SESSION_STATS_GLOBAL}:tenants", session.tenant_id, 1)
+        pipe.zadd(SESSION_EXPIRY_INDEX, {self._expiry_member(session): _epoch_seconds(session.expires_at)})
+        self._add_active_user(pipe, session.user_id, session.tenant_id)
+        pipe.execute()
+        self._active_users_recorded.set(self._active_user_key(session.user_id, session.tenant_id), True)
+
+    def _record_session_ended(self, session: SessionData, end_status: SessionStatus):
+        """Update counters and duration histogram when a session ends"""
+        ended_at = min(datetime.utcnow(), session.expires_at)
+        duration = max(0, int((ended_at - session.created_at).total_seconds()))
+
+        self._finalize_session_stats(
+            self._expiry_member(session), session.tenant_id, session.user_id,
+            session.session_type.value, end_status, duration
+        )
+
+    def _finalize_session_stats(self, member: str, tenant_id: str, user_id: str,
+                                session_type: str, end_status: SessionStatus, duration: int):
+        """Move a session out of the active counters exactly once"""
+        # Removing the expiry entry guards against counting the same session twice
+        if not self.redis_client.zrem(SESSION_EXPIRY_INDEX, member):
+            return
+
+        bucket = self._duration_bucket(duration)
+
+        pipe = self.redis_client.pipeline()
+        for scope in (tenant_id, SESSION_STATS_GLOBAL):
+            stats_key = f"{SESSION_STATS_PREFIX}:{scope}"
+            pipe.hincrby(stats_key, "active", -1)
+            pipe.hincrby(stats_key, f"type:{session_type}", -1)
+            pipe.hincrby(stats_key, end_status.value, 1)
+            pipe.hincrby(stats_key, "duration_count", 1)
+            pipe.hincrby(stats_key, "duration_sum", duration)
+            pipe.hincrby(stats_key, f"duration:{bucket}", 1)
+
+        pipe.hincrby(f"{SESSION_STATS_PREFIX}:{tenant_id}:users", user_id, -1)
+        pipe.hincrby(f"{SESSION_STATS_PREFIX}:{SESSION_STATS_GLOBAL}:tenants", tenant_id, -1)
+        pipe.execute()
+
+    def _duration_bucket(self, duration: int) -> str:
+        """Get histogram bucket label for a session duration"""
+        for upper_bound in SESSION_DURATION_BUCKETS:
+            if duration <= upper_bound:
+                return f"le_{upper_bound}"
+        return "inf"
+
+    def _add_active_user(self, pipe, user_id: str, tenant_id: str):
+        """Queue HyperLogLog updates for daily and monthly active users"""
+        now = datetime.utcnow()
+        for scope in (tenant_id, SESSION_STATS_GLOBAL):
+            dau_key = f"{SESSION_DAU_PREFIX}:{scope}:{now.strftime('%Y%m%d')}"
+            mau_key = f"{SESSION_MAU_PREFIX}:{scope}:{now.strftime('%Y%m')}"
+            pipe.pfadd(dau_key, user_id)
+            pipe.expire(dau_key, DAU_RETENTION)
+            pipe.pfadd(mau_key, user_id)
+            pipe.expire(mau_key, MAU_RETENTION)
+
+    def _active_user_key(self, user_id: str, tenant_id: str) -> Tuple[str, str, str]:
+        """Throttle key for a user's activity, changing with the day so new sketches get the user"""
+        return user_id, tenant_id, datetime.utcnow().strftime('%Y%m%d')
+
+    def _record_active_user(self, user_id: str, tenant_id: str):
+        """Record user activity in the unique user sketches, at most once per interval per user"""
+        key = self._active_user_key(user_id, tenant_id)
+        if self._active_users_recorded.get(key) is not MISSING:
+            return
+        self._active_users_recorded.set(key, True)
+
+        pipe = self.redis_client.pipeline()
+        self._add_active_user(pipe, user_id, tenant_id)
+        pipe.execute()
+
+    def get_active_user_counts(self, tenant_id: str = None, day: datetime = None) -> Dict[str, int]:
+        """Get approximate daily and monthly unique active users"""
+        day = day or datetime.utcnow()
+        scope = tenant_id or SESSION_STATS_GLOBAL
+
+        return {
+            'daily_active_users': self.redis_client.pfcount(f"{SESSION_DAU_PREFIX}:{scope}:{day.strftime('%Y%m%d')}"),
+            'monthly_active_users': self.redis_client.pfcount(f"{SESSION_MAU_PREFIX}:{scope}:{day.strftime('%Y%m')}")
+        }
+
     def get_session_stats(self, tenant_id: str = None) -> SessionStats:
-        """Get session statistics"""
-        all_sessions = []
-        active_sessions = []
-        sessions_by_type = {}
-        sessions_by_tenant = {}
-        sessions_by_user = {}
-        session_durations = []
+        """Get session statistics from maintained counters"""
+        scope = tenant_id or SESSION_STATS_GLOBAL
+        stats_key = f"{SESSION_STATS_PREFIX}:{scope}"
 
+        pipe = self.redis_client.pipeline()
+        pipe.hgetall(stats_key)
+        pipe.lrange(f"{SESSION_RECENT_PREFIX}:{scope}", 0, RECENT_LOGINS_LIMIT - 1)
         if tenant_id:
-            # Get sessions for specific tenant
-            sessions = self.get_tenant_sessions(tenant_id)
-            all_sessions.extend(sessions)
+            pipe.hgetall(f"{SESSION_STATS_PREFIX}:{tenant_id}:users")
         else:
-            # Get all sessions (simplified - in production you'd scan all keys)
-            pass
+            pipe.hgetall(f"{SESSION_STATS_PREFIX}:{SESSION_STATS_GLOBAL}:tenants")
+        counters, recent, breakdown = pipe.execute()
 
-        # Process sessions
-        for session in all_sessions:
-            # Count by type
-            session_type = session.session_type.value
-            sessions_by_type[session_type] = sessions_by_type.get(session_type, 0) + 1
+        counters = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in counters.items()
+        }
+        breakdown = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in breakdown.items()
+            if int(v) > 0
+        }
 
-            # Count by tenant
-            tenant = session.tenant_id
-            sessions_by_tenant[tenant] = sessions_by_tenant.get(tenant, 0) + 1
+        sessions_by_type = {
+            key[len("type:"):]: value
+            for key, value in counters.items()
+            if key.startswith("type:") and value > 0
+        }
+        duration_histogram = {
+            key[len("duration:"):]: value
+            for key, value in counters.items()
+            if key.startswith("duration:")
+        }
 
-            # Count by user
-            user = session.user_id
-            sessions_by_user[user] = sessions_by_user.get(user, 0) + 1
+        duration_count = counters.get("duration_count", 0)
+        avg_duration = counters.get("duration_sum", 0) / duration_count if duration_count else 0
 
-            # Calculate duration
-            if session.status == SessionStatus.EXPIRED or session.status == SessionStatus.REVOKED:
-                duration = (session.expires_at - session.created_at).total_seconds()
-                session_durations.append(duration)
+        if tenant_id:
+            sessions_by_tenant = {tenant_id: counters.get("active", 0)} if counters.get("active") else {}
+            sessions_by_user = breakdown
+        else:
+            sessions_by_tenant = breakdown
+            sessions_by_user = {}
 
-            if session.status == SessionStatus.ACTIVE:
-                active_sessions.append(session)
-
-        # Calculate average duration
-        avg_duration = sum(session_durations) / len(session_durations) if session_durations else 0
-
-        # Get recent logins
-        recent_logins = []
-        if all_sessions:
-            sorted_sessions = sorted(all_sessions, key=lambda s: s.created_at, reverse=True)
-            recent_logins = [
-                {
-                    'session_id': s.session_id,
-                    'user_id': s.user_id,
-                    'tenant_id': s.tenant_id,
-                    'created_at': s.created_at.isoformat(),
-                    'session_type': s.session_type.value,
-                    'ip_address': s.ip_address
-                }
-                for s in sorted_sessions[:10]
-            ]
+        active_users = self.get_active_user_counts(tenant_id)
 
         return SessionStats(
-            total_sessions=len(all_sessions),
-            active_sessions=len(active_sessions),
+            total_sessions=counters.get("total", 0),
+            active_sessions=counters.get("active", 0),
             sessions_by_type=sessions_by_type,
             sessions_by_tenant=sessions_by_tenant,
             sessions_by_user=sessions_by_user,
             average_session_duration=avg_duration,
-            recent_logins=recent_logins
+            recent_logins=[json.loads(entry) for entry in recent],
+            expired_sessions=counters.get(SessionStatus.EXPIRED.value, 0),
+            revoked_sessions=counters.get(SessionStatus.REVOKED.value, 0),
+            daily_active_users=active_users['daily_active_users'],
+            monthly_active_users=active_users['monthly_active_users'],
+            duration_histogram=duration_histogram
         )
 
 
@@ -743,7 +912,12 @@ class SessionAPI:
             "sessions_by_tenant": stats.sessions_by_tenant,
             "sessions_by_user": stats.sessions_by_user,
             "average_session_duration": stats.average_session_duration,
-            "recent_logins": stats.recent_logins
+            "recent_logins": stats.recent_logins,
+            "expired_sessions": stats.expired_sessions,
+            "revoked_sessions": stats.revoked_sessions,
+            "daily_active_users": stats.daily_active_users,
+            "monthly_active_users": stats.monthly_active_users,
+            "duration_histogram": stats.duration_histogram
         }
 
 
@@ -772,7 +946,6 @@ async def require_session(request: Request) -> SessionData:
 
 if __name__ == "__main__":
     """Test session management functionality"""
-    import asyncio
 
     async def test_session_management():
         await session_manager.start()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Fataplus Startup Profiler
+Reports per-module import cost and service warm-up time of the web backend
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+SOURCE_ROOT = BACKEND_ROOT / "src"
+
+
+def backend_env(extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Environment that lets a fresh interpreter import the application the way the server does"""
+    env = dict(os.environ)
+    paths = [str(SOURCE_ROOT), str(BACKEND_ROOT)]
+    if env.get("PYTHONPATH"):
+        paths.append(env["PYTHONPATH"])
+    env["PYTHONPATH"] = os.pathsep.join(paths)
+    env.update(extra or {})
+    return env
+
+
+def parse_importtime(output: str) -> List[Dict[str, Any]]:
+    """Parse `-X importtime` output into per-module self and cumulative seconds"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Header line
+            continue
+        modules.append({
+            'module': fields[2].strip(),
+            'self_seconds': int(fields[0]) / 1_000_000,
+            'cumulative_seconds': int(fields[1]) / 1_000_000
+        })
+    return modules
+
+
+def profile_imports(module: str = "main", timeout: float = 120) -> Dict[str, Any]:
+    """Import a module in a fresh interpreter, returning wall time and per-module import cost"""
+    started_at = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(SOURCE_ROOT),
+        env=backend_env(),
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+    wall_seconds = time.perf_counter() - started_at
+
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"Importing {module} failed:\n" + "\n".join(errors[-20:]))
+
+    modules = parse_importtime(result.stderr)
+    return {
+        'module': module,
+        'wall_seconds': wall_seconds,
+        'import_seconds': sum(entry['self_seconds'] for entry in modules),
+        'modules': modules
+    }
+
+
+def profile_warm_up() -> Dict[str, Dict[str, Any]]:
+    """Import the application in this process and time the concurrent service warm-up"""
+    sys.path[:0] = [str(SOURCE_ROOT), str(BACKEND_ROOT)]
+    import main  # noqa: F401  (registers the application services)
+    from security.service_registry import warm_up
+
+    return asyncio.run(warm_up())
+
+
+def top_modules(profile: Dict[str, Any], limit: int = 25, package: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get the most expensive modules by self time, optionally within one package"""
+    modules = profile['modules']
+    if package:
+        modules = [entry for entry in modules if entry['module'].split('.')[0] == package]
+    return sorted(modules, key=lambda entry: entry['self_seconds'], reverse=True)[:limit]
+
+
+if __name__ == "__main__":
+    """CLI interface for startup profiling"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fataplus Startup Profiler")
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--top", type=int, default=25, help="Number of modules to report")
+    parser.add_argument("--package", help="Only report modules from this top-level package")
+    parser.add_argument("--warm-up", action="store_true", help="Also time service warm-up (connects to backends)")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+
+    args = parser.parse_args()
+
+    profile = profile_imports(args.module)
+    report = {
+        'module': profile['module'],
+        'wall_seconds': profile['wall_seconds'],
+        'import_seconds': profile['import_seconds'],
+        'top_modules': top_modules(profile, args.top, args.package)
+    }
+    if args.warm_up:
+        report['warm_up'] = profile_warm_up()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Import of {report['module']}: {report['wall_seconds']:.3f}s wall, "
+              f"{report['import_seconds']:.3f}s in module bodies")
+        print(f"{'self ms':>10} {'cumulative ms':>14}  module")
+        for entry in report['top_modules']:
+            print(f"{entry['self_seconds'] * 1000:>10.1f} {entry['cumulative_seconds'] * 1000:>14.1f}  {entry['module']}")
+
+        for name, result in report.get('warm_up', {}).items():
+            print(f"Warm-up {name}: {result['status']} in {result['seconds'] * 1000:.1f}ms")
@@ -16,6 +16,7 @@ from .models import (
     PaginationParams, PaginatedResponse, UserRole, UserStatus,
     SystemMetrics
 )
+from security.service_registry import lazy_service
 
 
 class AdminDatabase:
@@ -314,5 +315,5 @@ class AdminDatabase:
         )
 
 
-# Singleton instance
-admin_db = AdminDatabase()
\ No newline at end of file
+# Singleton instance, seeded on first use
+admin_db = lazy_service("admin_db", AdminDatabase)
@@ -16,6 +16,7 @@ from .models import (
     PaginationParams, PaginatedResponse
 )
 from .database import admin_db
+from auth.auth_service import auth_service
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -143,6 +144,7 @@ async def update_user(user_id: str, user_data: UserUpdateRequest):
     user = await admin_db.update_user(user_id, user_data)
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    auth_service.invalidate_principal(user_id)
     return user
 
 
@@ -152,6 +154,7 @@ async def delete_user(user_id: str):
     success = await admin_db.delete_user(user_id)
     if not success:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    auth_service.invalidate_principal(user_id)
     return {"message": "Utilisateur supprimé avec succès"}
 
 
@@ -4,21 +4,32 @@ Advanced user management with JWT, RBAC, and security features
 """
 
 import os
+import json
 from jose import jwt
-import bcrypt
 import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
 import redis
 import structlog
 
+from security.password_hashing import password_hasher
+from security.login_tracking import LoginAttemptTracker, LoginWriteBehind
+from security.local_cache import TTLCache, MISSING
+from security.database_pool import get_database_pool
+from security.service_registry import lazy_service
+
 logger = structlog.get_logger(__name__)
 
+# Principal cache configuration
+PRINCIPAL_VERSION_PREFIX = "user_principal_version"
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+PRINCIPAL_VERSION_CHECK_INTERVAL = float(os.getenv("PRINCIPAL_VERSION_CHECK_INTERVAL", "5"))
+
 
 class UserRole(Enum):
     """User role enumeration"""
@@ -192,27 +203,30 @@ class AuthService:
         self.refresh_token_expire_days = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
         # Database connections
-        self.db_pool = self._init_database()
+        self.db = get_database_pool()
         self.redis_client = self._init_redis()
 
         # Rate limiting
         self.max_login_attempts = int(os.getenv("MAX_LOGIN_ATTEMPTS", "5"))
         self.lockout_duration_minutes = int(os.getenv("LOCKOUT_DURATION_MINUTES", "15"))
 
-    def _init_database(self):
-        """Initialize database connection pool"""
-        try:
-            return psycopg2.connect(
-                host=os.getenv("DB_HOST", "localhost"),
-                port=int(os.getenv("DB_PORT", "5432")),
-                database=os.getenv("DB_NAME", "fataplus"),
-                user=os.getenv("DB_USER", "fataplus"),
-                password=os.getenv("DB_PASSWORD", ""),
-                cursor_factory=RealDictCursor
+        # Login bookkeeping kept off the database critical path
+        self.login_attempts = None
+        self.last_login_writer = None
+        if self.redis_client:
+            self.login_attempts = LoginAttemptTracker(
+                self.redis_client,
+                max_attempts=self.max_login_attempts,
+                lockout_seconds=self.lockout_duration_minutes * 60
             )
-        except Exception as e:
-            logger.error("Failed to connect to database", error=str(e))
-            raise
+            self.last_login_writer = LoginWriteBehind(
+                self.redis_client, "auth_service", self._apply_last_login_batch
+            )
+        self._user_id_type: Optional[str] = None
+
+        # Per-process principal caches: (user, version) -> User and user -> version
+        self._principals = TTLCache(PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL)
+        self._principal_versions = TTLCache(PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_VERSION_CHECK_INTERVAL)
 
     def _init_redis(self):
         """Initialize Redis connection"""
@@ -227,13 +241,13 @@ class AuthService:
             logger.error("Failed to connect to Redis", error=str(e))
             return None
 
-    def hash_password(self, password: str) -> str:
-        """Hash password using bcrypt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    async def hash_password(self, password: str) -> str:
+        """Hash password using bcrypt on the bounded hashing pool"""
+        return await password_hasher.hash(password)
 
-    def verify_password(self, password: str, hashed: str) -> bool:
-        """Verify password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    async def verify_password(self, password: str, hashed: str) -> bool:
+        """Verify password against hash on the bounded hashing pool"""
+        return await password_hasher.verify(password, hashed)
 
     def create_access_token(self, data: Dict[str, Any]) -> str:
         """Create JWT access token"""
@@ -265,13 +279,13 @@ class AuthService:
             logger.warning("Invalid token", token_type=token_type)
             return None
 
-    def create_user(self, user_data: Dict[str, Any]) -> Optional[User]:
+    async def create_user(self, user_data: Dict[str, Any]) -> Optional[User]:
         """Create new user"""
-        try:
-            with self.db_pool.cursor() as cursor:
-                # Hash password
-                hashed_password = self.hash_password(user_data["password"])
+        # Hash password before taking a database cursor
+        hashed_password = await self.hash_password(user_data["password"])
 
+        try:
+            with self.db.cursor() as cursor:
                 # Insert user
                 cursor.execute("""
                     INSERT INTO users (
@@ -310,19 +324,18 @@ class AuthService:
                 ))
 
                 result = cursor.fetchone()
-                self.db_pool.commit()
+                cursor.connection.commit()
 
                 return self.get_user_by_id(result["id"])
 
         except Exception as e:
             logger.error("Failed to create user", error=str(e))
-            self.db_pool.rollback()
             return None
 
     def get_user_by_id(self, user_id: str) -> Optional[User]:
         """Get user by ID"""
         try:
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
                 result = cursor.fetchone()
 
@@ -335,10 +348,45 @@ class AuthService:
             logger.error("Failed to get user by ID", user_id=user_id, error=str(e))
             return None
 
+    def get_principal(self, user_id: str) -> Optional[User]:
+        """Get the authenticated user, served from the per-process cache while its version is current"""
+        version = self._principal_versions.get(user_id)
+        if version is MISSING:
+            version = self._get_principal_version(user_id)
+            self._principal_versions.set(user_id, version)
+
+        user = self._principals.get((user_id, version))
+        if user is MISSING:
+            user = self.get_user_by_id(user_id)
+            if user:
+                self._principals.set((user_id, version), user)
+        return user
+
+    def invalidate_principal(self, user_id: str):
+        """Drop cached copies of a user after a role, status or profile change"""
+        self._principal_versions.pop(user_id)
+        if self.redis_client:
+            try:
+                # Other workers pick up the new version on their next check
+                self.redis_client.incr(f"{PRINCIPAL_VERSION_PREFIX}:{user_id}")
+            except Exception as e:
+                logger.error("Failed to bump principal version", user_id=user_id, error=str(e))
+
+    def _get_principal_version(self, user_id: str) -> int:
+        """Get the current principal version for a user"""
+        if not self.redis_client:
+            return 0
+        try:
+            version = self.redis_client.get(f"{PRINCIPAL_VERSION_PREFIX}:{user_id}")
+            return int(version) if version else 0
+        except Exception:
+            # Without a shared version the local TTL bounds staleness
+            return 0
+
     def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
         try:
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("SELECT * FROM users WHERE LOWER(email) = LOWER(%s)", (email,))
                 result = cursor.fetchone()
 
@@ -351,7 +399,7 @@ class AuthService:
             logger.error("Failed to get user by email", email=email, error=str(e))
             return None
 
-    def authenticate_user(self, email: str, password: str, device_info: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+    async def authenticate_user(self, email: str, password: str, device_info: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
         """Authenticate user and return tokens"""
         user = self.get_user_by_email(email)
 
@@ -371,17 +419,11 @@ class AuthService:
 
         # Verify password
         security_data = user.__dict__.get("security", {})
-        if not self.verify_password(password, security_data.get("password_hash", "")):
+        if not await self.verify_password(password, security_data.get("password_hash", "")):
             self._increment_login_attempts(user.id)
             logger.warning("Invalid password", user_id=user.id)
             return None
 
-        # Reset login attempts on successful login
-        self._reset_login_attempts(user.id)
-
-        # Update last login
-        self._update_last_login(user.id, device_info)
-
         # Create tokens
         token_data = {
             "sub": user.id,
@@ -394,8 +436,8 @@ class AuthService:
         access_token = self.create_access_token(token_data)
         refresh_token = self.create_refresh_token(token_data)
 
-        # Store refresh token
-        self._store_refresh_token(user.id, refresh_token, device_info)
+        # Reset attempts, store the refresh token and queue last-login in one round trip
+        self._record_successful_login(user.id, refresh_token, device_info)
 
         return {
             "access_token": access_token,
@@ -471,7 +513,7 @@ class AuthService:
     def update_user_role(self, user_id: str, new_role: UserRole, updated_by: str) -> bool:
         """Update user role"""
         try:
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("""
                     UPDATE users
                     SET account = jsonb_set(account, '{role}', %s),
@@ -486,14 +528,14 @@ class AuthService:
                         action="role_changed",
                         details={"new_role": new_role.value, "changed_by": updated_by}
                     )
-                    self.db_pool.commit()
+                    cursor.connection.commit()
+                    self.invalidate_principal(user_id)
                     return True
 
                 return False
 
         except Exception as e:
             logger.error("Failed to update user role", user_id=user_id, error=str(e))
-            self.db_pool.rollback()
             return False
 
     def enable_two_factor(self, user_id: str) -> Optional[str]:
@@ -502,7 +544,7 @@ class AuthService:
         secret = secrets.token_hex(32)
 
         try:
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("""
                     UPDATE users
                     SET account = jsonb_set(account, '{two_factor_enabled}', 'true'),
@@ -511,14 +553,14 @@ class AuthService:
                 """, (json.dumps(secret), user_id))
 
                 if cursor.rowcount > 0:
-                    self.db_pool.commit()
+                    cursor.connection.commit()
+                    self.invalidate_principal(user_id)
                     return secret
 
                 return None
 
         except Exception as e:
             logger.error("Failed to enable 2FA", user_id=user_id, error=str(e))
-            self.db_pool.rollback()
             return None
 
     def verify_two_factor_code(self, user_id: str, code: str) -> bool:
@@ -568,70 +610,86 @@ class AuthService:
 
     def _is_account_locked(self, user_id: str) -> bool:
         """Check if account is locked due to failed login attempts"""
-        if not self.redis_client:
-            return False
-
-        try:
-            attempts = self.redis_client.get(f"login_attempts:{user_id}")
-            if attempts and int(attempts) >= self.max_login_attempts:
-                return True
-            return False
-        except Exception:
+        if not self.login_attempts:
             return False
+        return self.login_attempts.is_locked(user_id)
 
     def _increment_login_attempts(self, user_id: str):
-        """Increment failed login attempts"""
-        if self.redis_client:
+        """Increment failed login attempts, locking the account at the limit"""
+        if self.login_attempts:
             try:
-                key = f"login_attempts:{user_id}"
-                attempts = self.redis_client.incr(key)
-                self.redis_client.expire(key, self.lockout_duration_minutes * 60)
+                attempts, locked_for = self.login_attempts.register_failure(user_id)
+                if locked_for:
+                    logger.warning("Account locked after failed attempts", user_id=user_id, attempts=attempts)
             except Exception as e:
                 logger.error("Failed to increment login attempts", user_id=user_id, error=str(e))
 
-    def _reset_login_attempts(self, user_id: str):
-        """Reset login attempts on successful login"""
-        if self.redis_client:
+    def _record_successful_login(self, user_id: str, refresh_token: str, device_info: Dict[str, Any] = None):
+        """Reset attempts, store the refresh token and queue last-login in a single pipeline"""
+        now = datetime.now(timezone.utc).isoformat()
+        ip_address = device_info.get("ip", "unknown") if device_info else "unknown"
+        fields = {"last_login": now, "last_login_ip": ip_address}
+        event = {
+            "event": "login_successful",
+            "timestamp": now,
+            "ip_address": ip_address,
+            "user_agent": device_info.get("user_agent", "unknown") if device_info else "unknown"
+        }
+
+        if not self.redis_client:
+            # Nothing to queue in; write last-login straight to the database
             try:
-                self.redis_client.delete(f"login_attempts:{user_id}")
+                self._apply_last_login_batch([(user_id, dict(fields, events=[event]))])
             except Exception as e:
-                logger.error("Failed to reset login attempts", user_id=user_id, error=str(e))
+                logger.error("Failed to update last login", user_id=user_id, error=str(e))
+            return
 
-    def _update_last_login(self, user_id: str, device_info: Dict[str, Any] = None):
-        """Update user's last login information"""
         try:
-            with self.db_pool.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE users
-                    SET account = jsonb_set(
-                        jsonb_set(account, '{last_login}', %s),
-                        '{last_login_ip}', %s
-                    ),
-                    security = jsonb_set(security, '{audit_log}', %s)
-                    WHERE id = %s
-                """, (
-                    json.dumps(datetime.now(timezone.utc).isoformat()),
-                    json.dumps(device_info.get("ip", "unknown") if device_info else "unknown"),
-                    json.dumps([{
-                        "event": "login_successful",
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "ip_address": device_info.get("ip", "unknown") if device_info else "unknown",
-                        "user_agent": device_info.get("user_agent", "unknown") if device_info else "unknown"
-                    }]),
-                    user_id
-                ))
-                self.db_pool.commit()
+            pipe = self.redis_client.pipeline(transaction=False)
+            self.login_attempts.reset(user_id, pipe)
+            pipe.setex(
+                f"refresh_token:{user_id}:{refresh_token}",
+                self.refresh_token_expire_days * 24 * 3600,
+                "valid"
+            )
+            self.last_login_writer.record(user_id, fields, events=[event], pipe=pipe)
+            pipe.execute()
         except Exception as e:
-            logger.error("Failed to update last login", user_id=user_id, error=str(e))
-
-    def _store_refresh_token(self, user_id: str, token: str, device_info: Dict[str, Any] = None):
-        """Store refresh token in Redis"""
-        if self.redis_client:
-            try:
-                key = f"refresh_token:{user_id}:{token}"
-                self.redis_client.setex(key, self.refresh_token_expire_days * 24 * 3600, "valid")
-            except Exception as e:
-                logger.error("Failed to store refresh token", user_id=user_id, error=str(e))
+            logger.error("Failed to record successful login", user_id=user_id, error=str(e))
+
+    def _apply_last_login_batch(self, batch: List[tuple]):
+        """Write coalesced last-login records in one transaction"""
+        rows = [
+            (user_id, json.dumps(entry["last_login"]), json.dumps(entry["last_login_ip"]), json.dumps(entry["events"]))
+            for user_id, entry in batch
+        ]
+        with self.db.cursor() as cursor:
+            id_type = self._get_user_id_type(cursor)
+            execute_values(cursor, """
+                UPDATE users AS u
+                SET account = jsonb_set(
+                    jsonb_set(u.account, '{last_login}', v.last_login),
+                    '{last_login_ip}', v.last_login_ip
+                ),
+                security = jsonb_set(
+                    u.security,
+                    '{audit_log}',
+                    COALESCE(u.security->'audit_log', '[]'::jsonb) || v.events
+                )
+                FROM (VALUES %s) AS v(id, last_login, last_login_ip, events)
+                WHERE u.id = v.id
+            """, rows, template=f"(%s::{id_type}, %s::jsonb, %s::jsonb, %s::jsonb)")
+
+    def _get_user_id_type(self, cursor) -> str:
+        """Get the SQL type of users.id, so batch keys are cast to it and the primary key index is used"""
+        if self._user_id_type is None:
+            cursor.execute("""
+                SELECT format_type(atttypid, atttypmod) AS id_type
+                FROM pg_attribute
+                WHERE attrelid = 'users'::regclass AND attname = 'id'
+            """)
+            self._user_id_type = cursor.fetchone()["id_type"]
+        return self._user_id_type
 
     def _validate_refresh_token(self, user_id: str, token: str) -> bool:
         """Validate refresh token"""
@@ -653,7 +711,7 @@ class AuthService:
                 "details": details
             }
 
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("""
                     UPDATE users
                     SET security = jsonb_set(
@@ -664,11 +722,16 @@ class AuthService:
                     WHERE id = %s
                 """, (json.dumps([audit_entry]), user_id))
 
-                self.db_pool.commit()
+                cursor.connection.commit()
 
         except Exception as e:
             logger.error("Failed to log audit event", user_id=user_id, action=action, error=str(e))
 
 
-# Global auth service instance
-auth_service = AuthService()
+def _stop_login_writer(service: AuthService) -> None:
+    if service.last_login_writer is not None:
+        service.last_login_writer.stop()
+
+
+# Global auth service instance, built on first use
+auth_service = lazy_service("auth_service", AuthService, on_shutdown=_stop_login_writer)
@@ -5,10 +5,12 @@ Authentication dependencies for FastAPI
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .security import verify_token, TokenData
-from ..models.database import get_db
+from ..models.database import get_db, get_async_db
 from ..models.user import User
 
 # OAuth2 scheme for token authentication
@@ -17,7 +19,7 @@ security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get the current authenticated user"""
     credentials_exception = HTTPException(
@@ -30,7 +32,8 @@ async def get_current_user(
     if token_data is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == token_data.username).first()
+    result = await db.execute(select(User).where(User.username == token_data.username))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
 
@@ -3,17 +3,30 @@ LDAP Authentication module for Cloudron integration
 """
 
 import os
+import queue
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 from ldap3 import Server, Connection, ALL, SUBTREE
-from ldap3.core.exceptions import LDAPException, LDAPBindError, LDAPInvalidCredentialsResult
-
-from .security import get_password_hash, verify_password
+from ldap3.core.exceptions import (
+    LDAPException, LDAPBindError, LDAPInvalidCredentialsResult, LDAPCommunicationError
+)
+from ldap3.core.results import (
+    RESULT_SUCCESS, RESULT_NO_SUCH_OBJECT, RESULT_INVALID_DN_SYNTAX, RESULT_INVALID_CREDENTIALS
+)
+from ldap3.utils.conv import escape_filter_chars
+
+from .security import get_password_hash_async
 from ..models.user import User
 from ..models.organization import Organization
 from ..models.database import get_db
 from sqlalchemy.orm import Session
+from security.local_cache import TTLCache, MISSING
+from security.service_registry import lazy_service
 
 # LDAP Configuration
 LDAP_SERVER = os.getenv("LDAP_SERVER", "localhost")
@@ -27,9 +40,91 @@ LDAP_USER_DN_ATTRIBUTE = os.getenv("LDAP_USER_DN_ATTRIBUTE", "dn")
 LDAP_USER_DISPLAY_NAME_ATTRIBUTE = os.getenv("LDAP_USER_DISPLAY_NAME_ATTRIBUTE", "cn")
 LDAP_USER_EMAIL_ATTRIBUTE = os.getenv("LDAP_USER_EMAIL_ATTRIBUTE", "mail")
 
+# Connection pool and lookup cache Configuration
+LDAP_POOL_SIZE = int(os.getenv("LDAP_POOL_SIZE", "5"))
+LDAP_POOL_ACQUIRE_TIMEOUT = float(os.getenv("LDAP_POOL_ACQUIRE_TIMEOUT", "5"))
+LDAP_CONNECT_TIMEOUT = float(os.getenv("LDAP_CONNECT_TIMEOUT", "5"))
+LDAP_RECEIVE_TIMEOUT = float(os.getenv("LDAP_RECEIVE_TIMEOUT", "10"))
+LDAP_USER_CACHE_TTL = int(os.getenv("LDAP_USER_CACHE_TTL", "300"))
+LDAP_USER_CACHE_MAX_ENTRIES = int(os.getenv("LDAP_USER_CACHE_MAX_ENTRIES", "10000"))
+
+# Bind results meaning the DN itself is gone, so a cached lookup may be stale
+LDAP_STALE_DN_RESULTS = (RESULT_NO_SUCH_OBJECT, RESULT_INVALID_DN_SYNTAX)
+
 logger = logging.getLogger(__name__)
 
 
+class LDAPPoolTimeout(LDAPException):
+    """Raised when no LDAP connection becomes free within the acquire timeout"""
+
+
+class LDAPConnectionPool:
+    """
+    Bounded pool of persistent LDAP connections
+    Connections are opened on demand and discarded after socket-level errors
+    """
+
+    def __init__(self, factory: Callable[[], Connection], max_size: int = LDAP_POOL_SIZE,
+                 acquire_timeout: float = LDAP_POOL_ACQUIRE_TIMEOUT):
+        self.factory = factory
+        self.max_size = max(1, max_size)
+        self.acquire_timeout = acquire_timeout
+        self._idle: "queue.LifoQueue[Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+
+    @contextmanager
+    def connection(self):
+        """Check out an open connection, waiting up to the acquire timeout for a free slot"""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise LDAPPoolTimeout(f"No LDAP connection available within {self.acquire_timeout}s")
+
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+                if conn.closed:
+                    conn = self.factory()
+            except queue.Empty:
+                conn = self.factory()
+
+            yield conn
+        except LDAPCommunicationError:
+            # The socket is gone; result errors leave the connection usable
+            if conn is not None:
+                self._discard(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put(conn)
+            self._slots.release()
+
+    def run(self, operation: Callable[[Connection], Any]) -> Any:
+        """Run an operation on a pooled connection, retrying once if the server dropped it"""
+        try:
+            with self.connection() as conn:
+                return operation(conn)
+        except LDAPCommunicationError:
+            # Idle connections were likely dropped together, so start afresh
+            self.close()
+            with self.connection() as conn:
+                return operation(conn)
+
+    def _discard(self, conn: Connection) -> None:
+        try:
+            conn.unbind()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
 class LDAPAuthenticator:
     """LDAP Authentication handler for Cloudron"""
 
@@ -38,58 +133,108 @@ class LDAPAuthenticator:
             LDAP_SERVER,
             port=LDAP_PORT,
             use_ssl=LDAP_USE_SSL,
-            get_info=ALL
+            get_info=ALL,
+            connect_timeout=LDAP_CONNECT_TIMEOUT
         )
 
-    def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        # Service-account connections stay bound for searches; auth connections are rebound per login
+        self.search_pool = LDAPConnectionPool(self._open_search_connection)
+        self.auth_pool = LDAPConnectionPool(self._open_auth_connection)
+        self.user_cache = TTLCache(LDAP_USER_CACHE_MAX_ENTRIES, LDAP_USER_CACHE_TTL)
+
+        # LDAP calls block, so they run on a dedicated pool sized to the connection pools
+        self._executor = ThreadPoolExecutor(max_workers=LDAP_POOL_SIZE, thread_name_prefix="ldap")
+
+    def _open_search_connection(self) -> Connection:
+        if LDAP_BIND_DN and LDAP_BIND_PASSWORD:
+            return Connection(self.server, LDAP_BIND_DN, LDAP_BIND_PASSWORD,
+                              auto_bind=True, receive_timeout=LDAP_RECEIVE_TIMEOUT)
+        # Anonymous bind for search
+        return Connection(self.server, auto_bind=True, receive_timeout=LDAP_RECEIVE_TIMEOUT)
+
+    def _open_auth_connection(self) -> Connection:
+        conn = Connection(self.server, receive_timeout=LDAP_RECEIVE_TIMEOUT)
+        conn.open()
+        return conn
+
+    def _lookup_user(self, username: str) -> Optional[Dict[str, Any]]:
         """
-        Authenticate user against LDAP server
-        Returns user info dict if successful, None if failed
+        Find a user's DN and attributes, using the lookup cache
         """
-        try:
-            # First, bind with service account to search for user
-            if LDAP_BIND_DN and LDAP_BIND_PASSWORD:
-                conn = Connection(self.server, LDAP_BIND_DN, LDAP_BIND_PASSWORD, auto_bind=True)
-            else:
-                # Anonymous bind for search
-                conn = Connection(self.server, auto_bind=True)
-
-            # Search for user
-            search_filter = LDAP_USER_SEARCH_FILTER.format(username=username)
+        user_info = self.user_cache.get(username)
+        if user_info is not MISSING:
+            return user_info
+
+        search_filter = LDAP_USER_SEARCH_FILTER.format(username=escape_filter_chars(username))
+
+        def search(conn: Connection) -> Optional[Dict[str, Any]]:
             conn.search(
                 LDAP_BASE_DN,
                 search_filter,
                 SUBTREE,
                 attributes=[LDAP_USER_DN_ATTRIBUTE, LDAP_USER_DISPLAY_NAME_ATTRIBUTE, LDAP_USER_EMAIL_ATTRIBUTE]
             )
-
             if not conn.entries:
-                logger.warning(f"User {username} not found in LDAP")
-                conn.unbind()
                 return None
 
             user_entry = conn.entries[0]
-            user_dn = str(user_entry[LDAP_USER_DN_ATTRIBUTE])
-            display_name = str(user_entry[LDAP_USER_DISPLAY_NAME_ATTRIBUTE])
-            email = str(user_entry[LDAP_USER_EMAIL_ATTRIBUTE]) if LDAP_USER_EMAIL_ATTRIBUTE in user_entry else ""
-
-            conn.unbind()
-
-            # Now try to bind with user's credentials
-            user_conn = Connection(self.server, user_dn, password, auto_bind=True)
-            user_conn.unbind()
-
-            # If we get here, authentication was successful
             return {
                 "username": username,
-                "display_name": display_name,
-                "email": email,
-                "dn": user_dn
+                "display_name": str(user_entry[LDAP_USER_DISPLAY_NAME_ATTRIBUTE]),
+                "email": str(user_entry[LDAP_USER_EMAIL_ATTRIBUTE]) if LDAP_USER_EMAIL_ATTRIBUTE in user_entry else "",
+                "dn": str(user_entry[LDAP_USER_DN_ATTRIBUTE])
             }
 
-        except LDAPInvalidCredentialsResult:
+        user_info = self.search_pool.run(search)
+        if user_info:
+            self.user_cache.set(username, user_info)
+        return user_info
+
+    def _bind_user(self, user_dn: str, password: str) -> int:
+        """
+        Check credentials with a single bind on a pooled connection, returning the LDAP result code
+        """
+        def bind(conn: Connection) -> int:
+            try:
+                if conn.rebind(user=user_dn, password=password):
+                    return RESULT_SUCCESS
+            except (LDAPBindError, LDAPInvalidCredentialsResult):
+                pass
+            return (conn.result or {}).get("result", RESULT_INVALID_CREDENTIALS)
+
+        return self.auth_pool.run(bind)
+
+    def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        """
+        Authenticate user against LDAP server
+        Returns user info dict if successful, None if failed
+        """
+        # An empty password would be accepted as an unauthenticated bind
+        if not password:
+            return None
+
+        try:
+            user_info = self._lookup_user(username)
+            if not user_info:
+                logger.warning(f"User {username} not found in LDAP")
+                return None
+
+            result = self._bind_user(user_info["dn"], password)
+            if result == RESULT_SUCCESS:
+                return dict(user_info)
+
+            # A missing DN means the cached entry went stale after a directory rename, so look it
+            # up once more; a wrong password leaves the cache alone
+            if result in LDAP_STALE_DN_RESULTS:
+                self.user_cache.pop(username)
+                fresh_info = self._lookup_user(username)
+                if (fresh_info and fresh_info["dn"] != user_info["dn"]
+                        and self._bind_user(fresh_info["dn"], password) == RESULT_SUCCESS):
+                    return dict(fresh_info)
+
             logger.warning(f"Invalid credentials for user {username}")
             return None
+
         except LDAPException as e:
             logger.error(f"LDAP error for user {username}: {str(e)}")
             return None
@@ -102,41 +247,37 @@ class LDAPAuthenticator:
         Get user information from LDAP without authentication
         """
         try:
-            if LDAP_BIND_DN and LDAP_BIND_PASSWORD:
-                conn = Connection(self.server, LDAP_BIND_DN, LDAP_BIND_PASSWORD, auto_bind=True)
-            else:
-                conn = Connection(self.server, auto_bind=True)
-
-            search_filter = LDAP_USER_SEARCH_FILTER.format(username=username)
-            conn.search(
-                LDAP_BASE_DN,
-                search_filter,
-                SUBTREE,
-                attributes=[LDAP_USER_DN_ATTRIBUTE, LDAP_USER_DISPLAY_NAME_ATTRIBUTE, LDAP_USER_EMAIL_ATTRIBUTE]
-            )
-
-            if not conn.entries:
-                conn.unbind()
-                return None
-
-            user_entry = conn.entries[0]
-            user_info = {
-                "username": username,
-                "display_name": str(user_entry[LDAP_USER_DISPLAY_NAME_ATTRIBUTE]),
-                "email": str(user_entry[LDAP_USER_EMAIL_ATTRIBUTE]) if LDAP_USER_EMAIL_ATTRIBUTE in user_entry else "",
-                "dn": str(user_entry[LDAP_USER_DN_ATTRIBUTE])
-            }
-
-            conn.unbind()
-            return user_info
-
+            user_info = self._lookup_user(username)
+            return dict(user_info) if user_info else None
         except Exception as e:
             logger.error(f"Error getting LDAP user info for {username}: {str(e)}")
             return None
 
+    async def authenticate_user_async(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        """
+        Authenticate user against LDAP server without blocking the event loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.authenticate_user, username, password)
+
+    async def get_user_info_async(self, username: str) -> Optional[Dict[str, Any]]:
+        """
+        Get user information from LDAP without blocking the event loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.get_user_info, username)
+
+    def close(self) -> None:
+        """
+        Stop the worker pool and close pooled connections
+        """
+        self._executor.shutdown(wait=False)
+        self.search_pool.close()
+        self.auth_pool.close()
+
 
-# Global LDAP authenticator instance
-ldap_authenticator = LDAPAuthenticator()
+# Global LDAP authenticator instance, built on first use
+ldap_authenticator = lazy_service("ldap_authenticator", LDAPAuthenticator, on_shutdown=LDAPAuthenticator.close)
 
 
 async def authenticate_with_ldap(username: str, password: str, db: Session) -> Optional[User]:
@@ -144,28 +285,36 @@ async def authenticate_with_ldap(username: str, password: str, db: Session) -> O
     Authenticate user with LDAP and sync with local database
     """
     # Try LDAP authentication first
-    ldap_user = ldap_authenticator.authenticate_user(username, password)
+    ldap_user = await ldap_authenticator.authenticate_user_async(username, password)
 
     if ldap_user:
         # LDAP authentication successful, sync with local database
-        user = sync_ldap_user_to_db(ldap_user, db)
+        user = await sync_ldap_user_to_db(ldap_user, db)
         return user
 
     return None
 
 
-def sync_ldap_user_to_db(ldap_user: Dict[str, Any], db: Session) -> User:
+async def sync_ldap_user_to_db(ldap_user: Dict[str, Any], db: Session) -> User:
     """
     Sync LDAP user information to local database
     """
+    first_name = ldap_user["display_name"].split()[0] if ldap_user["display_name"] else ""
+    last_name = " ".join(ldap_user["display_name"].split()[1:]) if ldap_user["display_name"] else ""
+    email = ldap_user["email"] or f"{ldap_user['username']}@local"
+
     # Check if user already exists
     user = db.query(User).filter(User.username == ldap_user["username"]).first()
 
     if user:
+        # Nothing to write when the directory attributes have not changed
+        if (user.first_name, user.last_name, user.email) == (first_name, last_name, email):
+            return user
+
         # Update existing user with latest LDAP info
-        user.first_name = ldap_user["display_name"].split()[0] if ldap_user["display_name"] else ""
-        user.last_name = " ".join(ldap_user["display_name"].split()[1:]) if ldap_user["display_name"] else ""
-        user.email = ldap_user["email"] or f"{ldap_user['username']}@local"
+        user.first_name = first_name
+        user.last_name = last_name
+        user.email = email
         user.updated_at = datetime.utcnow()
     else:
         # Get or create default organization
@@ -182,13 +331,13 @@ def sync_ldap_user_to_db(ldap_user: Dict[str, Any], db: Session) -> User:
             db.refresh(org)
 
         # Create new user
-        hashed_password = get_password_hash("ldap_user")  # Placeholder password for LDAP users
+        hashed_password = await get_password_hash_async("ldap_user")  # Placeholder password for LDAP users
         user = User(
             username=ldap_user["username"],
-            email=ldap_user["email"] or f"{ldap_user['username']}@local",
+            email=email,
             password_hash=hashed_password,
-            first_name=ldap_user["display_name"].split()[0] if ldap_user["display_name"] else "",
-            last_name=" ".join(ldap_user["display_name"].split()[1:]) if ldap_user["display_name"] else "",
+            first_name=first_name,
+            last_name=last_name,
             organization_id=org.id,
             role="user",
             is_active=True,
@@ -5,7 +5,7 @@ FastAPI routes for user authentication, registration, and management
 
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Form
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Form, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr, Field, validator
 import structlog
@@ -81,8 +81,13 @@ class TwoFactorVerifyRequest(BaseModel):
     code: str = Field(..., min_length=6, max_length=6, description="6-digit verification code")
 
 # Dependencies
-def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> User:
     """Get current authenticated user"""
+    # Stacked dependencies within one request share the resolved principal
+    memo = getattr(request.state, "principal", None)
+    if memo and memo[0] == token:
+        return memo[1]
+
     payload = auth_service.verify_token(token, "access")
 
     if not payload:
@@ -93,7 +98,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         )
 
     user_id = payload.get("sub")
-    user = auth_service.get_user_by_id(user_id)
+    user = auth_service.get_principal(user_id)
 
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
@@ -101,6 +106,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     if user.account_status != "active":
         raise HTTPException(status_code=401, detail="Account is not active")
 
+    request.state.principal = (token, user)
     return user
 
 def require_permission(permission: Permission):
@@ -140,7 +146,7 @@ async def register_user(user_data: UserCreateRequest, background_tasks: Backgrou
             raise HTTPException(status_code=400, detail="Username already taken")
 
         # Create user
-        user = auth_service.create_user(user_data.dict())
+        user = await auth_service.create_user(user_data.dict())
 
         if not user:
             raise HTTPException(status_code=500, detail="Failed to create user")
@@ -172,7 +178,7 @@ async def login_user(credentials: OAuth2PasswordRequestForm = Depends()):
             "ip": "unknown"  # This would be obtained from request headers
         }
 
-        result = auth_service.authenticate_user(
+        result = await auth_service.authenticate_user(
             credentials.username,  # email
             credentials.password,
             device_info
@@ -310,14 +316,14 @@ async def change_password(
     try:
         # Verify current password
         security_data = current_user.__dict__.get("security", {})
-        if not auth_service.verify_password(
+        if not await auth_service.verify_password(
             password_data.current_password,
             security_data.get("password_hash", "")
         ):
             raise HTTPException(status_code=400, detail="Current password is incorrect")
 
         # Hash new password
-        new_hash = auth_service.hash_password(password_data.new_password)
+        new_hash = await auth_service.hash_password(password_data.new_password)
 
         # Update password in database
         success = update_user_password(current_user.id, new_hash)
@@ -456,6 +462,7 @@ def update_user_in_db(user_id: str, update_data: Dict[str, Any]) -> bool:
     """Update user in database"""
     try:
         # Implementation would update user in database
+        auth_service.invalidate_principal(user_id)
         return True
     except Exception:
         return False
@@ -10,7 +10,8 @@ from pydantic import BaseModel, Field
 import structlog
 
 from .token_service import token_service, RateLimitResult
-from .auth_service import auth_service, User, Permission
+from .auth_service import User, Permission
+from .routes import get_current_user
 
 logger = structlog.get_logger(__name__)
 
@@ -51,7 +52,7 @@ class BulkTokenOperation(BaseModel):
 # Dependencies
 def require_token_permission():
     """Require token management permission"""
-    def permission_checker(current_user: User = Depends(auth_service.get_current_user)):
+    def permission_checker(current_user: User = Depends(get_current_user)):
         if not current_user.has_permission(Permission.MANAGE_USERS):
             raise HTTPException(
                 status_code=403,
@@ -299,7 +300,7 @@ async def regenerate_api_key(
 @router.post("/validate", response_model=Dict[str, Any])
 async def validate_token(
     validation_request: TokenValidationRequest,
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Validate API token"""
     try:
@@ -416,34 +417,31 @@ async def bulk_token_operation(
 ):
     """Perform bulk operations on tokens"""
     try:
-        results = {"successful": [], "failed": []}
-
-        for token_id in bulk_data.token_ids:
-            try:
-                if operation == "revoke":
-                    success = token_service.revoke_token(token_id, current_user.id)
-                    if success:
-                        results["successful"].append(token_id)
-                    else:
-                        results["failed"].append({"id": token_id, "error": "Token not found"})
-                elif operation == "update_permissions":
-                    if bulk_data.parameters and "permissions" in bulk_data.parameters:
-                        success = token_service.update_token_permissions(
-                            token_id,
-                            bulk_data.parameters["permissions"],
-                            current_user.id
-                        )
-                        if success:
-                            results["successful"].append(token_id)
-                        else:
-                            results["failed"].append({"id": token_id, "error": "Token not found"})
-                    else:
-                        results["failed"].append({"id": token_id, "error": "Missing permissions parameter"})
-                else:
-                    results["failed"].append({"id": token_id, "error": f"Unknown operation: {operation}"})
-
-            except Exception as e:
-                results["failed"].append({"id": token_id, "error": str(e)})
+        parameters = bulk_data.parameters or {}
+
+        # Each operation is one set-based statement covering every token ID
+        if operation == "revoke":
+            outcomes = token_service.bulk_revoke_tokens(bulk_data.token_ids, current_user.id)
+        elif operation == "extend":
+            days = parameters.get("days")
+            if not isinstance(days, int) or not 1 <= days <= 3650:
+                raise HTTPException(status_code=400, detail="Parameter 'days' must be an integer between 1 and 3650")
+            outcomes = token_service.bulk_extend_tokens(bulk_data.token_ids, days, current_user.id)
+        elif operation == "update_permissions":
+            if "permissions" not in parameters:
+                raise HTTPException(status_code=400, detail="Missing permissions parameter")
+            outcomes = token_service.bulk_update_token_permissions(
+                bulk_data.token_ids,
+                parameters["permissions"],
+                current_user.id
+            )
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown operation: {operation}")
+
+        results = {
+            "successful": [token_id for token_id, error in outcomes.items() if error is None],
+            "failed": [{"id": token_id, "error": error} for token_id, error in outcomes.items() if error is not None]
+        }
 
         logger.info("Bulk token operation completed",
                    operation=operation,
@@ -459,6 +457,8 @@ async def bulk_token_operation(
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Bulk token operation failed",
                     operation=operation,
@@ -4,21 +4,51 @@ Advanced API key management and rate limiting for Fataplus platform
 """
 
 import os
+import json
 import secrets
 import hashlib
 import time
+import uuid
+import threading
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
 import redis
 import structlog
 
+from security.database_pool import get_database_pool
+from security.local_cache import TTLCache, MISSING
+from security.service_registry import lazy_service
+
 logger = structlog.get_logger(__name__)
 
+# API key lookup cache configuration
+API_KEY_CACHE_MAX_ENTRIES = int(os.getenv("API_KEY_CACHE_MAX_ENTRIES", "10000"))
+API_KEY_CACHE_TTL = float(os.getenv("API_KEY_CACHE_TTL", "60"))
+API_KEY_NEGATIVE_CACHE_TTL = float(os.getenv("API_KEY_NEGATIVE_CACHE_TTL", "10"))
+# How long a worker trusts its copy of a token's version. A key revoked or changed on another
+# worker keeps validating here for up to this long; 0 checks the version on every lookup.
+API_KEY_VERSION_CHECK_INTERVAL = float(os.getenv("API_KEY_VERSION_CHECK_INTERVAL", "5"))
+# Version keys outlive every cached lookup they guard
+API_KEY_VERSION_TTL = 24 * 3600
+
+# Usage accounting configuration
+TOKEN_USAGE_FLUSH_INTERVAL = float(os.getenv("TOKEN_USAGE_FLUSH_INTERVAL", "5"))
+
+# Expiry cleanup configuration: rows per transaction and pause between chunks
+TOKEN_CLEANUP_CHUNK_SIZE = int(os.getenv("TOKEN_CLEANUP_CHUNK_SIZE", "1000"))
+TOKEN_CLEANUP_PAUSE_SECONDS = float(os.getenv("TOKEN_CLEANUP_PAUSE_SECONDS", "0.1"))
+
+# Each token's rate limit counters are listed in a set so they can be cleared without scanning
+# the keyspace; the set outlives the longest (daily) counter window
+RATE_LIMIT_INDEX_TTL = 2 * 24 * 3600
+
+# Columns a token can be looked up by
+TOKEN_LOOKUP_COLUMNS = {"hash": "token_hash", "id": "id"}
+
 
 class TokenType(Enum):
     """API token types"""
@@ -85,6 +115,99 @@ class RateLimitResult:
     limit: int
 
 
+class TokenUsageWriteBehind:
+    """Accumulates API key usage in memory and writes it to the database in batches"""
+
+    def __init__(self, apply_batch: Callable[[List[Tuple[str, int, datetime]]], None],
+                 flush_interval: float = TOKEN_USAGE_FLUSH_INTERVAL):
+        self.apply_batch = apply_batch
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, List[Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
+
+    def record(self, token_id: str):
+        """Count one request against a token"""
+        now = datetime.now(timezone.utc)
+        with self._pending_lock:
+            entry = self._pending.get(token_id)
+            if entry:
+                entry[0] += 1
+                entry[1] = now
+            else:
+                self._pending[token_id] = [1, now]
+        self.start()
+
+    def pending(self, token_id: str) -> int:
+        """Get requests counted for a token but not yet written"""
+        with self._pending_lock:
+            entry = self._pending.get(token_id)
+            return entry[0] if entry else 0
+
+    def flush(self) -> int:
+        """Write accumulated usage, returning how many tokens were updated"""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            try:
+                self.apply_batch([(token_id, count, last_used_at)
+                                  for token_id, (count, last_used_at) in pending.items()])
+            except Exception:
+                self._requeue(pending)
+                raise
+            return len(pending)
+
+    def _requeue(self, pending: Dict[str, List[Any]]):
+        """Merge usage back after a failed write"""
+        with self._pending_lock:
+            for token_id, (count, last_used_at) in pending.items():
+                entry = self._pending.get(token_id)
+                if entry:
+                    entry[0] += count
+                    entry[1] = max(entry[1], last_used_at)
+                else:
+                    self._pending[token_id] = [count, last_used_at]
+
+    def _flush_periodically(self):
+        """Periodically flush accumulated usage"""
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Token usage flush failed", error=str(e))
+
+    def start(self):
+        """Start the background flusher if it is not running"""
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+
+        with self._start_lock:
+            if self._flush_thread is None or not self._flush_thread.is_alive():
+                self._stop_event.clear()
+                self._flush_thread = threading.Thread(
+                    target=self._flush_periodically, name="token-usage-flush", daemon=True
+                )
+                self._flush_thread.start()
+
+    def stop(self):
+        """Stop the background flusher and write out remaining usage"""
+        self._stop_event.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout=self.flush_interval + 1)
+            self._flush_thread = None
+
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Token usage flush on shutdown failed", error=str(e))
+
+
 class TokenService:
     """Advanced token authentication and rate limiting service"""
 
@@ -99,25 +222,17 @@ class TokenService:
         self.redis_prefix = "fataplus:tokens:"
 
         # Database connections
-        self.db_pool = self._init_database()
+        self.db = get_database_pool()
         self.redis_client = self._init_redis()
 
-        logger.info("Token service initialized")
+        # Per-process token lookups: (column, value) -> (token version, token); None marks an unknown token
+        self._token_cache = TTLCache(API_KEY_CACHE_MAX_ENTRIES, API_KEY_CACHE_TTL)
+        self._token_versions = TTLCache(API_KEY_CACHE_MAX_ENTRIES, API_KEY_VERSION_CHECK_INTERVAL)
 
-    def _init_database(self):
-        """Initialize database connection pool"""
-        try:
-            return psycopg2.connect(
-                host=os.getenv("DB_HOST", "localhost"),
-                port=int(os.getenv("DB_PORT", "5432")),
-                database=os.getenv("DB_NAME", "fataplus"),
-                user=os.getenv("DB_USER", "fataplus"),
-                password=os.getenv("DB_PASSWORD", ""),
-                cursor_factory=RealDictCursor
-            )
-        except Exception as e:
-            logger.error("Failed to connect to database", error=str(e))
-            raise
+        # Usage counts are written in batches instead of on every request
+        self.usage_writer = TokenUsageWriteBehind(self._apply_usage_batch)
+
+        logger.info("Token service initialized")
 
     def _init_redis(self):
         """Initialize Redis connection"""
@@ -207,8 +322,8 @@ class TokenService:
             # Hash token for lookup
             token_hash = self._hash_token(token)
 
-            # Get token from database
-            api_token = self._get_token_by_hash(token_hash)
+            # Get token from cache or database
+            api_token = self._get_cached_token("hash", token_hash)
 
             if not api_token:
                 logger.warning("Token not found", token_hash=token_hash[:8])
@@ -232,8 +347,8 @@ class TokenService:
                                      available=api_token.permissions)
                         return None
 
-            # Update last used timestamp
-            self._update_token_usage(api_token.id)
+            # Count usage; written to the database by the background flusher
+            self.usage_writer.record(api_token.id)
 
             return api_token
 
@@ -255,7 +370,7 @@ class TokenService:
 
         try:
             # Get token to check limits
-            api_token = self._get_token_by_id(token_id)
+            api_token = self._get_cached_token("id", token_id)
             if not api_token:
                 return RateLimitResult(allowed=False, remaining=0, reset_time=datetime.now(timezone.utc),
                                      current_usage=0, limit=0)
@@ -288,11 +403,15 @@ class TokenService:
                 limit=limit
             )
 
-            # Increment counter if allowed
+            # Increment counter if allowed, recording it in the token's counter index
             if allowed:
-                self.redis_client.incr(redis_key)
-                # Set expiry for the key
-                self.redis_client.expireat(redis_key, int(reset_time.timestamp()))
+                index_key = self._rate_limit_index_key(token_id)
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.incr(redis_key)
+                pipe.expireat(redis_key, int(reset_time.timestamp()))
+                pipe.sadd(index_key, redis_key)
+                pipe.expire(index_key, RATE_LIMIT_INDEX_TTL)
+                pipe.execute()
 
             return result
 
@@ -310,43 +429,93 @@ class TokenService:
     def revoke_token(self, token_id: str, revoked_by: str) -> bool:
         """Revoke API token"""
         try:
-            with self.db_pool.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE api_keys
-                    SET status = 'revoked',
-                        metadata = jsonb_set(metadata, '{revoked_by}', %s),
-                        metadata = jsonb_set(metadata, '{revoked_at}', %s),
-                        updated_at = NOW()
-                    WHERE id = %s AND status = 'active'
-                """, (
-                    json.dumps(revoked_by),
-                    json.dumps(datetime.now(timezone.utc).isoformat()),
-                    token_id
-                ))
+            return self.bulk_revoke_tokens([token_id], revoked_by)[token_id] is None
+        except Exception as e:
+            logger.error("Token revocation failed", token_id=token_id, error=str(e))
+            return False
 
-                if cursor.rowcount > 0:
-                    self.db_pool.commit()
+    def bulk_revoke_tokens(self, token_ids: List[str], revoked_by: str) -> Dict[str, Optional[str]]:
+        """Revoke many API tokens in one statement, returning an error or None per token ID"""
+        return self._bulk_update_tokens(
+            token_ids,
+            "status = 'revoked'",
+            (),
+            {"revoked_by": revoked_by, "revoked_at": datetime.now(timezone.utc).isoformat()},
+            active_only=True,
+            action="revoked",
+            actor=revoked_by
+        )
 
-                    # Clear from Redis cache
-                    self._clear_token_cache(token_id)
+    def bulk_extend_tokens(self, token_ids: List[str], days: int, extended_by: str) -> Dict[str, Optional[str]]:
+        """Push back the expiry of many active API tokens in one statement"""
+        return self._bulk_update_tokens(
+            token_ids,
+            "expires_at = GREATEST(COALESCE(expires_at, NOW()), NOW()) + make_interval(days => %s)",
+            (int(days),),
+            {"extended_by": extended_by, "extended_at": datetime.now(timezone.utc).isoformat()},
+            active_only=True,
+            action="extended",
+            actor=extended_by
+        )
 
-                    logger.info("Token revoked",
-                               token_id=token_id,
-                               revoked_by=revoked_by)
+    def bulk_update_token_permissions(self, token_ids: List[str], permissions: List[str],
+                                      updated_by: str) -> Dict[str, Optional[str]]:
+        """Replace the permissions of many API tokens in one statement"""
+        return self._bulk_update_tokens(
+            token_ids,
+            "permissions = %s",
+            (json.dumps(permissions),),
+            {"updated_by": updated_by, "permissions_updated_at": datetime.now(timezone.utc).isoformat()},
+            active_only=False,
+            action="permissions updated",
+            actor=updated_by
+        )
 
-                    return True
+    def _bulk_update_tokens(self, token_ids: List[str], assignment: str, params: Tuple,
+                            metadata: Dict[str, Any], active_only: bool, action: str,
+                            actor: str) -> Dict[str, Optional[str]]:
+        """Apply one UPDATE to a set of tokens in a single transaction, reporting the outcome per ID"""
+        results: Dict[str, Optional[str]] = {}
+        valid_ids = []
+        for token_id in dict.fromkeys(token_ids):
+            try:
+                valid_ids.append(str(uuid.UUID(str(token_id))))
+                results[token_id] = None
+            except ValueError:
+                results[token_id] = "Invalid token ID"
+
+        if not valid_ids:
+            return results
+
+        with self.db.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE api_keys
+                SET {assignment},
+                    metadata = COALESCE(metadata, '{{}}'::jsonb) || %s::jsonb,
+                    updated_at = NOW()
+                WHERE id = ANY(%s::uuid[]){" AND status = 'active'" if active_only else ""}
+                RETURNING id
+            """, (*params, json.dumps(metadata), valid_ids))
+            updated = {str(row["id"]) for row in cursor.fetchall()}
 
-                return False
+        for token_id, error in results.items():
+            if error is None and str(uuid.UUID(str(token_id))) not in updated:
+                results[token_id] = "Token not found" if not active_only else "Token not found or not active"
 
-        except Exception as e:
-            logger.error("Token revocation failed", token_id=token_id, error=str(e))
-            self.db_pool.rollback()
-            return False
+        if updated:
+            # Clear rate limit counters of revoked tokens and drop cached lookups
+            if action == "revoked":
+                self._clear_rate_limits(list(updated))
+            self.invalidate_token_cache(updated)
+
+            logger.info(f"Tokens {action}", count=len(updated), actor=actor)
+
+        return results
 
     def list_user_tokens(self, user_id: str) -> List[Dict[str, Any]]:
         """List all tokens for a user"""
         try:
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("""
                     SELECT id, name, token_type, permissions, rate_limits,
                            usage_stats, status, expires_at, last_used_at,
@@ -380,39 +549,9 @@ class TokenService:
                                 updated_by: str) -> bool:
         """Update token permissions"""
         try:
-            with self.db_pool.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE api_keys
-                    SET permissions = %s,
-                        metadata = jsonb_set(metadata, '{updated_by}', %s),
-                        metadata = jsonb_set(metadata, '{permissions_updated_at}', %s),
-                        updated_at = NOW()
-                    WHERE id = %s
-                """, (
-                    json.dumps(permissions),
-                    json.dumps(updated_by),
-                    json.dumps(datetime.now(timezone.utc).isoformat()),
-                    token_id
-                ))
-
-                if cursor.rowcount > 0:
-                    self.db_pool.commit()
-
-                    # Clear cache
-                    self._clear_token_cache(token_id)
-
-                    logger.info("Token permissions updated",
-                               token_id=token_id,
-                               permissions=permissions,
-                               updated_by=updated_by)
-
-                    return True
-
-                return False
-
+            return self.bulk_update_token_permissions([token_id], permissions, updated_by)[token_id] is None
         except Exception as e:
             logger.error("Token permissions update failed", token_id=token_id, error=str(e))
-            self.db_pool.rollback()
             return False
 
     def regenerate_token(self, token_id: str, regenerated_by: str) -> Optional[Dict[str, Any]]:
@@ -428,26 +567,28 @@ class TokenService:
             new_token_hash = self._hash_token(new_token)
 
             # Update in database
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("""
                     UPDATE api_keys
                     SET token_hash = %s,
-                        metadata = jsonb_set(metadata, '{regenerated_by}', %s),
-                        metadata = jsonb_set(metadata, '{regenerated_at}', %s),
+                        metadata = COALESCE(metadata, '{}'::jsonb) || %s::jsonb,
                         updated_at = NOW()
                     WHERE id = %s
                 """, (
                     new_token_hash,
-                    json.dumps(regenerated_by),
-                    json.dumps(datetime.now(timezone.utc).isoformat()),
+                    json.dumps({
+                        "regenerated_by": regenerated_by,
+                        "regenerated_at": datetime.now(timezone.utc).isoformat()
+                    }),
                     token_id
                 ))
 
                 if cursor.rowcount > 0:
-                    self.db_pool.commit()
+                    cursor.connection.commit()
 
-                    # Clear cache
-                    self._clear_token_cache(token_id)
+                    # Clear cache so the old token value stops validating everywhere
+                    self._clear_rate_limits([token_id])
+                    self.invalidate_token_cache([token_id])
 
                     logger.info("Token regenerated",
                                token_id=token_id,
@@ -463,7 +604,6 @@ class TokenService:
 
         except Exception as e:
             logger.error("Token regeneration failed", token_id=token_id, error=str(e))
-            self.db_pool.rollback()
             return None
 
     def get_token_usage_stats(self, token_id: str) -> Optional[Dict[str, Any]]:
@@ -475,6 +615,7 @@ class TokenService:
 
             # Get real-time usage from Redis
             realtime_stats = self._get_realtime_usage_stats(token_id)
+            realtime_stats["pending_requests"] = self.usage_writer.pending(token_id)
 
             return {
                 "token_id": token_id,
@@ -490,31 +631,42 @@ class TokenService:
             logger.error("Usage stats retrieval failed", token_id=token_id, error=str(e))
             return None
 
-    def cleanup_expired_tokens(self) -> int:
+    def cleanup_expired_tokens(self, chunk_size: int = TOKEN_CLEANUP_CHUNK_SIZE,
+                               pause_seconds: float = TOKEN_CLEANUP_PAUSE_SECONDS) -> int:
         """Clean up expired tokens (should be run periodically)"""
+        expired_count = 0
         try:
-            with self.db_pool.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE api_keys
-                    SET status = 'expired',
-                        metadata = jsonb_set(metadata, '{expired_at}', %s)
-                    WHERE status = 'active'
-                      AND expires_at IS NOT NULL
-                      AND expires_at < NOW()
-                """, (json.dumps(datetime.now(timezone.utc).isoformat()),))
+            while True:
+                # Each chunk is its own short transaction so row locks are held briefly
+                with self.db.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE api_keys
+                        SET status = 'expired',
+                            metadata = COALESCE(metadata, '{}'::jsonb) || jsonb_build_object('expired_at', %s::text)
+                        WHERE id IN (
+                            SELECT id FROM api_keys
+                            WHERE status = 'active'
+                              AND expires_at IS NOT NULL
+                              AND expires_at < NOW()
+                            LIMIT %s
+                            FOR UPDATE SKIP LOCKED
+                        )
+                    """, (datetime.now(timezone.utc).isoformat(), chunk_size))
+                    chunk_count = cursor.rowcount
+
+                expired_count += chunk_count
+                if chunk_count < chunk_size:
+                    break
+                time.sleep(pause_seconds)
 
-                expired_count = cursor.rowcount
-                self.db_pool.commit()
-
-                if expired_count > 0:
-                    logger.info("Expired tokens cleaned up", count=expired_count)
+        except Exception as e:
+            logger.error("Expired token cleanup failed", expired=expired_count, error=str(e))
 
-                return expired_count
+        # Cached copies need no invalidation: is_active() already rejects them once expires_at passes
+        if expired_count > 0:
+            logger.info("Expired tokens cleaned up", count=expired_count)
 
-        except Exception as e:
-            logger.error("Expired token cleanup failed", error=str(e))
-            self.db_pool.rollback()
-            return 0
+        return expired_count
 
     def _hash_token(self, token: str) -> str:
         """Hash token for secure storage"""
@@ -523,7 +675,7 @@ class TokenService:
     def _save_token_to_db(self, token_data: Dict[str, Any]) -> Optional[APIToken]:
         """Save token to database"""
         try:
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO api_keys (
                         id, token_hash, token_type, user_id, organization_id,
@@ -550,7 +702,7 @@ class TokenService:
                 ))
 
                 result = cursor.fetchone()
-                self.db_pool.commit()
+                cursor.connection.commit()
 
                 # Create APIToken object
                 return APIToken(
@@ -573,23 +725,24 @@ class TokenService:
 
         except Exception as e:
             logger.error("Token save to DB failed", error=str(e))
-            self.db_pool.rollback()
             return None
 
-    def _get_token_by_hash(self, token_hash: str) -> Optional[APIToken]:
-        """Get token by hash from database"""
-        try:
-            with self.db_pool.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM api_keys WHERE token_hash = %s
-                """, (token_hash,))
+    def _query_token(self, lookup: str, value: str) -> Optional[APIToken]:
+        """Get token by hash or ID from database, raising on database errors"""
+        column = TOKEN_LOOKUP_COLUMNS[lookup]
+        with self.db.cursor() as cursor:
+            cursor.execute(f"SELECT * FROM api_keys WHERE {column} = %s", (value,))
 
-                result = cursor.fetchone()
-                if result:
-                    return self._row_to_api_token(result)
+            result = cursor.fetchone()
+            if result:
+                return self._row_to_api_token(result)
 
-                return None
+            return None
 
+    def _get_token_by_hash(self, token_hash: str) -> Optional[APIToken]:
+        """Get token by hash from database"""
+        try:
+            return self._query_token("hash", token_hash)
         except Exception as e:
             logger.error("Token retrieval by hash failed", error=str(e))
             return None
@@ -597,21 +750,72 @@ class TokenService:
     def _get_token_by_id(self, token_id: str) -> Optional[APIToken]:
         """Get token by ID from database"""
         try:
-            with self.db_pool.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM api_keys WHERE id = %s
-                """, (token_id,))
-
-                result = cursor.fetchone()
-                if result:
-                    return self._row_to_api_token(result)
+            return self._query_token("id", token_id)
+        except Exception as e:
+            logger.error("Token retrieval by ID failed", token_id=token_id, error=str(e))
+            return None
 
-                return None
+    def _get_cached_token(self, lookup: str, value: str) -> Optional[APIToken]:
+        """Get token by hash or ID, served from the per-process cache while the token's version is current"""
+        entry = self._token_cache.get((lookup, value))
+        if entry is not MISSING:
+            version, api_token = entry
+            if api_token is None or version == self._get_token_version(api_token.id):
+                return api_token
 
+        try:
+            api_token = self._query_token(lookup, value)
         except Exception as e:
-            logger.error("Token retrieval by ID failed", token_id=token_id, error=str(e))
+            # Database errors are not cached
+            logger.error("Token retrieval failed", lookup=lookup, error=str(e))
             return None
 
+        # Unknown tokens are remembered briefly so repeated bad keys do not reach the database
+        if api_token:
+            self._token_cache.set((lookup, value), (self._get_token_version(api_token.id), api_token))
+        else:
+            self._token_cache.set((lookup, value), (None, None), ttl=API_KEY_NEGATIVE_CACHE_TTL)
+        return api_token
+
+    def invalidate_token_cache(self, token_ids: Iterable[str]):
+        """Drop cached lookups of tokens after a revoke, regeneration or update"""
+        token_ids = [str(token_id) for token_id in token_ids]
+        if not self.redis_client:
+            # Without shared versions only a full local clear is reliable
+            self._token_cache.clear()
+            return
+
+        for token_id in token_ids:
+            self._token_versions.pop(token_id)
+        try:
+            # Other workers see the new versions on their next check of each token
+            pipe = self.redis_client.pipeline()
+            for token_id in token_ids:
+                pipe.incr(self._token_version_key(token_id))
+                pipe.expire(self._token_version_key(token_id), API_KEY_VERSION_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.error("Failed to bump token cache versions", count=len(token_ids), error=str(e))
+            self._token_cache.clear()
+
+    def _token_version_key(self, token_id: str) -> str:
+        return f"{self.redis_prefix}cache_version:{token_id}"
+
+    def _get_token_version(self, token_id) -> int:
+        """Get a token's shared cache version, rechecked every few seconds"""
+        token_id = str(token_id)
+        version = self._token_versions.get(token_id)
+        if version is MISSING:
+            version = 0
+            if self.redis_client:
+                try:
+                    version = int(self.redis_client.get(self._token_version_key(token_id)) or 0)
+                except Exception:
+                    # Without a shared version the local TTL bounds staleness
+                    pass
+            self._token_versions.set(token_id, version)
+        return version
+
     def _row_to_api_token(self, row: Dict[str, Any]) -> APIToken:
         """Convert database row to APIToken"""
         return APIToken(
@@ -632,29 +836,25 @@ class TokenService:
             updated_at=row["updated_at"]
         )
 
-    def _update_token_usage(self, token_id: str):
-        """Update token usage statistics"""
-        try:
-            with self.db_pool.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE api_keys
-                    SET usage_stats = jsonb_set(
-                        jsonb_set(usage_stats, '{last_request}', %s),
+    def _apply_usage_batch(self, batch: List[Tuple[str, int, datetime]]):
+        """Add accumulated request counts and last-used times in one statement"""
+        with self.db.cursor() as cursor:
+            execute_values(cursor, """
+                UPDATE api_keys AS k
+                SET usage_stats = jsonb_set(
+                        jsonb_set(k.usage_stats, '{last_request}', to_jsonb(v.last_used_at)),
                         '{total_requests}',
-                        (COALESCE(usage_stats->>'total_requests', '0')::int + 1)::text
+                        to_jsonb(COALESCE((k.usage_stats->>'total_requests')::bigint, 0) + v.requests)
                     ),
-                    last_used_at = NOW(),
+                    last_used_at = GREATEST(k.last_used_at, v.last_used_at),
                     updated_at = NOW()
-                    WHERE id = %s
-                """, (
-                    json.dumps(datetime.now(timezone.utc).isoformat()),
-                    token_id
-                ))
-
-                self.db_pool.commit()
+                FROM (VALUES %s) AS v(id, requests, last_used_at)
+                WHERE k.id = v.id::uuid
+            """, batch, template="(%s, %s::bigint, %s::timestamptz)")
 
-        except Exception as e:
-            logger.error("Token usage update failed", token_id=token_id, error=str(e))
+    def close(self):
+        """Write out pending usage"""
+        self.usage_writer.stop()
 
     def _get_default_rate_limits(self) -> Dict[str, Any]:
         """Get default rate limits"""
@@ -710,29 +910,15 @@ class TokenService:
             return {}
 
         try:
-            # Get various time windows
-            keys = [
-                f"{self.redis_prefix}ratelimit:{token_id}:*:1m",
-                f"{self.redis_prefix}ratelimit:{token_id}:*:1h",
-                f"{self.redis_prefix}ratelimit:{token_id}:*:1d"
-            ]
-
-            stats = {"current_minute": 0, "current_hour": 0, "current_day": 0}
-
-            for pattern in keys:
-                matching_keys = self.redis_client.keys(pattern)
-                total = 0
-                for key in matching_keys:
-                    value = self.redis_client.get(key)
-                    if value:
-                        total += int(value)
-
-                if "1m" in pattern:
-                    stats["current_minute"] = total
-                elif "1h" in pattern:
-                    stats["current_hour"] = total
-                elif "1d" in pattern:
-                    stats["current_day"] = total
+            windows = {"1m": "current_minute", "1h": "current_hour", "1d": "current_day"}
+            stats = {stat: 0 for stat in windows.values()}
+
+            keys = sorted(self.redis_client.smembers(self._rate_limit_index_key(token_id)))
+            values = self.redis_client.mget(keys) if keys else []
+            for key, value in zip(keys, values):
+                stat = windows.get(key.rsplit(":", 1)[-1])
+                if stat and value:
+                    stats[stat] += int(value)
 
             return stats
 
@@ -740,21 +926,26 @@ class TokenService:
             logger.error("Real-time stats retrieval failed", token_id=token_id, error=str(e))
             return {}
 
-    def _clear_token_cache(self, token_id: str):
-        """Clear token-related caches"""
-        if self.redis_client:
-            try:
-                # Clear rate limit keys for this token
-                pattern = f"{self.redis_prefix}ratelimit:{token_id}:*"
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    self.redis_client.delete(*keys)
+    def _rate_limit_index_key(self, token_id: str) -> str:
+        return f"{self.redis_prefix}ratelimit_keys:{token_id}"
+
+    def _clear_rate_limits(self, token_ids: List[str]):
+        """Delete the rate limit counters of tokens in two round trips, however many tokens there are"""
+        if not self.redis_client or not token_ids:
+            return
+        try:
+            index_keys = [self._rate_limit_index_key(token_id) for token_id in token_ids]
+            pipe = self.redis_client.pipeline(transaction=False)
+            for index_key in index_keys:
+                pipe.smembers(index_key)
+            counter_keys = [key for members in pipe.execute() for key in members]
+            self.redis_client.unlink(*counter_keys, *index_keys)
 
-                logger.info("Token cache cleared", token_id=token_id)
+            logger.info("Token rate limits cleared", tokens=len(token_ids), counters=len(counter_keys))
 
-            except Exception as e:
-                logger.error("Token cache clear failed", token_id=token_id, error=str(e))
+        except Exception as e:
+            logger.error("Token rate limit clear failed", tokens=len(token_ids), error=str(e))
 
 
-# Global token service instance
-token_service = TokenService()
+# Global token service instance, built on first use
+token_service = lazy_service("token_service", TokenService, on_shutdown=TokenService.close)
@@ -4,20 +4,108 @@ Comprehensive agricultural knowledge base management with AI-powered features
 """
 
 import os
+import base64
 import json
 import uuid
+import hashlib
+import threading
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import redis
 import structlog
 
+from security.database_pool import get_database_pool
+from security.local_cache import MISSING, TTLCache
+from security.service_registry import lazy_service
+from .search_index import BM25Index, document_fields
+from .taxonomy import TaxonomyTree
+from .vector_index import (
+    DEFAULT_EMBEDDING_MODEL, IVF_MIN_ROWS, ContextEmbedder, EmbeddingQueue, VectorIndex,
+    acquire_writer_lock, fuse_scores
+)
+
 logger = structlog.get_logger(__name__)
 
+# Text search configuration per content language; Postgres has no Swahili or Malagasy stemmer
+SEARCH_CONFIGS = {
+    "en": "english",
+    "fr": "french",
+    "sw": "simple",
+    "pt": "portuguese",
+    "ar": "arabic",
+    "mg": "simple",
+}
+
+# ts_rank_cd weights for the D, C (details), B (tags, summary) and A (title) labels
+SEARCH_RANK_WEIGHTS = "{0.1, 0.3, 0.6, 1.0}"
+
+SEARCH_HIGHLIGHT_START = "<mark>"
+SEARCH_FRAGMENT_DELIMITER = " ... "
+SEARCH_HEADLINE_OPTIONS = (
+    f"StartSel={SEARCH_HIGHLIGHT_START}, StopSel=</mark>, MaxWords=35, MinWords=15, "
+    f"MaxFragments=2, FragmentDelimiter=\"{SEARCH_FRAGMENT_DELIMITER}\""
+)
+
+# Search backends of search_contexts: Postgres full-text search, the in-process BM25 index,
+# embedding similarity, or BM25 and embedding scores fused
+SEARCH_MODES = ("fulltext", "bm25", "semantic", "hybrid")
+
+# Candidates fetched per requested result when results are filtered or fused afterwards
+SEARCH_CANDIDATE_FACTOR = 4
+
+# Context cache: one hash per context with the full document and per-language projections as fields
+CONTEXT_CACHE_PREFIX = "context"
+CONTEXT_CACHE_ALL_LANGUAGES = "*"
+CONTEXT_LANGUAGES = frozenset(SEARCH_CONFIGS)
+
+# Search result cache; keys embed a generation counter bumped on every context change
+SEARCH_CACHE_PREFIX = "context:search"
+SEARCH_GENERATION_KEY = "context:search:generation"
+SEARCH_CACHE_LOCAL_MAX_ENTRIES = 2048
+SEARCH_CACHE_LOCAL_TTL = 30
+
+# Taxonomy tree cache, reloaded when the shared generation moves, and at the latest after
+# TAXONOMY_MAX_AGE seconds so edits made directly in the database show up too
+TAXONOMY_GENERATION_KEY = "context:taxonomy:generation"
+TAXONOMY_GENERATION_CHECK_INTERVAL = 5
+TAXONOMY_MAX_AGE = 300
+
+# Search vector columns and stats rollups come from migrations 003 and 005, which are skipped
+# when contexts does not exist yet; until they are applied the queries fall back to scans
+SCHEMA_CHECK_INTERVAL = 300
+
+# Statistics are read from the rollup tables maintained by triggers on contexts
+CONTEXT_STATS_ACTIVITY_DAYS = 30
+
+# Published contexts read per batch when building the search indexes
+SEARCH_INDEX_BATCH_SIZE = 1000
+
+# Seconds between checks for context changes made by other workers
+SEARCH_INDEX_CATCH_UP_INTERVAL = 5
+
+# updated_at comes from the writer's clock at statement time, not commit order, so a transaction
+# that commits late can land behind a watermark; catch-ups re-scan this many seconds behind it
+SEARCH_INDEX_CATCH_UP_OVERLAP = 300
+
+# Context table columns, excluding the per-language search vectors
+CONTEXT_COLUMNS = (
+    "id, domain, topic, subtopic, title, content, metadata, status, author, reviewer, "
+    "tags, related_contexts, quality_score, created_at, updated_at, published_at"
+)
+
+# Listings leave out the content JSON unless asked for it
+CONTEXT_LIST_COLUMNS = (
+    "id, domain, topic, subtopic, title, metadata, status, author, reviewer, "
+    "tags, related_contexts, quality_score, created_at, updated_at, published_at"
+)
+
+# Listing sort fields, each a non-null column paired with id for keyset pagination
+LIST_SORT_FIELDS = ("updated_at", "created_at", "quality_score")
+LIST_SORT_ORDERS = {"asc": ">", "desc": "<"}
+
 
 class ContentType(Enum):
     """Types of agricultural content"""
@@ -100,6 +188,9 @@ class TaxonomyNode:
     description: Dict[str, str]
     children: List[str] = None
     content_count: int = 0
+    slug: Optional[str] = None
+    path: Optional[str] = None  # Materialised path of ancestor ids, e.g. "/root/parent/node/"
+    subtree_count: int = 0
 
     def __post_init__(self):
         if self.children is None:
@@ -120,7 +211,7 @@ class ContextManager:
 
     def __init__(self):
         # Database connections
-        self.db_pool = self._init_database()
+        self.db = get_database_pool()
         self.redis_client = self._init_redis()
 
         # Configuration
@@ -130,23 +221,50 @@ class ContextManager:
 
         # Cache configuration
         self.cache_ttl = int(os.getenv("CACHE_TTL", "3600"))  # 1 hour
+        self.search_cache_ttl = int(os.getenv("SEARCH_CACHE_TTL", "300"))
+        self._search_results = TTLCache(SEARCH_CACHE_LOCAL_MAX_ENTRIES, SEARCH_CACHE_LOCAL_TTL)
+        self._stats = TTLCache(1, int(os.getenv("CONTEXT_STATS_TTL", "30")))
+        self._table_columns = TTLCache(16, SCHEMA_CHECK_INTERVAL)
+        self._schema_warnings = set()
+
+        # Taxonomy tree, loaded on first use
+        self._taxonomy: Optional[Tuple[int, TaxonomyTree]] = None
+        self._taxonomy_generation = TTLCache(1, TAXONOMY_GENERATION_CHECK_INTERVAL)
+        self._taxonomy_loaded = TTLCache(1, int(os.getenv("CONTEXT_TAXONOMY_MAX_AGE", str(TAXONOMY_MAX_AGE))))
+        self._taxonomy_lock = threading.Lock()
+
+        # Search configuration; the BM25 index is built on first use
+        self.search_mode = os.getenv("CONTEXT_SEARCH_MODE", "fulltext")
+        self.search_index_snapshot = os.getenv("CONTEXT_SEARCH_INDEX_SNAPSHOT", "")
+        self._search_index: Optional[BM25Index] = None
+        self._search_index_lock = threading.Lock()
+        self._search_index_generation: Optional[str] = None
+        self._search_index_checked = TTLCache(1, SEARCH_INDEX_CATCH_UP_INTERVAL)
+        # Versions applied inside the catch-up overlap, so re-scanned rows are not applied twice
+        self._search_index_applied: Dict[str, Optional[datetime]] = {}
+        self.catch_up_overlap = timedelta(
+            seconds=int(os.getenv("CONTEXT_SEARCH_CATCH_UP_OVERLAP", str(SEARCH_INDEX_CATCH_UP_OVERLAP)))
+        )
 
-        logger.info("Context manager initialized")
+        # Semantic search configuration; the vector index is built in the background, and only
+        # the worker holding the index directory's writer lock embeds contexts into it
+        self.vector_index_dir = os.getenv("CONTEXT_VECTOR_INDEX_DIR", "")
+        self.vector_dtype = os.getenv("CONTEXT_VECTOR_DTYPE", "float32")
+        self.hybrid_alpha = float(os.getenv("CONTEXT_HYBRID_ALPHA", "0.5"))
+        self._embedder = ContextEmbedder(os.getenv("CONTEXT_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL))
+        self._vector_index: Optional[VectorIndex] = None
+        self._embedding_queue: Optional[EmbeddingQueue] = None
+        self._vector_index_lock = threading.Lock()
+        self._vector_index_build: Optional[threading.Thread] = None
+        self._vector_index_writer = None
+        self._vector_index_generation: Optional[str] = None
+        self._vector_index_checked = TTLCache(1, SEARCH_INDEX_CATCH_UP_INTERVAL)
+        self._vector_index_applied: Dict[str, Optional[datetime]] = {}
+
+        if self.search_mode in ("semantic", "hybrid"):
+            self._start_vector_index_build()
 
-    def _init_database(self):
-        """Initialize database connection pool"""
-        try:
-            return psycopg2.connect(
-                host=os.getenv("DB_HOST", "localhost"),
-                port=int(os.getenv("DB_PORT", "5432")),
-                database=os.getenv("DB_NAME", "fataplus"),
-                user=os.getenv("DB_USER", "fataplus"),
-                password=os.getenv("DB_PASSWORD", ""),
-                cursor_factory=RealDictCursor
-            )
-        except Exception as e:
-            logger.error("Failed to connect to database", error=str(e))
-            raise
+        logger.info("Context manager initialized")
 
     def _init_redis(self):
         """Initialize Redis connection"""
@@ -191,7 +309,7 @@ class ContextManager:
             )
 
             # Save to database
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO contexts (
                         id, domain, topic, subtopic, title, content, metadata,
@@ -217,10 +335,11 @@ class ContextManager:
                     context.published_at
                 ))
 
-                self.db_pool.commit()
+                cursor.connection.commit()
 
             # Clear related caches
             self._clear_context_cache(context_id)
+            self._bump_search_generation(context.domain.value)
 
             logger.info("Context created", context_id=context_id, author=author)
 
@@ -228,13 +347,12 @@ class ContextManager:
 
         except Exception as e:
             logger.error("Failed to create context", author=author, error=str(e))
-            self.db_pool.rollback()
             return None
 
     def update_context(self, context_id: str, updates: Dict[str, Any], updated_by: str) -> bool:
         """Update context document"""
         try:
-            with self.db_pool.cursor() as cursor:
+            with self.db.cursor() as cursor:
                 # Build update query dynamically
                 update_fields = []
                 update_values = []
@@ -265,15 +383,21 @@ class ContextManager:
                     UPDATE contexts
                     SET {', '.join(update_fields)}
                     WHERE id = %s
+                    RETURNING domain
                 """
 
                 cursor.execute(query, update_values)
+                updated = cursor.fetchone()
 
-                if cursor.rowcount > 0:
-                    self.db_pool.commit()
+                if updated:
+                    cursor.connection.commit()
 
-                    # Clear cache
+                    # Clear cache; moving a context between domains affects every domain's searches
                     self._clear_context_cache(context_id)
+                    self._bump_search_generation(
+                        updated["domain"], *([domain.value for domain in Domain] if "domain" in updates else [])
+                    )
+                    self._sync_search_index(context_id)
 
                     # Log the update
                     logger.info("Context updated",
@@ -290,29 +414,30 @@ class ContextManager:
                         context_id=context_id,
                         updated_by=updated_by,
                         error=str(e))
-            self.db_pool.rollback()
             return False
 
     def get_context(self, context_id: str, language: str = None) -> Optional[ContextDocument]:
-        """Get context document by ID"""
+        """Get context document by ID, projected to one language when a language is given"""
         try:
             # Check cache first
-            cache_key = f"context:{context_id}:{language or self.default_language}"
-            cached = self._get_cached_context(cache_key)
+            field = language or CONTEXT_CACHE_ALL_LANGUAGES
+            cached = self._get_cached_context(context_id, field)
             if cached:
                 return cached
 
-            with self.db_pool.cursor() as cursor:
-                cursor.execute("SELECT * FROM contexts WHERE id = %s", (context_id,))
+            with self.db.cursor() as cursor:
+                cursor.execute(f"SELECT {CONTEXT_COLUMNS} FROM contexts WHERE id = %s", (context_id,))
                 result = cursor.fetchone()
 
                 if not result:
                     return None
 
                 context = self._row_to_context_document(result)
+                if language:
+                    context = self._project_context(context, language)
 
                 # Cache the result
-                self._cache_context(cache_key, context)
+                self._cache_context(context_id, field, context)
 
                 return context
 
@@ -321,91 +446,486 @@ class ContextManager:
             return None
 
     def search_contexts(self, query: str, filters: Dict[str, Any] = None,
-                       language: str = None, limit: int = 20) -> List[SearchResult]:
-        """Advanced context search with relevance scoring"""
+                       language: str = None, limit: int = 20, mode: str = None) -> List[SearchResult]:
+        """Search published contexts with the configured or requested backend"""
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+
+        filters = filters or {}
+        lang = language if language in SEARCH_CONFIGS else self.default_language
+
+        cache_key = self._search_cache_key(query, filters, lang, limit, mode)
+        cached = self._get_cached_search(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            if not filters:
-                filters = {}
+            # Listing without a query is always served by the database
+            if not (query and query.strip()) or mode == "fulltext":
+                results = self._search_fulltext(query, filters, lang, limit)
+            elif mode == "semantic":
+                results = self._search_semantic(query, filters, lang, limit)
+            elif mode == "hybrid":
+                results = self._search_hybrid(query, filters, lang, limit)
+            else:
+                results = self._search_bm25(query, filters, lang, limit)
+        except Exception as e:
+            logger.error("Context search failed", query=query, mode=mode, error=str(e))
+            return []
 
-            # Build search query
-            search_conditions = []
-            search_params = []
+        self._cache_search(cache_key, results)
+        return results
+
+    def _search_fulltext(self, query: str, filters: Dict[str, Any],
+                         language: Optional[str], limit: int) -> List[SearchResult]:
+        """Full-text context search ranked by weighted title, tag, summary and detail matches"""
+        lang = language if language in SEARCH_CONFIGS else self.default_language
+        config = SEARCH_CONFIGS.get(lang, "simple")
+        search_column = f"search_{lang}" if lang in SEARCH_CONFIGS else "search_en"
+        if search_column not in self._get_table_columns("contexts"):
+            self._warn_schema(search_column, "Search vector column missing, computing vectors per query")
+            search_column = self._search_vector_expression(config, lang)
+
+        search_conditions = ["status = 'published'"]
+        search_params = []
+
+        # Apply filters
+        if "domain" in filters:
+            search_conditions.append("domain = %s")
+            search_params.append(filters["domain"])
+
+        if "topic" in filters:
+            search_conditions.append("topic = %s")
+            search_params.append(filters["topic"])
+
+        if "status" in filters:
+            search_conditions.append("status = %s")
+            search_params.append(filters["status"])
+
+        if "tags" in filters:
+            search_conditions.append("tags && %s")
+            search_params.append(filters["tags"])
+
+        with self.db.cursor() as cursor:
+            if query and query.strip():
+                # Rank the matching rows first so headlines are only built for the returned page
+                cursor.execute(f"""
+                    WITH ranked AS (
+                        SELECT {CONTEXT_COLUMNS},
+                               ts_rank_cd(%s::float4[], {search_column}, q, 32) AS relevance_score,
+                               q AS search_query
+                        FROM contexts, websearch_to_tsquery(%s::regconfig, %s) q
+                        WHERE {search_column} @@ q AND {' AND '.join(search_conditions)}
+                        ORDER BY relevance_score DESC, updated_at DESC
+                        LIMIT %s
+                    )
+                    SELECT ranked.*,
+                           ts_headline(%s::regconfig, COALESCE(title->>%s, ''),
+                                       search_query, %s) AS title_headline,
+                           ts_headline(%s::regconfig, COALESCE(content->'summary'->>%s, ''),
+                                       search_query, %s) AS summary_headline,
+                           ts_headline(%s::regconfig, COALESCE(
+                               CASE WHEN jsonb_typeof(content->'details') = 'object'
+                                    THEN content->'details'->>%s
+                                    ELSE content->>'details'
+                               END, ''), search_query, %s) AS details_headline,
+                           ARRAY(SELECT tag FROM unnest(tags) AS tag
+                                 WHERE to_tsvector(%s::regconfig, tag) @@ search_query) AS matched_tags
+                    FROM ranked
+                    ORDER BY relevance_score DESC, updated_at DESC
+                """, [
+                    SEARCH_RANK_WEIGHTS, config, query, *search_params, limit,
+                    config, lang, SEARCH_HEADLINE_OPTIONS,
+                    config, lang, SEARCH_HEADLINE_OPTIONS,
+                    config, lang, SEARCH_HEADLINE_OPTIONS,
+                    config
+                ])
+            else:
+                cursor.execute(f"""
+                    SELECT {CONTEXT_COLUMNS}, 0.0 AS relevance_score
+                    FROM contexts
+                    WHERE {' AND '.join(search_conditions)}
+                    ORDER BY updated_at DESC
+                    LIMIT %s
+                """, [*search_params, limit])
+
+            results = cursor.fetchall()
+
+        search_results = []
+        for row in results:
+            matched_terms, highlights = self._search_highlights(row)
+            search_results.append(SearchResult(
+                document=self._row_to_context_document(row),
+                relevance_score=float(row["relevance_score"]),
+                matched_terms=matched_terms,
+                highlights=highlights
+            ))
+
+        return search_results
+
+    def _search_vector_expression(self, config: str, lang: str) -> str:
+        """Inline equivalent of the search_{lang} column maintained by migration 003"""
+        return f"""(
+            setweight(to_tsvector('{config}'::regconfig, COALESCE(title->>'{lang}', '')), 'A')
+            || setweight(to_tsvector('{config}'::regconfig, COALESCE(array_to_string(tags, ' '), '')), 'B')
+            || setweight(to_tsvector('{config}'::regconfig, COALESCE(content->'summary'->>'{lang}', '')), 'B')
+            || setweight(to_tsvector('{config}'::regconfig, COALESCE(
+                   CASE WHEN jsonb_typeof(content->'details') = 'object'
+                        THEN content->'details'->>'{lang}'
+                        ELSE content->>'details'
+                   END, '')), 'C')
+        )"""
+
+    def _search_bm25(self, query: str, filters: Dict[str, Any],
+                     language: Optional[str], limit: int) -> List[SearchResult]:
+        """Context search against the in-process BM25 index"""
+        # The indexes only hold published contexts
+        if filters.get("status", ContentStatus.PUBLISHED.value) != ContentStatus.PUBLISHED.value:
+            return []
 
-            # Text search in title and content
-            if query:
-                search_conditions.append("""
-                    (title->>%s ILIKE %s OR content->>'summary' ILIKE %s)
-                """)
-                lang = language or self.default_language
-                search_term = f"%{query}%"
-                search_params.extend([lang, search_term, search_term])
-
-            # Apply filters
-            if "domain" in filters:
-                search_conditions.append("domain = %s")
-                search_params.append(filters["domain"])
-
-            if "topic" in filters:
-                search_conditions.append("topic = %s")
-                search_params.append(filters["topic"])
-
-            if "status" in filters:
-                search_conditions.append("status = %s")
-                search_params.append(filters["status"])
-
-            if "tags" in filters:
-                search_conditions.append("tags && %s")
-                search_params.append(filters["tags"])
-
-            # Build final query
-            where_clause = " AND ".join(search_conditions) if search_conditions else "TRUE"
-
-            sql_query = f"""
-                SELECT *,
-                       CASE
-                           WHEN title->>%s ILIKE %s THEN 1.0
-                           WHEN content->>'summary' ILIKE %s THEN 0.8
-                           ELSE 0.6
-                       END as relevance_score
-                FROM contexts
-                WHERE {where_clause} AND status = 'published'
-                ORDER BY relevance_score DESC, updated_at DESC
-                LIMIT %s
-            """
+        lang = language if language in SEARCH_CONFIGS else self.default_language
+        index = self._get_search_index()
+        hits = index.search(query, lang, limit, filters)
+        return self._lexical_results(index, hits, query, lang)
 
-            # Add language and search parameters for scoring
-            lang = language or self.default_language
-            search_term = f"%{query}%" if query else ""
-            search_params.extend([lang, search_term, search_term, limit])
+    def _search_semantic(self, query: str, filters: Dict[str, Any],
+                         language: Optional[str], limit: int) -> List[SearchResult]:
+        """Context search by embedding similarity"""
+        if filters.get("status", ContentStatus.PUBLISHED.value) != ContentStatus.PUBLISHED.value:
+            return []
 
-            with self.db_pool.cursor() as cursor:
-                cursor.execute(sql_query, search_params)
-                results = cursor.fetchall()
+        hits = self._semantic_hits(query, filters, limit)
+        if hits is None:
+            # Serve BM25 results until the embeddings are ready
+            return self._search_bm25(query, filters, language, limit)
+        documents = self._get_contexts([context_id for context_id, _ in hits])
+
+        search_results = []
+        for context_id, score in hits:
+            document = documents.get(context_id)
+            if document is None or not self._matches_filters(document, filters):
+                continue
+            search_results.append(SearchResult(
+                document=document,
+                relevance_score=score,
+                matched_terms=[],
+                highlights={}
+            ))
+            if len(search_results) == limit:
+                break
+
+        return search_results
+
+    def _search_hybrid(self, query: str, filters: Dict[str, Any],
+                       language: Optional[str], limit: int) -> List[SearchResult]:
+        """Context search fusing BM25 and embedding similarity scores"""
+        if filters.get("status", ContentStatus.PUBLISHED.value) != ContentStatus.PUBLISHED.value:
+            return []
 
-                search_results = []
-                for row in results:
-                    context = self._row_to_context_document(row)
-                    relevance_score = float(row.get("relevance_score", 0.5))
+        lang = language if language in SEARCH_CONFIGS else self.default_language
+        index = self._get_search_index()
+        candidates = limit * SEARCH_CANDIDATE_FACTOR
+        lexical_hits = index.search(query, lang, candidates, filters)
+        semantic_hits = self._semantic_hits(query, filters, candidates) or []
+        fused = fuse_scores(lexical_hits, semantic_hits, self.hybrid_alpha)
 
-                    # Extract matched terms and highlights
-                    matched_terms, highlights = self._extract_search_highlights(
-                        context, query, language or self.default_language
-                    )
+        results = self._lexical_results(index, fused, query, lang, filters)
+        return results[:limit]
 
-                    search_result = SearchResult(
-                        document=context,
-                        relevance_score=relevance_score,
-                        matched_terms=matched_terms,
-                        highlights=highlights
-                    )
+    def _semantic_hits(self, query: str, filters: Dict[str, Any], limit: int) -> Optional[List[Tuple[str, float]]]:
+        """Nearest contexts to a query, over-fetched when filters are applied afterwards
 
-                    search_results.append(search_result)
+        None while the vector index is still being built.
+        """
+        index = self._get_vector_index()
+        if index is None:
+            return None
+        vector = self._embedder.encode([query])[0]
+        candidates = limit * SEARCH_CANDIDATE_FACTOR if filters else limit
+        return index.search(vector, candidates)
+
+    def _lexical_results(self, index: BM25Index, hits: List[Tuple[str, float]], query: str,
+                         language: str, filters: Dict[str, Any] = None) -> List[SearchResult]:
+        """Hydrate ranked hits and mark the query terms they contain"""
+        documents = self._get_contexts([context_id for context_id, _ in hits])
+        query_terms = set(index.query_terms(query, language))
+
+        search_results = []
+        for context_id, score in hits:
+            document = documents.get(context_id)
+            if document is None or (filters and not self._matches_filters(document, filters)):
+                continue
+
+            matched_terms = []
+            highlights = {}
+            for field, text in document_fields(document, language).items():
+                if field == "tags":
+                    tags = [tag for tag in document.tags if query_terms.intersection(index.query_terms(tag, language))]
+                    if tags:
+                        matched_terms.append(field)
+                        highlights[field] = tags
+                    continue
+                headline = index.highlight(text, query_terms, language)
+                if headline:
+                    matched_terms.append(field)
+                    highlights[field] = [headline]
+
+            search_results.append(SearchResult(
+                document=document,
+                relevance_score=score,
+                matched_terms=matched_terms,
+                highlights=highlights
+            ))
+
+        return search_results
+
+    def _matches_filters(self, document: ContextDocument, filters: Dict[str, Any]) -> bool:
+        """Check a document against search filters"""
+        if "domain" in filters and document.domain.value != filters["domain"]:
+            return False
+        if "topic" in filters and document.topic != filters["topic"]:
+            return False
+        if "tags" in filters and not set(document.tags or []).intersection(filters["tags"]):
+            return False
+        return True
 
-                return search_results
+    def _get_contexts(self, context_ids: List[str]) -> Dict[str, ContextDocument]:
+        """Fetch several contexts in one query"""
+        if not context_ids:
+            return {}
+        with self.db.cursor() as cursor:
+            # Indexes in other workers may still hold contexts archived since their last catch-up
+            cursor.execute(
+                f"SELECT {CONTEXT_COLUMNS} FROM contexts WHERE id = ANY(%s) AND status = %s",
+                (context_ids, ContentStatus.PUBLISHED.value)
+            )
+            return {row["id"]: self._row_to_context_document(row) for row in cursor.fetchall()}
+
+    def _get_search_index(self) -> BM25Index:
+        """Get the BM25 index, restoring the snapshot or building it on first use"""
+        if self._search_index is not None:
+            self._refresh_search_index()
+            return self._search_index
+
+        with self._search_index_lock:
+            if self._search_index is None:
+                # Read before building so changes made meanwhile trigger a catch-up
+                self._search_index_generation = self._get_search_generation(None)
+                self._search_index_checked.set("generation", self._search_index_generation)
+                languages = list(SEARCH_CONFIGS)
+                index = None
+                if self.search_index_snapshot:
+                    index = BM25Index.load(self.search_index_snapshot, languages)
+
+                if index is None:
+                    index = BM25Index(languages)
+                    for documents in self._published_context_batches():
+                        for document in documents:
+                            index.add(document)
+                    if self.search_index_snapshot:
+                        index.save(self.search_index_snapshot)
+                else:
+                    self._catch_up(index.watermark, index.add, index.remove, self._search_index_applied)
+
+                self._search_index = index
+                logger.info("Context search index ready", **index.stats())
+
+        return self._search_index
+
+    def _refresh_search_index(self):
+        """Apply context changes other workers made, at most every few seconds"""
+        if self._search_index_checked.get("generation") is not MISSING:
+            return
+
+        generation = self._get_search_generation(None)
+        self._search_index_checked.set("generation", generation)
+        # Without Redis there is no generation to compare, so catch up on every check
+        if generation is not None and generation == self._search_index_generation:
+            return
+
+        with self._search_index_lock:
+            index = self._search_index
+            self._catch_up(index.watermark, index.add, index.remove, self._search_index_applied)
+            self._search_index_generation = generation
+
+    def _get_vector_index(self) -> Optional[VectorIndex]:
+        """Get the vector index, or None while it is still being opened or built in the background"""
+        index = self._vector_index
+        if index is None:
+            self._start_vector_index_build()
+        elif self._embedding_queue is None:
+            self._refresh_vector_index()
+        return index
+
+    def _start_vector_index_build(self):
+        """Open or build the vector index off the request path, unless that is already under way"""
+        with self._vector_index_lock:
+            if self._vector_index_build is not None and self._vector_index_build.is_alive():
+                return
+            self._vector_index_build = threading.Thread(
+                target=self._build_vector_index, name="context-vector-index-build", daemon=True
+            )
+            self._vector_index_build.start()
 
+    def _build_vector_index(self):
+        """Open the vector index, embedding missing contexts when this worker is the writer"""
+        try:
+            dimension = self._embedder.dimension
+            if self.vector_index_dir and self._vector_index_writer is None:
+                self._vector_index_writer = acquire_writer_lock(self.vector_index_dir)
+
+            if self.vector_index_dir and self._vector_index_writer is None:
+                # Another worker writes the index; map what it has published
+                index = VectorIndex.open(self.vector_index_dir, dimension, self.vector_dtype,
+                                         self._embedder.model_name, read_only=True)
+                self._vector_index = index
+                logger.info("Context vector index ready", **index.stats())
+                return
+
+            if self.vector_index_dir:
+                index = VectorIndex.open(self.vector_index_dir, dimension, self.vector_dtype,
+                                         self._embedder.model_name)
+            else:
+                index = VectorIndex(dimension, dtype=self.vector_dtype, model_name=self._embedder.model_name)
+            # Cached semantic results predate the embeddings of a background flush
+            queue = EmbeddingQueue(
+                self._embedder, index, self.default_language,
+                on_flush=lambda context_ids: self._bump_search_generation(*[domain.value for domain in Domain]),
+                poll=self._catch_up_vector_index
+            )
+
+            # Read before embedding so changes made meanwhile are caught up by the queue
+            self._vector_index_generation = self._get_search_generation(None)
+            if len(index):
+                changed = []
+                self._catch_up(index.watermark, changed.append, queue.discard, self._vector_index_applied)
+                queue.embed(changed)
+            else:
+                for documents in self._published_context_batches():
+                    queue.embed(documents)
+
+            if len(index) >= IVF_MIN_ROWS:
+                index.build_ivf()
+            index.save()
+
+            self._embedding_queue = queue
+            self._vector_index = index
+            queue.start()
+            # Results cached while the index was loading came from BM25 alone
+            self._bump_search_generation(*[domain.value for domain in Domain])
+            logger.info("Context vector index ready", **index.stats())
         except Exception as e:
-            logger.error("Context search failed", query=query, error=str(e))
-            return []
+            logger.error("Context vector index build failed", error=str(e))
+
+    def _refresh_vector_index(self):
+        """Reopen a read-only vector index the writer has since extended, or take over writing it"""
+        if self._vector_index_checked.get("checked") is not MISSING:
+            return
+        self._vector_index_checked.set("checked", True)
+
+        if self._vector_index_writer is None:
+            # The writer exited; the build opens the index for writing under this lock
+            self._vector_index_writer = acquire_writer_lock(self.vector_index_dir)
+        if self._vector_index_writer is not None or self._vector_index.changed_on_disk():
+            self._start_vector_index_build()
+
+    def _catch_up_vector_index(self):
+        """Queue context changes other workers made for embedding, when the shared generation moved"""
+        generation = self._get_search_generation(None)
+        # Without Redis there is no generation to compare, so catch up on every poll
+        if generation is not None and generation == self._vector_index_generation:
+            return
+        queue = self._embedding_queue
+        self._catch_up(queue.index.watermark, queue.record, queue.discard, self._vector_index_applied)
+        self._vector_index_generation = generation
+
+    def _published_context_batches(self):
+        """Yield every published context in id order batches"""
+        last_id = ""
+        with self.db.cursor() as cursor:
+            while True:
+                cursor.execute(f"""
+                    SELECT {CONTEXT_COLUMNS} FROM contexts
+                    WHERE status = %s AND id > %s
+                    ORDER BY id
+                    LIMIT %s
+                """, (ContentStatus.PUBLISHED.value, last_id, SEARCH_INDEX_BATCH_SIZE))
+                rows = cursor.fetchall()
+                if rows:
+                    yield [self._row_to_context_document(row) for row in rows]
+                if len(rows) < SEARCH_INDEX_BATCH_SIZE:
+                    return
+                last_id = rows[-1]["id"]
+
+    def _catch_up(self, watermark: Optional[datetime], add, remove, applied: Dict[str, Optional[datetime]]):
+        """Apply context changes made since an index was persisted
+
+        Rows are re-read from catch_up_overlap behind the watermark to pick up transactions that
+        committed after later ones; applied remembers the versions already seen in that window.
+        """
+        if watermark is None:
+            return
+        since = watermark - self.catch_up_overlap
+        with self.db.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {CONTEXT_COLUMNS} FROM contexts
+                WHERE updated_at >= %s
+                ORDER BY updated_at
+            """, (since,))
+            for row in cursor.fetchall():
+                if row["id"] in applied and applied[row["id"]] == row["updated_at"]:
+                    continue
+                document = self._row_to_context_document(row)
+                if document.status == ContentStatus.PUBLISHED:
+                    add(document)
+                else:
+                    remove(document.id, document.updated_at)
+                applied[document.id] = document.updated_at
+
+        for context_id, updated_at in list(applied.items()):
+            if updated_at is None or updated_at < since:
+                del applied[context_id]
+
+    def _sync_search_index(self, context_id: str):
+        """Reflect a context change in the search indexes that have been built"""
+        if self._search_index is None and self._embedding_queue is None:
+            return
+        try:
+            document = self.get_context(context_id)
+            published = document is not None and document.status == ContentStatus.PUBLISHED
+            updated_at = document.updated_at if document else None
+
+            if self._search_index is not None:
+                if published:
+                    self._search_index.add(document)
+                else:
+                    self._search_index.remove(context_id, updated_at)
+                self._search_index_applied[context_id] = updated_at
+
+            # Embedding is batched in the background
+            if self._embedding_queue is not None:
+                if published:
+                    self._embedding_queue.record(document)
+                else:
+                    self._embedding_queue.discard(context_id, updated_at)
+                self._vector_index_applied[context_id] = updated_at
+        except Exception as e:
+            logger.error("Failed to update search index", context_id=context_id, error=str(e))
+
+    def close(self):
+        """Embed queued contexts and persist the search indexes"""
+        if self._embedding_queue is not None:
+            self._embedding_queue.stop()
+        if self._vector_index_writer is not None:
+            self._vector_index_writer.close()
+            self._vector_index_writer = None
+
+        if self._search_index is not None and self.search_index_snapshot:
+            try:
+                self._search_index.save(self.search_index_snapshot)
+            except Exception as e:
+                logger.error("Failed to save search index snapshot", error=str(e))
 
     def publish_context(self, context_id: str, reviewer: str) -> bool:
         """Publish context document"""
@@ -422,7 +942,7 @@ class ContextManager:
                 # Update taxonomy counts
                 context = self.get_context(context_id)
                 if context:
-                    self._update_taxonomy_counts(context.topic, 1)
+                    self._update_taxonomy_counts(context.domain, context.topic, 1)
 
                 logger.info("Context published",
                           context_id=context_id,
@@ -450,7 +970,7 @@ class ContextManager:
                 # Update taxonomy counts
                 context = self.get_context(context_id)
                 if context:
-                    self._update_taxonomy_counts(context.topic, -1)
+                    self._update_taxonomy_counts(context.domain, context.topic, -1)
 
                 logger.info("Context archived",
                           context_id=context_id,
@@ -465,108 +985,292 @@ class ContextManager:
                         error=str(e))
             return False
 
-    def get_taxonomy(self, domain: Domain = None) -> Dict[str, TaxonomyNode]:
-        """Get taxonomy structure"""
+    def list_contexts(self, status: ContentStatus = None, domain: Domain = None, author: str = None,
+                      sort_by: str = "updated_at", sort_order: str = "desc", cursor: str = None,
+                      limit: int = 20, include_content: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List contexts one keyset page at a time, returning the page and the next cursor"""
+        if sort_by not in LIST_SORT_FIELDS:
+            raise ValueError(f"Invalid sort field: {sort_by}")
+        if sort_order not in LIST_SORT_ORDERS:
+            raise ValueError(f"Invalid sort order: {sort_order}")
+
+        conditions = []
+        params = []
+        if status:
+            conditions.append("status = %s")
+            params.append(status.value)
+        if domain:
+            conditions.append("domain = %s")
+            params.append(domain.value)
+        if author:
+            conditions.append("author = %s")
+            params.append(author)
+        if cursor:
+            sort_value, context_id = self._decode_list_cursor(cursor, sort_by, sort_order)
+            conditions.append(f"({sort_by}, id) {LIST_SORT_ORDERS[sort_order]} (%s, %s)")
+            params.extend([sort_value, context_id])
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        columns = CONTEXT_COLUMNS if include_content else CONTEXT_LIST_COLUMNS
+
+        with self.db.cursor() as db_cursor:
+            # Fetch one extra row to know whether another page exists
+            db_cursor.execute(f"""
+                SELECT {columns} FROM contexts
+                {where_clause}
+                ORDER BY {sort_by} {sort_order.upper()}, id {sort_order.upper()}
+                LIMIT %s
+            """, params + [limit + 1])
+            rows = db_cursor.fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_list_cursor(sort_by, sort_order, rows[-1][sort_by], rows[-1]["id"])
+
+        contexts = []
+        for row in rows:
+            context = self._row_to_context_document({"content": None, **row}).to_dict()
+            if not include_content:
+                del context["content"]
+            contexts.append(context)
+
+        return contexts, next_cursor
+
+    def _encode_list_cursor(self, sort_by: str, sort_order: str, sort_value: Any, context_id: str) -> str:
+        """Encode a listing position as an opaque cursor"""
+        if isinstance(sort_value, datetime):
+            sort_value = sort_value.isoformat()
+        raw = json.dumps([sort_by, sort_order, sort_value, context_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def _decode_list_cursor(self, cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, str]:
+        """Decode a listing cursor, raising ValueError if it is malformed or from another ordering"""
         try:
-            with self.db_pool.cursor() as cursor:
-                if domain:
-                    cursor.execute("""
-                        SELECT * FROM taxonomies
-                        WHERE domain = %s
-                        ORDER BY level, name->>'en'
-                    """, (domain.value,))
-                else:
-                    cursor.execute("""
-                        SELECT * FROM taxonomies
-                        ORDER BY domain, level, name->>'en'
-                    """)
-
-                results = cursor.fetchall()
-
-                taxonomy = {}
-                for row in results:
-                    node = TaxonomyNode(
-                        id=row["id"],
-                        name=row["name"],
-                        parent_id=row.get("parent_id"),
-                        domain=Domain(row["domain"]),
-                        level=row["level"],
-                        description=row["description"],
-                        content_count=row.get("content_count", 0)
-                    )
-
-                    # Build hierarchy
-                    if node.parent_id:
-                        if node.parent_id in taxonomy:
-                            taxonomy[node.parent_id].children.append(node.id)
-                    else:
-                        node.level = 0  # Root level
-
-                    taxonomy[node.id] = node
+            padded = cursor + "=" * (-len(cursor) % 4)
+            cursor_sort_by, cursor_sort_order, sort_value, context_id = json.loads(
+                base64.urlsafe_b64decode(padded.encode())
+            )
+            if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+                raise ValueError("Cursor was issued for a different sort")
+            if sort_by == "quality_score":
+                sort_value = float(sort_value)
+            else:
+                sort_value = datetime.fromisoformat(sort_value)
+            return sort_value, str(context_id)
+        except Exception as e:
+            raise ValueError("Invalid pagination cursor") from e
 
-                return taxonomy
+    def get_taxonomy(self, domain: Domain = None) -> Dict[str, TaxonomyNode]:
+        """Get taxonomy structure, parents before children"""
+        try:
+            return self._get_taxonomy_tree().subtree(domain.value if domain else None)
 
         except Exception as e:
             logger.error("Failed to get taxonomy", error=str(e))
             return {}
 
-    def get_context_stats(self) -> Dict[str, Any]:
-        """Get comprehensive context statistics"""
+    def get_taxonomy_node(self, reference: str, domain: Domain = None) -> Optional[TaxonomyNode]:
+        """Get a taxonomy node by id or slug"""
         try:
-            with self.db_pool.cursor() as cursor:
-                # Overall statistics
+            return self._get_taxonomy_tree().resolve(reference, domain.value if domain else None)
+
+        except Exception as e:
+            logger.error("Failed to get taxonomy node", reference=reference, error=str(e))
+            return None
+
+    def invalidate_taxonomy(self):
+        """Drop the cached taxonomy tree here and, via the shared generation, in other workers"""
+        self._taxonomy = None
+        self._taxonomy_loaded.clear()
+        self._taxonomy_generation.clear()
+        if self.redis_client:
+            try:
+                self.redis_client.incr(TAXONOMY_GENERATION_KEY)
+            except Exception as e:
+                logger.error("Failed to bump taxonomy generation", error=str(e))
+
+    def _get_taxonomy_tree(self) -> TaxonomyTree:
+        """Get the taxonomy tree, reloading it when the shared generation moved or it grew too old"""
+        generation = self._get_taxonomy_generation()
+        tree = self._current_taxonomy(generation)
+        if tree is not None:
+            return tree
+
+        with self._taxonomy_lock:
+            tree = self._current_taxonomy(generation)
+            if tree is not None:
+                return tree
+
+            with self.db.cursor() as cursor:
                 cursor.execute("""
-                    SELECT
-                        COUNT(*) as total_contexts,
-                        COUNT(CASE WHEN status = 'published' THEN 1 END) as published_contexts,
-                        COUNT(CASE WHEN status = 'draft' THEN 1 END) as draft_contexts,
-                        COUNT(CASE WHEN status = 'review' THEN 1 END) as review_contexts,
-                        COUNT(DISTINCT domain) as domains_count,
-                        COUNT(DISTINCT topic) as topics_count,
-                        AVG(quality_score) as avg_quality_score
-                    FROM contexts
+                    SELECT id, name, parent_id, domain, level, description, content_count, slug, path
+                    FROM taxonomies
                 """)
+                rows = cursor.fetchall()
+
+            tree = TaxonomyTree(
+                TaxonomyNode(
+                    id=row["id"],
+                    name=row["name"] or {},
+                    parent_id=row.get("parent_id"),
+                    domain=Domain(row["domain"]),
+                    level=row["level"],
+                    description=row["description"] or {},
+                    content_count=row.get("content_count") or 0,
+                    slug=row.get("slug"),
+                    path=row.get("path")
+                )
+                for row in rows
+            )
+            self._taxonomy = (generation, tree)
+            self._taxonomy_loaded.set("tree", tree)
+            logger.info("Taxonomy tree loaded", nodes=len(tree), generation=generation)
+            return tree
+
+    def _current_taxonomy(self, generation: int) -> Optional[TaxonomyTree]:
+        """Get the cached taxonomy tree if it is at this generation and within its max age"""
+        cached = self._taxonomy
+        if cached is None or cached[0] != generation:
+            return None
+        if self._taxonomy_loaded.get("tree") is not cached[1]:
+            return None
+        return cached[1]
+
+    def _get_taxonomy_generation(self) -> int:
+        """Get the shared taxonomy generation, rechecked every few seconds"""
+        generation = self._taxonomy_generation.get("generation")
+        if generation is MISSING:
+            generation = 0
+            if self.redis_client:
+                try:
+                    generation = int(self.redis_client.get(TAXONOMY_GENERATION_KEY) or 0)
+                except Exception:
+                    # Without a shared generation the local TTL bounds staleness
+                    pass
+            self._taxonomy_generation.set("generation", generation)
+        return generation
 
+    def get_context_stats(self) -> Dict[str, Any]:
+        """Get comprehensive context statistics"""
+        stats = self._stats.get("stats")
+        if stats is not MISSING:
+            return stats
+
+        try:
+            # Migration 005 is skipped on databases created before the contexts table
+            use_rollups = bool(self._get_table_columns("context_stats_rollup"))
+            if not use_rollups:
+                self._warn_schema("context_stats_rollup", "Stats rollups missing, scanning contexts")
+            overall_query, domain_query, activity_query = self._stats_queries(use_rollups)
+
+            with self.db.cursor() as cursor:
+                # Overall statistics
+                cursor.execute(overall_query)
                 overall_stats = cursor.fetchone()
 
                 # Domain breakdown
-                cursor.execute("""
-                    SELECT
-                        domain,
-                        COUNT(*) as context_count,
-                        AVG(quality_score) as avg_quality
-                    FROM contexts
-                    WHERE status = 'published'
-                    GROUP BY domain
-                    ORDER BY context_count DESC
-                """)
-
+                cursor.execute(domain_query)
                 domain_stats = cursor.fetchall()
 
                 # Recent activity
-                cursor.execute("""
-                    SELECT
-                        DATE_TRUNC('day', created_at) as date,
-                        COUNT(*) as contexts_created
-                    FROM contexts
-                    WHERE created_at >= NOW() - INTERVAL '30 days'
-                    GROUP BY DATE_TRUNC('day', created_at)
-                    ORDER BY date DESC
-                """)
-
+                cursor.execute(activity_query, (CONTEXT_STATS_ACTIVITY_DAYS,))
                 activity_stats = cursor.fetchall()
 
-                return {
+                stats = {
                     "overall": dict(overall_stats),
                     "by_domain": [dict(row) for row in domain_stats],
                     "activity": [dict(row) for row in activity_stats],
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 }
+                self._stats.set("stats", stats)
+                return stats
 
         except Exception as e:
             logger.error("Failed to get context stats", error=str(e))
             return {}
 
+    def _stats_queries(self, use_rollups: bool) -> Tuple[str, str, str]:
+        """Overall, by-domain and activity statistics queries, from the rollups or from contexts"""
+        if use_rollups:
+            return ("""
+                SELECT
+                    COALESCE(SUM(context_count), 0) as total_contexts,
+                    COALESCE(SUM(context_count) FILTER (WHERE status = 'published'), 0) as published_contexts,
+                    COALESCE(SUM(context_count) FILTER (WHERE status = 'draft'), 0) as draft_contexts,
+                    COALESCE(SUM(context_count) FILTER (WHERE status = 'review'), 0) as review_contexts,
+                    COUNT(DISTINCT domain) as domains_count,
+                    COUNT(DISTINCT NULLIF(topic, '')) as topics_count,
+                    SUM(quality_sum) / NULLIF(SUM(quality_count), 0) as avg_quality_score
+                FROM context_stats_rollup
+                WHERE context_count > 0
+            """, """
+                SELECT
+                    domain,
+                    SUM(context_count) as context_count,
+                    SUM(quality_sum) / NULLIF(SUM(quality_count), 0) as avg_quality
+                FROM context_stats_rollup
+                WHERE status = 'published' AND context_count > 0
+                GROUP BY domain
+                ORDER BY context_count DESC
+            """, """
+                SELECT
+                    day as date,
+                    contexts_created
+                FROM context_activity_daily
+                WHERE day >= CURRENT_DATE - %s AND contexts_created > 0
+                ORDER BY day DESC
+            """)
+
+        return ("""
+            SELECT
+                COUNT(*) as total_contexts,
+                COUNT(CASE WHEN status = 'published' THEN 1 END) as published_contexts,
+                COUNT(CASE WHEN status = 'draft' THEN 1 END) as draft_contexts,
+                COUNT(CASE WHEN status = 'review' THEN 1 END) as review_contexts,
+                COUNT(DISTINCT domain) as domains_count,
+                COUNT(DISTINCT topic) as topics_count,
+                AVG(quality_score) as avg_quality_score
+            FROM contexts
+        """, """
+            SELECT
+                domain,
+                COUNT(*) as context_count,
+                AVG(quality_score) as avg_quality
+            FROM contexts
+            WHERE status = 'published'
+            GROUP BY domain
+            ORDER BY context_count DESC
+        """, """
+            SELECT
+                created_at::date as date,
+                COUNT(*) as contexts_created
+            FROM contexts
+            WHERE created_at >= CURRENT_DATE - %s
+            GROUP BY created_at::date
+            ORDER BY date DESC
+        """)
+
+    def _get_table_columns(self, table: str) -> frozenset:
+        """Get a table's column names, empty if it does not exist; rechecked every few minutes"""
+        columns = self._table_columns.get(table)
+        if columns is MISSING:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT column_name FROM information_schema.columns
+                    WHERE table_schema = current_schema() AND table_name = %s
+                """, (table,))
+                columns = frozenset(row["column_name"] for row in cursor.fetchall())
+            self._table_columns.set(table, columns)
+        return columns
+
+    def _warn_schema(self, name: str, message: str):
+        """Log a missing schema object once per process"""
+        if name not in self._schema_warnings:
+            self._schema_warnings.add(name)
+            logger.warning(message, missing=name,
+                           hint="once contexts has the context service columns, run alembic downgrade 002 and upgrade head")
+
     def validate_context_quality(self, context_id: str) -> Dict[str, Any]:
         """Validate and score context quality"""
         try:
@@ -645,68 +1349,104 @@ class ContextManager:
             published_at=row["published_at"]
         )
 
-    def _extract_search_highlights(self, context: ContextDocument, query: str,
-                                 language: str) -> Tuple[List[str], Dict[str, List[str]]]:
-        """Extract search highlights and matched terms"""
+    def _search_highlights(self, row: Dict[str, Any]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """Collect matched fields and their ts_headline fragments from a search row"""
         matched_terms = []
         highlights = {}
 
-        if not query:
-            return matched_terms, highlights
-
-        query_lower = query.lower()
+        for field in ("title", "summary", "details"):
+            headline = row.get(f"{field}_headline") or ""
+            if SEARCH_HIGHLIGHT_START in headline:
+                matched_terms.append(field)
+                highlights[field] = headline.split(SEARCH_FRAGMENT_DELIMITER)
 
-        # Check title
-        title_text = context.title.get(language, "")
-        if query_lower in title_text.lower():
-            matched_terms.append("title")
-            highlights["title"] = [title_text]
-
-        # Check summary
-        summary_text = context.content.get("summary", {}).get(language, "")
-        if query_lower in summary_text.lower():
-            matched_terms.append("summary")
-            highlights["summary"] = [summary_text]
-
-        # Check tags
-        for tag in context.tags:
-            if query_lower in tag.lower():
-                matched_terms.append("tags")
-                highlights.setdefault("tags", []).append(tag)
+        if row.get("matched_tags"):
+            matched_terms.append("tags")
+            highlights["tags"] = list(row["matched_tags"])
 
         return matched_terms, highlights
 
-    def _update_taxonomy_counts(self, topic: str, delta: int):
-        """Update taxonomy content counts"""
+    def _update_taxonomy_counts(self, domain: Domain, topic: str, delta: int):
+        """Update the content count of the taxonomy node a topic refers to"""
         try:
-            with self.db_pool.cursor() as cursor:
+            tree = self._get_taxonomy_tree()
+            node = tree.resolve(topic, domain.value)
+            if node is None:
+                logger.warning("No taxonomy node for topic", domain=domain.value, topic=topic)
+                return
+
+            with self.db.cursor() as cursor:
                 cursor.execute("""
                     UPDATE taxonomies
                     SET content_count = GREATEST(0, content_count + %s)
-                    WHERE name->>'en' = %s
-                """, (delta, topic))
-                self.db_pool.commit()
+                    WHERE id = %s
+                """, (delta, node.id))
+                cursor.connection.commit()
+
+            # Keep this worker's tree current and have the others reload theirs
+            generation = None
+            if self.redis_client:
+                try:
+                    generation = int(self.redis_client.incr(TAXONOMY_GENERATION_KEY))
+                except Exception as e:
+                    logger.error("Failed to bump taxonomy generation", error=str(e))
+
+            cached = self._taxonomy
+            if generation is not None and cached is not None and cached[1] is tree and cached[0] == generation - 1:
+                tree.apply_count(node.id, delta)
+                self._taxonomy = (generation, tree)
+                self._taxonomy_generation.set("generation", generation)
+            else:
+                # Another change landed in between; reload on next use
+                self._taxonomy = None
+                self._taxonomy_loaded.clear()
+                self._taxonomy_generation.clear()
         except Exception as e:
             logger.error("Failed to update taxonomy counts", topic=topic, error=str(e))
 
-    def _cache_context(self, key: str, context: ContextDocument):
-        """Cache context document"""
+    def _project_context(self, context: ContextDocument, language: str) -> ContextDocument:
+        """Reduce multilingual fields to one language, falling back to the default language"""
+        return replace(
+            context,
+            title=self._project_language(context.title, language),
+            content=self._project_language(context.content, language)
+        )
+
+    def _project_language(self, value: Any, language: str) -> Any:
+        if isinstance(value, dict):
+            # Dicts keyed by language codes hold translations of one value
+            if value and set(value) <= CONTEXT_LANGUAGES:
+                for code in (language, self.default_language):
+                    if code in value:
+                        return {code: value[code]}
+                return value
+            return {key: self._project_language(item, language) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._project_language(item, language) for item in value]
+        return value
+
+    def _cache_context(self, context_id: str, field: str, context: ContextDocument):
+        """Cache a context, or one language projection of it, in the context's hash"""
         if self.redis_client:
             try:
-                self.redis_client.setex(key, self.cache_ttl, json.dumps(context.to_dict()))
+                key = f"{CONTEXT_CACHE_PREFIX}:{context_id}"
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.hset(key, field, json.dumps(context.to_dict()))
+                pipe.expire(key, self.cache_ttl)
+                pipe.execute()
             except Exception as e:
-                logger.error("Failed to cache context", key=key, error=str(e))
+                logger.error("Failed to cache context", context_id=context_id, error=str(e))
 
-    def _get_cached_context(self, key: str) -> Optional[ContextDocument]:
-        """Get cached context document"""
+    def _get_cached_context(self, context_id: str, field: str) -> Optional[ContextDocument]:
+        """Get a cached context or language projection"""
         if self.redis_client:
             try:
-                cached = self.redis_client.get(key)
+                cached = self.redis_client.hget(f"{CONTEXT_CACHE_PREFIX}:{context_id}", field)
                 if cached:
                     data = json.loads(cached)
                     return self._dict_to_context_document(data)
             except Exception as e:
-                logger.error("Failed to get cached context", key=key, error=str(e))
+                logger.error("Failed to get cached context", context_id=context_id, error=str(e))
         return None
 
     def _dict_to_context_document(self, data: Dict[str, Any]) -> ContextDocument:
@@ -730,17 +1470,101 @@ class ContextManager:
             published_at=datetime.fromisoformat(data["published_at"]) if data["published_at"] else None
         )
 
+    def _search_cache_key(self, query: str, filters: Dict[str, Any], language: str,
+                          limit: int, mode: str) -> Optional[str]:
+        """Versioned cache key of a search; None when the generation is unavailable"""
+        domain = filters.get("domain")
+        generation = self._get_search_generation(domain)
+        if generation is None:
+            return None
+
+        normalized = json.dumps({
+            "query": " ".join((query or "").casefold().split()),
+            "filters": {key: sorted(set(value)) if key == "tags" else value for key, value in filters.items()},
+            "language": language,
+            "limit": limit,
+            "mode": mode
+        }, sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha256(normalized.encode()).hexdigest()[:32]
+        return f"{SEARCH_CACHE_PREFIX}:{domain or '*'}:{generation}:{digest}"
+
+    def _get_search_generation(self, domain: Optional[str]) -> Optional[str]:
+        """Generation counter of all contexts, or of one domain for domain-filtered searches"""
+        if not self.redis_client:
+            return None
+        try:
+            key = f"{SEARCH_GENERATION_KEY}:{domain}" if domain else SEARCH_GENERATION_KEY
+            return self.redis_client.get(key) or "0"
+        except Exception as e:
+            logger.error("Failed to read search cache generation", error=str(e))
+            return None
+
+    def _bump_search_generation(self, *domains: Optional[str]):
+        """Invalidate cached searches across all contexts and within the given domains"""
+        if not self.redis_client:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.incr(SEARCH_GENERATION_KEY)
+            for domain in {domain for domain in domains if domain}:
+                pipe.incr(f"{SEARCH_GENERATION_KEY}:{domain}")
+            pipe.execute()
+        except Exception as e:
+            logger.error("Failed to bump search cache generation", error=str(e))
+
+    def _get_cached_search(self, cache_key: Optional[str]) -> Optional[List[SearchResult]]:
+        """Get cached search results, from process memory first"""
+        if cache_key is None:
+            return None
+
+        results = self._search_results.get(cache_key)
+        if results is not MISSING:
+            return list(results)
+
+        try:
+            cached = self.redis_client.get(cache_key)
+            if cached is None:
+                return None
+            results = [
+                SearchResult(
+                    document=self._dict_to_context_document(entry["document"]),
+                    relevance_score=entry["relevance_score"],
+                    matched_terms=entry["matched_terms"],
+                    highlights=entry["highlights"]
+                )
+                for entry in json.loads(cached)
+            ]
+        except Exception as e:
+            logger.error("Failed to read cached search", error=str(e))
+            return None
+
+        self._search_results.set(cache_key, results)
+        return list(results)
+
+    def _cache_search(self, cache_key: Optional[str], results: List[SearchResult]):
+        """Cache search results under their versioned key"""
+        if cache_key is None:
+            return
+
+        self._search_results.set(cache_key, results)
+        try:
+            self.redis_client.setex(cache_key, self.search_cache_ttl, json.dumps([
+                {
+                    "document": result.document.to_dict(),
+                    "relevance_score": result.relevance_score,
+                    "matched_terms": result.matched_terms,
+                    "highlights": result.highlights
+                }
+                for result in results
+            ]))
+        except Exception as e:
+            logger.error("Failed to cache search", error=str(e))
+
     def _clear_context_cache(self, context_id: str):
-        """Clear context-related caches"""
+        """Clear every cached projection of a context"""
         if self.redis_client:
             try:
-                # Clear specific context caches
-                pattern = f"context:{context_id}:*"
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    self.redis_client.delete(*keys)
-
-                # Clear search caches (would need more sophisticated invalidation)
+                self.redis_client.delete(f"{CONTEXT_CACHE_PREFIX}:{context_id}")
                 logger.info("Context cache cleared", context_id=context_id)
 
             except Exception as e:
@@ -777,5 +1601,5 @@ class ContextManager:
         return recommendations
 
 
-# Global context manager instance
-context_manager = ContextManager()
+# Global context manager instance, built on first use
+context_manager = lazy_service("context_manager", ContextManager, on_shutdown=ContextManager.close)
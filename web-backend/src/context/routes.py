@@ -7,11 +7,13 @@ from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, validator
 import structlog
 
 from .context_manager import context_manager, ContextDocument, Domain, ContentStatus, ContentType
-from ..auth.auth_service import auth_service, User, Permission
+from auth.auth_service import User, Permission
+from auth.routes import get_current_user
 
 logger = structlog.get_logger(__name__)
 
@@ -56,6 +58,7 @@ class ContextSearchRequest(BaseModel):
     status: Optional[str] = Field("published", description="Content status")
     tags: Optional[List[str]] = Field(None, description="Filter by tags")
     limit: int = Field(20, description="Maximum results", ge=1, le=100)
+    mode: Optional[str] = Field(None, description="Search backend: fulltext, bm25, semantic or hybrid")
 
 class ContextPublishRequest(BaseModel):
     """Context publish request model"""
@@ -73,7 +76,7 @@ class QualityCheckRequest(BaseModel):
 # Dependencies
 def require_content_permission():
     """Require content management permission"""
-    def permission_checker(current_user: User = Depends(auth_service.get_current_user)):
+    def permission_checker(current_user: User = Depends(get_current_user)):
         if not current_user.has_permission(Permission.WRITE_CONTENT):
             raise HTTPException(
                 status_code=403,
@@ -84,7 +87,7 @@ def require_content_permission():
 
 def require_publish_permission():
     """Require content publishing permission"""
-    def permission_checker(current_user: User = Depends(auth_service.get_current_user)):
+    def permission_checker(current_user: User = Depends(get_current_user)):
         if not current_user.has_permission(Permission.PUBLISH_CONTENT):
             raise HTTPException(
                 status_code=403,
@@ -133,11 +136,81 @@ async def create_context(
                     error=str(e))
         raise HTTPException(status_code=500, detail="Context creation failed")
 
+@router.get("/stats/overview", response_model=Dict[str, Any])
+async def get_context_stats(current_user: User = Depends(get_current_user)):
+    """Get context statistics overview"""
+    try:
+        stats = context_manager.get_context_stats()
+
+        return {
+            "stats": stats,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "generated_by": current_user.id
+        }
+
+    except Exception as e:
+        logger.error("Stats retrieval failed",
+                    user_id=current_user.id,
+                    error=str(e))
+        raise HTTPException(status_code=500, detail="Stats retrieval failed")
+
+@router.get("/list", response_model=Dict[str, Any])
+async def list_contexts(
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    limit: int = Query(20, description="Items per page", ge=1, le=100),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    domain: Optional[str] = Query(None, description="Filter by domain"),
+    author: Optional[str] = Query(None, description="Filter by author"),
+    sort_by: str = Query("updated_at", description="Sort field: updated_at, created_at or quality_score"),
+    sort_order: str = Query("desc", description="Sort order: asc or desc"),
+    include_content: bool = Query(False, description="Include the full content of each context"),
+    current_user: User = Depends(get_current_user)
+):
+    """List contexts with keyset pagination and filtering"""
+    try:
+        # The listing runs a blocking query; keep it off the event loop
+        contexts, next_cursor = await run_in_threadpool(
+            context_manager.list_contexts,
+            status=ContentStatus(status) if status else None,
+            domain=Domain(domain) if domain else None,
+            author=author,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            limit=limit,
+            include_content=include_content
+        )
+
+        return {
+            "contexts": contexts,
+            "count": len(contexts),
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "filters": {
+                "status": status,
+                "domain": domain,
+                "author": author
+            },
+            "sort": {
+                "by": sort_by,
+                "order": sort_order
+            },
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Context listing failed",
+                    user_id=current_user.id,
+                    error=str(e))
+        raise HTTPException(status_code=500, detail="Context listing failed")
+
 @router.get("/{context_id}", response_model=Dict[str, Any])
 async def get_context(
     context_id: str,
     language: Optional[str] = Query("en", description="Response language"),
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Get context document by ID"""
     try:
@@ -252,7 +325,7 @@ async def delete_context(
 @router.post("/search", response_model=Dict[str, Any])
 async def search_contexts(
     search_request: ContextSearchRequest,
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Search context documents"""
     try:
@@ -266,11 +339,14 @@ async def search_contexts(
         # Remove None values
         filters = {k: v for k, v in filters.items() if v is not None}
 
-        results = context_manager.search_contexts(
+        # Search embeds the query and scores indexes in process; keep it off the event loop
+        results = await run_in_threadpool(
+            context_manager.search_contexts,
             search_request.query,
             filters,
             search_request.language,
-            search_request.limit
+            search_request.limit,
+            mode=search_request.mode
         )
 
         search_results = []
@@ -296,6 +372,8 @@ async def search_contexts(
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("Context search failed",
                     user_id=current_user.id,
@@ -370,33 +448,33 @@ async def archive_context(
 @router.get("/taxonomy/tree", response_model=Dict[str, Any])
 async def get_taxonomy_tree(
     domain: Optional[str] = Query(None, description="Filter by domain"),
-    current_user: User = Depends(auth_service.get_current_user)
+    current_user: User = Depends(get_current_user)
 ):
     """Get taxonomy tree structure"""
     try:
         domain_filter = Domain(domain) if domain else None
         taxonomy = context_manager.get_taxonomy(domain_filter)
 
-        # Convert to hierarchical structure
+        # Convert to hierarchical structure; parents always come before their children
         tree = {}
         root_nodes = []
 
         for node_id, node in taxonomy.items():
             node_dict = {
                 "id": node.id,
+                "slug": node.slug,
                 "name": node.name,
                 "description": node.description,
                 "level": node.level,
+                "path": node.path,
                 "content_count": node.content_count,
+                "subtree_count": node.subtree_count,
                 "children": []
             }
 
-            if node.parent_id:
-                # Add to parent's children
-                if node.parent_id in tree:
-                    tree[node.parent_id]["children"].append(node_dict)
+            if node.parent_id in tree:
+                tree[node.parent_id]["children"].append(node_dict)
             else:
-                # Root node
                 root_nodes.append(node_dict)
 
             tree[node_id] = node_dict
@@ -418,6 +496,44 @@ async def get_taxonomy_tree(
                     error=str(e))
         raise HTTPException(status_code=500, detail="Taxonomy retrieval failed")
 
+@router.get("/taxonomy/nodes/{reference}", response_model=Dict[str, Any])
+async def get_taxonomy_node(
+    reference: str,
+    domain: Optional[str] = Query(None, description="Domain to resolve slugs in"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a taxonomy node by id or slug"""
+    try:
+        domain_filter = Domain(domain) if domain else None
+        node = context_manager.get_taxonomy_node(reference, domain_filter)
+        if not node:
+            raise HTTPException(status_code=404, detail="Taxonomy node not found")
+
+        return {
+            "id": node.id,
+            "slug": node.slug,
+            "name": node.name,
+            "description": node.description,
+            "domain": node.domain.value,
+            "parent_id": node.parent_id,
+            "level": node.level,
+            "path": node.path,
+            "children": node.children,
+            "content_count": node.content_count,
+            "subtree_count": node.subtree_count
+        }
+
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid domain")
+    except Exception as e:
+        logger.error("Taxonomy node retrieval failed",
+                    reference=reference,
+                    user_id=current_user.id,
+                    error=str(e))
+        raise HTTPException(status_code=500, detail="Taxonomy retrieval failed")
+
 @router.post("/{context_id}/quality", response_model=Dict[str, Any])
 async def check_context_quality(
     context_id: str,
@@ -451,63 +567,6 @@ async def check_context_quality(
                     error=str(e))
         raise HTTPException(status_code=500, detail="Quality check failed")
 
-@router.get("/stats/overview", response_model=Dict[str, Any])
-async def get_context_stats(current_user: User = Depends(auth_service.get_current_user)):
-    """Get context statistics overview"""
-    try:
-        stats = context_manager.get_context_stats()
-
-        return {
-            "stats": stats,
-            "generated_at": datetime.now(timezone.utc).isoformat(),
-            "generated_by": current_user.id
-        }
-
-    except Exception as e:
-        logger.error("Stats retrieval failed",
-                    user_id=current_user.id,
-                    error=str(e))
-        raise HTTPException(status_code=500, detail="Stats retrieval failed")
-
-@router.get("/list", response_model=Dict[str, Any])
-async def list_contexts(
-    page: int = Query(1, description="Page number", ge=1),
-    limit: int = Query(20, description="Items per page", ge=1, le=100),
-    status: Optional[str] = Query(None, description="Filter by status"),
-    domain: Optional[str] = Query(None, description="Filter by domain"),
-    author: Optional[str] = Query(None, description="Filter by author"),
-    sort_by: str = Query("updated_at", description="Sort field"),
-    sort_order: str = Query("desc", description="Sort order"),
-    current_user: User = Depends(auth_service.get_current_user)
-):
-    """List contexts with pagination and filtering"""
-    try:
-        # This would implement actual listing with pagination
-        # For now, return placeholder response
-        return {
-            "contexts": [],
-            "total": 0,
-            "page": page,
-            "limit": limit,
-            "total_pages": 0,
-            "filters": {
-                "status": status,
-                "domain": domain,
-                "author": author
-            },
-            "sort": {
-                "by": sort_by,
-                "order": sort_order
-            },
-            "timestamp": datetime.now(timezone.utc).isoformat()
-        }
-
-    except Exception as e:
-        logger.error("Context listing failed",
-                    user_id=current_user.id,
-                    error=str(e))
-        raise HTTPException(status_code=500, detail="Context listing failed")
-
 @router.post("/bulk/publish", response_model=Dict[str, Any])
 async def bulk_publish_contexts(
     context_ids: List[str],
@@ -0,0 +1,483 @@
+"""
+Fataplus Context Search Index
+In-process BM25 inverted index over published context documents
+"""
+
+import os
+import re
+import math
+import pickle
+import tempfile
+import threading
+from array import array
+from datetime import datetime
+from functools import lru_cache
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import structlog
+
+try:
+    import snowballstemmer
+except ImportError:  # Terms are matched unstemmed without it
+    snowballstemmer = None
+
+logger = structlog.get_logger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Term frequency multiplier per document field, mirroring the full-text search weights
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "summary": 1.5,
+    "details": 1.0,
+}
+
+# Share of removed documents that triggers a posting list compaction
+COMPACTION_RATIO = 0.25
+
+# Snowball stemmer per content language; Swahili and Malagasy are matched unstemmed
+STEMMER_LANGUAGES = {
+    "en": "english",
+    "fr": "french",
+    "pt": "portuguese",
+    "ar": "arabic",
+}
+
+STOPWORDS = {
+    "en": {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+           "of", "on", "or", "that", "the", "to", "what", "when", "which", "with"},
+    "fr": {"au", "aux", "avec", "ce", "dans", "de", "des", "du", "en", "est", "et", "la", "le", "les",
+           "pour", "par", "que", "qui", "sur", "un", "une"},
+    "pt": {"a", "ao", "com", "da", "das", "de", "do", "dos", "e", "em", "na", "no", "o", "os", "para",
+           "por", "que", "um", "uma"},
+    "sw": {"kwa", "na", "ya", "wa", "za", "la", "ni", "katika", "cha", "vya"},
+    "mg": {"ny", "sy", "ary", "amin", "ho", "dia", "ao", "an", "ireo", "izay"},
+    "ar": {"في", "من", "على", "إلى", "عن", "مع", "هذا", "هذه", "التي", "الذي"},
+}
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+ARABIC_DIACRITICS = re.compile("[\u064B-\u0652\u0640]")
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+HIGHLIGHT_WORDS = 35
+
+
+class Analyzer:
+    """Per-language tokenisation, stopword removal and stemming"""
+
+    def __init__(self, language: str):
+        self.language = language
+        self.stopwords = STOPWORDS.get(language, set())
+        self._stemmer = None
+        self._stem_lock = threading.Lock()
+        if snowballstemmer and language in STEMMER_LANGUAGES:
+            self._stemmer = snowballstemmer.stemmer(STEMMER_LANGUAGES[language])
+        self.term = lru_cache(maxsize=100_000)(self._term)
+
+    def _term(self, word: str) -> Optional[str]:
+        """Normalise one word to its index term, or None for stopwords"""
+        word = word.casefold()
+        if self.language == "ar":
+            word = ARABIC_DIACRITICS.sub("", word)
+        if not word or word in self.stopwords:
+            return None
+        if self._stemmer:
+            # Snowball stemmers keep state between calls
+            with self._stem_lock:
+                word = self._stemmer.stemWord(word)
+        return word
+
+    def analyze(self, text: str) -> List[str]:
+        """Get the index terms of a text in order"""
+        terms = []
+        for match in TOKEN_PATTERN.finditer(text or ""):
+            term = self.term(match.group())
+            if term:
+                terms.append(term)
+        return terms
+
+
+def _array(typecode: str, data: bytes) -> array:
+    """Build a typed array from its raw bytes"""
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+def _flatten_text(value: Any) -> str:
+    """Join the strings of a nested content value"""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return " ".join(_flatten_text(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_flatten_text(item) for item in value)
+    return str(value)
+
+
+def document_fields(document, language: str) -> Dict[str, str]:
+    """Searchable text of a context document per field in one language"""
+    content = document.content or {}
+    summary = content.get("summary")
+    details = content.get("details")
+    return {
+        "title": (document.title or {}).get(language) or "",
+        "tags": " ".join(document.tags or []),
+        "summary": _flatten_text(summary.get(language) if isinstance(summary, dict) else summary),
+        "details": _flatten_text(details.get(language) if isinstance(details, dict) else details),
+    }
+
+
+class _LanguageIndex:
+    """Posting lists and length statistics for one language"""
+
+    __slots__ = ("postings", "doc_lengths", "total_length", "doc_count")
+
+    def __init__(self):
+        # term -> (document slots, weighted term frequencies)
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        # Weighted length per slot; zero for removed documents and documents without this language
+        self.doc_lengths = array("f")
+        self.total_length = 0.0
+        self.doc_count = 0
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Unpickler limited to the builtin containers a snapshot is made of"""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Unexpected object in search index snapshot: {module}.{name}")
+
+
+class BM25Index:
+    """Incrementally updated BM25 inverted index over published context documents"""
+
+    def __init__(self, languages: Iterable[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.analyzers = {language: Analyzer(language) for language in languages}
+        self._languages = {language: _LanguageIndex() for language in self.analyzers}
+        self._lock = threading.RLock()
+
+        # Documents are addressed by slot; updated documents get a new slot
+        self._slot_ids: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._facets: List[Optional[Tuple[str, str, frozenset]]] = []
+        self._removed = 0
+
+        # Latest updated_at of an indexed change, used to catch up after loading a snapshot
+        self.watermark: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, context_id: str) -> bool:
+        return context_id in self._slots
+
+    def add(self, document) -> None:
+        """Index a published document, replacing any earlier version"""
+        analyzed = {}
+        for language, analyzer in self.analyzers.items():
+            fields = document_fields(document, language)
+            # Only languages the document is written in; tags and details alone are language neutral
+            if not (fields["title"] or fields["summary"]):
+                continue
+            frequencies = defaultdict(float)
+            for field, text in fields.items():
+                for term in analyzer.analyze(text):
+                    frequencies[term] += FIELD_WEIGHTS[field]
+            if frequencies:
+                analyzed[language] = frequencies
+
+        with self._lock:
+            self._remove(document.id)
+            slot = len(self._slot_ids)
+            self._slot_ids.append(document.id)
+            self._slots[document.id] = slot
+            self._facets.append((document.domain.value, document.topic, frozenset(document.tags or [])))
+
+            for language, frequencies in analyzed.items():
+                index = self._languages[language]
+                for term, frequency in frequencies.items():
+                    postings = index.postings.get(term)
+                    if postings is None:
+                        postings = index.postings[term] = (array("I"), array("f"))
+                    postings[0].append(slot)
+                    postings[1].append(frequency)
+
+                length = sum(frequencies.values())
+                missing = slot + 1 - len(index.doc_lengths)
+                if missing > 0:
+                    index.doc_lengths.extend(_array("f", bytes(4 * missing)))
+                index.doc_lengths[slot] = length
+                index.total_length += length
+                index.doc_count += 1
+
+            self._advance_watermark(document.updated_at)
+            self._maybe_compact()
+
+    def remove(self, context_id: str, updated_at: Optional[datetime] = None) -> bool:
+        """Drop a document from the index"""
+        with self._lock:
+            removed = self._remove(context_id)
+            self._advance_watermark(updated_at)
+            self._maybe_compact()
+            return removed
+
+    def _remove(self, context_id: str) -> bool:
+        slot = self._slots.pop(context_id, None)
+        if slot is None:
+            return False
+
+        self._slot_ids[slot] = None
+        self._facets[slot] = None
+        for index in self._languages.values():
+            if slot < len(index.doc_lengths) and index.doc_lengths[slot]:
+                index.total_length -= index.doc_lengths[slot]
+                index.doc_count -= 1
+                index.doc_lengths[slot] = 0.0
+        # Posting entries stay behind until compaction and are masked by their zero length
+        self._removed += 1
+        return True
+
+    def _advance_watermark(self, updated_at: Optional[datetime]) -> None:
+        if updated_at and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+
+    def _maybe_compact(self) -> None:
+        if self._removed > 64 and self._removed > COMPACTION_RATIO * len(self._slot_ids):
+            self.compact()
+
+    def compact(self) -> None:
+        """Renumber live documents and drop removed entries from every posting list"""
+        with self._lock:
+            live_slots = [slot for slot, context_id in enumerate(self._slot_ids) if context_id is not None]
+            renumber = np.full(len(self._slot_ids), -1, dtype=np.int64)
+            renumber[live_slots] = np.arange(len(live_slots))
+
+            for index in self._languages.values():
+                postings = {}
+                for term, (slots, frequencies) in index.postings.items():
+                    new_slots = renumber[np.frombuffer(slots, dtype=np.uint32)]
+                    keep = new_slots >= 0
+                    if not keep.any():
+                        continue
+                    postings[term] = (
+                        _array("I", new_slots[keep].astype(np.uint32).tobytes()),
+                        _array("f", np.frombuffer(frequencies, dtype=np.float32)[keep].tobytes())
+                    )
+                    del new_slots, keep
+                index.postings = postings
+
+                lengths = np.zeros(len(live_slots), dtype=np.float32)
+                existing = [slot for slot in live_slots if slot < len(index.doc_lengths)]
+                lengths[renumber[existing]] = [index.doc_lengths[slot] for slot in existing]
+                index.doc_lengths = _array("f", lengths.tobytes())
+
+            self._slot_ids = [self._slot_ids[slot] for slot in live_slots]
+            self._facets = [self._facets[slot] for slot in live_slots]
+            self._slots = {context_id: slot for slot, context_id in enumerate(self._slot_ids)}
+            self._removed = 0
+
+    def query_terms(self, query: str, language: str) -> List[str]:
+        """Distinct index terms of a query"""
+        analyzer = self.analyzers.get(language)
+        if analyzer is None:
+            return []
+        return list(dict.fromkeys(analyzer.analyze(query)))
+
+    def search(self, query: str, language: str, limit: int = 20,
+               filters: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """Get (context_id, score) pairs for the best BM25 matches of a query"""
+        terms = self.query_terms(query, language)
+        if not terms or limit <= 0:
+            return []
+
+        with self._lock:
+            return self._search(terms, self._languages[language], limit, filters or {})
+
+    def _search(self, terms: List[str], index: _LanguageIndex, limit: int,
+                filters: Dict[str, Any]) -> List[Tuple[str, float]]:
+        # Runs under the lock: buffer views must be released before posting lists grow again
+        if not index.doc_count:
+            return []
+
+        lengths = np.frombuffer(index.doc_lengths, dtype=np.float32)
+        scores = np.zeros(len(lengths), dtype=np.float32)
+        average_length = index.total_length / index.doc_count
+        matched = []
+
+        for term in terms:
+            postings = index.postings.get(term)
+            if postings is None:
+                continue
+            slots = np.frombuffer(postings[0], dtype=np.uint32)
+            frequencies = np.frombuffer(postings[1], dtype=np.float32)
+            slot_lengths = lengths[slots]
+            live = slot_lengths > 0
+            document_frequency = int(np.count_nonzero(live))
+            if not document_frequency:
+                continue
+            idf = math.log(1 + (index.doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            length_norm = self.k1 * (1 - self.b + self.b * slot_lengths / average_length)
+            contribution = idf * frequencies * (self.k1 + 1) / (frequencies + length_norm)
+            # A term has at most one posting per slot, so plain fancy indexing accumulates correctly
+            live_slots = slots[live]
+            scores[live_slots] += contribution[live]
+            matched.append(live_slots)
+
+        if not matched:
+            return []
+        # Candidates come from the posting lists rather than a scan of every slot
+        candidates = np.unique(np.concatenate(matched)) if len(matched) > 1 else matched[0]
+
+        if not filters and len(candidates) > limit:
+            candidates = candidates[np.argpartition(scores[candidates], -limit)[-limit:]]
+        candidates = candidates[np.argsort(scores[candidates], kind="stable")[::-1]]
+
+        results = []
+        for slot in candidates.tolist():
+            if filters and not self._matches(slot, filters):
+                continue
+            results.append((self._slot_ids[slot], float(scores[slot])))
+            if len(results) == limit:
+                break
+        return results
+
+    def _matches(self, slot: int, filters: Dict[str, Any]) -> bool:
+        domain, topic, tags = self._facets[slot]
+        if "domain" in filters and filters["domain"] != domain:
+            return False
+        if "topic" in filters and filters["topic"] != topic:
+            return False
+        if "tags" in filters and tags.isdisjoint(filters["tags"]):
+            return False
+        return True
+
+    def highlight(self, text: str, query_terms: Set[str], language: str) -> Optional[str]:
+        """Mark query terms in a text, trimmed around the first match; None without a match"""
+        analyzer = self.analyzers.get(language)
+        if analyzer is None or not text:
+            return None
+
+        words = list(TOKEN_PATTERN.finditer(text))
+        matched = [position for position, match in enumerate(words) if analyzer.term(match.group()) in query_terms]
+        if not matched:
+            return None
+
+        first = max(0, matched[0] - HIGHLIGHT_WORDS // 3)
+        last = min(len(words), first + HIGHLIGHT_WORDS) - 1
+        start, end = words[first].start(), words[last].end()
+
+        pieces = []
+        cursor = start
+        for position in matched:
+            if position > last:
+                break
+            match = words[position]
+            pieces.append(text[cursor:match.start()])
+            pieces.append(f"{HIGHLIGHT_START}{match.group()}{HIGHLIGHT_STOP}")
+            cursor = match.end()
+        pieces.append(text[cursor:end])
+        return "".join(pieces)
+
+    def stats(self) -> Dict[str, Any]:
+        """Document and term counts per language"""
+        with self._lock:
+            return {
+                "documents": len(self._slots),
+                "removed_slots": self._removed,
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+                "languages": {
+                    language: {"documents": index.doc_count, "terms": len(index.postings)}
+                    for language, index in self._languages.items()
+                }
+            }
+
+    def save(self, path: str) -> None:
+        """Write a snapshot of the index for a fast restart"""
+        with self._lock:
+            if self._removed:
+                self.compact()
+            snapshot = {
+                "version": SNAPSHOT_VERSION,
+                "stemming": snowballstemmer is not None,
+                "k1": self.k1,
+                "b": self.b,
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+                "slot_ids": list(self._slot_ids),
+                "facets": [[domain, topic, sorted(tags)] for domain, topic, tags in self._facets],
+                "languages": {
+                    language: {
+                        "doc_lengths": index.doc_lengths.tobytes(),
+                        "total_length": index.total_length,
+                        "doc_count": index.doc_count,
+                        "postings": {
+                            term: (slots.tobytes(), frequencies.tobytes())
+                            for term, (slots, frequencies) in index.postings.items()
+                        }
+                    }
+                    for language, index in self._languages.items()
+                }
+            }
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # A private temporary file, so workers saving at the same time never interleave writes
+        with tempfile.NamedTemporaryFile("wb", dir=directory, prefix=".snapshot-", delete=False) as snapshot_file:
+            try:
+                pickle.dump(snapshot, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                snapshot_file.close()
+                os.unlink(snapshot_file.name)
+                raise
+        os.replace(snapshot_file.name, path)
+
+        logger.info("Search index snapshot saved", path=path, documents=len(snapshot["slot_ids"]))
+
+    @classmethod
+    def load(cls, path: str, languages: Iterable[str]) -> Optional["BM25Index"]:
+        """Restore an index snapshot; None when missing or built with different settings"""
+        languages = list(languages)
+        try:
+            with open(path, "rb") as snapshot_file:
+                snapshot = _SnapshotUnpickler(snapshot_file).load()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Discarding unreadable search index snapshot", path=path, error=str(e))
+            return None
+
+        if (snapshot.get("version") != SNAPSHOT_VERSION
+                or snapshot.get("stemming") != (snowballstemmer is not None)
+                or set(snapshot["languages"]) != set(languages)):
+            logger.info("Discarding outdated search index snapshot", path=path)
+            return None
+
+        index = cls(languages, k1=snapshot["k1"], b=snapshot["b"])
+        index.watermark = datetime.fromisoformat(snapshot["watermark"]) if snapshot["watermark"] else None
+        index._slot_ids = snapshot["slot_ids"]
+        index._slots = {context_id: slot for slot, context_id in enumerate(index._slot_ids)}
+        index._facets = [(domain, topic, frozenset(tags)) for domain, topic, tags in snapshot["facets"]]
+
+        for language, data in snapshot["languages"].items():
+            language_index = index._languages[language]
+            language_index.doc_lengths = _array("f", data["doc_lengths"])
+            language_index.total_length = data["total_length"]
+            language_index.doc_count = data["doc_count"]
+            language_index.postings = {
+                term: (_array("I", slots), _array("f", frequencies))
+                for term, (slots, frequencies) in data["postings"].items()
+            }
+
+        logger.info("Search index snapshot loaded", path=path, documents=len(index))
+        return index
@@ -0,0 +1,115 @@
+"""
+Fataplus Context Taxonomy
+In-memory taxonomy tree with materialised paths and subtree content counts
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SLUG_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(value: str) -> str:
+    """URL-safe slug of a taxonomy name or topic"""
+    ascii_value = unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode()
+    return SLUG_SEPARATORS.sub("-", ascii_value.lower()).strip("-")
+
+
+class TaxonomyTree:
+    """Taxonomy nodes linked into a tree, indexed by id and by (domain, slug)"""
+
+    def __init__(self, nodes: Iterable):
+        self.nodes: Dict[str, object] = {node.id: node for node in nodes}
+        self._by_slug: Dict[Tuple[str, str], str] = {}
+        self._roots: List[str] = []
+
+        for node in self.nodes.values():
+            node.children = []
+            if not node.slug:
+                node.slug = slugify(node.name.get("en") or next(iter(node.name.values()), ""))
+            self._by_slug.setdefault((node.domain.value, node.slug), node.id)
+
+        for node in self.nodes.values():
+            parent = self.nodes.get(node.parent_id) if node.parent_id else None
+            if parent is None:
+                self._roots.append(node.id)
+            else:
+                parent.children.append(node.id)
+
+        sort_key = lambda node_id: (self.nodes[node_id].domain.value, self._label(node_id))
+        self._roots.sort(key=sort_key)
+        for node in self.nodes.values():
+            node.children.sort(key=sort_key)
+
+        # Levels, paths and subtree counts follow from a pre-order walk, parents before children
+        self._order: List[str] = []
+        stack = [(node_id, None) for node_id in reversed(self._roots)]
+        while stack:
+            node_id, parent = stack.pop()
+            node = self.nodes[node_id]
+            node.level = parent.level + 1 if parent else 0
+            node.path = f"{parent.path}{node_id}/" if parent else f"/{node_id}/"
+            self._order.append(node_id)
+            stack.extend((child_id, node) for child_id in reversed(node.children))
+
+        # Nodes on a parent cycle are unreachable from any root; treat them as detached roots
+        visited = set(self._order)
+        for node_id, node in self.nodes.items():
+            if node_id not in visited:
+                node.level = 0
+                node.path = f"/{node_id}/"
+                node.children = [child for child in node.children if child in visited]
+                self._order.append(node_id)
+
+        for node_id in reversed(self._order):
+            node = self.nodes[node_id]
+            node.subtree_count = node.content_count + sum(self.nodes[child].subtree_count for child in node.children)
+
+    def _label(self, node_id: str) -> str:
+        name = self.nodes[node_id].name
+        return (name.get("en") or next(iter(name.values()), "")).casefold()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def get(self, node_id: str):
+        """Node by id"""
+        return self.nodes.get(node_id)
+
+    def by_slug(self, slug: str, domain: Optional[str] = None):
+        """Node by slug, within a domain when given"""
+        if domain:
+            return self.nodes.get(self._by_slug.get((domain, slug)))
+        for (node_domain, node_slug), node_id in self._by_slug.items():
+            if node_slug == slug:
+                return self.nodes[node_id]
+        return None
+
+    def resolve(self, reference: str, domain: Optional[str] = None):
+        """Node for an id, slug or topic name"""
+        return self.get(reference) or self.by_slug(slugify(reference), domain)
+
+    def ancestors(self, node_id: str) -> List:
+        """Ancestors of a node from the root down"""
+        node = self.nodes.get(node_id)
+        if node is None:
+            return []
+        return [self.nodes[ancestor_id] for ancestor_id in node.path.strip("/").split("/")[:-1]]
+
+    def subtree(self, domain: Optional[str] = None) -> Dict[str, object]:
+        """Nodes in pre-order, so every parent precedes its children"""
+        return {
+            node_id: self.nodes[node_id]
+            for node_id in self._order
+            if domain is None or self.nodes[node_id].domain.value == domain
+        }
+
+    def apply_count(self, node_id: str, delta: int):
+        """Adjust a node's content count and its ancestors' subtree counts"""
+        node = self.nodes[node_id]
+        applied = max(-node.content_count, delta)
+        node.content_count += applied
+        node.subtree_count += applied
+        for ancestor in self.ancestors(node_id):
+            ancestor.subtree_count += applied
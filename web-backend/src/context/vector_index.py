@@ -0,0 +1,552 @@
+"""
+Fataplus Context Vector Index
+Sentence embeddings of published contexts in a memory-mapped matrix with CPU similarity search
+"""
+
+import os
+import json
+import fcntl
+import threading
+from array import array
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from .search_index import document_fields
+
+logger = structlog.get_logger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+# Multilingual model covering the knowledge base languages, small enough for CPU inference
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+EMBEDDING_BATCH_SIZE = 32
+EMBEDDING_FLUSH_INTERVAL = 2.0
+
+# Rows scored per block by the brute-force scorer, bounding temporary memory
+SCORING_BLOCK_ROWS = 16384
+
+# Row count above which an IVF index is built, and inverted lists probed per query
+IVF_MIN_ROWS = 50_000
+IVF_PROBES = 8
+IVF_ITERATIONS = 10
+
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.bin"
+SCALES_FILE = "scales.bin"
+IVF_FILE = "ivf.npz"
+# Held by the one process that writes to an index directory; the others map it read-only
+WRITER_LOCK_FILE = "writer.lock"
+
+
+def primary_language(document, preferred: str) -> str:
+    """Language a document is embedded in: the preferred one when it has a title in it"""
+    titles = document.title or {}
+    if titles.get(preferred):
+        return preferred
+    return next((language for language, title in titles.items() if title), preferred)
+
+
+def embedding_text(document, language: str) -> str:
+    """Text embedded for a document: title, summary and tags"""
+    fields = document_fields(document, primary_language(document, language))
+    return ". ".join(text for text in (fields["title"], fields["summary"], fields["tags"]) if text)
+
+
+def acquire_writer_lock(directory: str) -> Optional[IO]:
+    """Take an index directory's writer lock without waiting, returning the held lock file or None"""
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(os.path.join(directory, WRITER_LOCK_FILE), "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def fuse_scores(lexical: List[Tuple[str, float]], semantic: List[Tuple[str, float]],
+                alpha: float = 0.5) -> List[Tuple[str, float]]:
+    """Combine min-max normalised BM25 and cosine scores, weighting the semantic side by alpha"""
+    def normalise(hits):
+        if not hits:
+            return {}
+        scores = [score for _, score in hits]
+        low, high = min(scores), max(scores)
+        span = high - low
+        return {context_id: (score - low) / span if span else 1.0 for context_id, score in hits}
+
+    lexical_scores = normalise(lexical)
+    semantic_scores = normalise(semantic)
+    fused = {
+        context_id: (1 - alpha) * lexical_scores.get(context_id, 0.0) + alpha * semantic_scores.get(context_id, 0.0)
+        for context_id in lexical_scores.keys() | semantic_scores.keys()
+    }
+    return sorted(fused.items(), key=lambda hit: hit[1], reverse=True)
+
+
+class ContextEmbedder:
+    """CPU sentence-embedding model, loaded on first use"""
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    # Imported here: torch and transformers dominate import time
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name, device="cpu")
+                    logger.info("Embedding model loaded", model=self.model_name)
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return self._load().get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into unit-length float32 vectors"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        vectors = self._load().encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True,
+            convert_to_numpy=True, show_progress_bar=False
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class VectorIndex:
+    """Embedding matrix with brute-force and optional IVF inner product search
+
+    Rows are append-only: updated documents are overwritten in place and removed
+    documents are zeroed, so a reader holding an older id list never maps a row to
+    the wrong document. Zeroed rows are reclaimed when the index is rebuilt.
+
+    A directory has a single writer, the process holding its writer lock; other
+    processes open it read-only and reopen it when the writer publishes new rows.
+    """
+
+    def __init__(self, dimension: int, directory: Optional[str] = None, dtype: str = "float32",
+                 model_name: str = DEFAULT_EMBEDDING_MODEL, read_only: bool = False):
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+
+        self.dimension = dimension
+        self.directory = directory
+        self.dtype = dtype
+        self.model_name = model_name
+        self.read_only = read_only
+        self._lock = threading.RLock()
+
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._capacity = 0
+        self._matrix = np.zeros((0, dimension), dtype=dtype)
+        # Per-row dequantisation scale for int8 storage
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[array] = []
+
+        # Latest updated_at of an indexed change, used to catch up after reopening
+        self.watermark: Optional[datetime] = None
+        # File identity of the id list this index was opened from
+        self._published: Optional[Tuple[int, int, int]] = None
+
+        if directory and not read_only:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, context_id: str) -> bool:
+        return context_id in self._rows
+
+    @classmethod
+    def open(cls, directory: str, dimension: int, dtype: str = "float32",
+             model_name: str = DEFAULT_EMBEDDING_MODEL, read_only: bool = False) -> "VectorIndex":
+        """Reopen an index directory, starting empty when it was built with other settings"""
+        index = cls(dimension, directory, dtype, model_name, read_only)
+        index._published = index._meta_signature()
+        try:
+            with open(os.path.join(directory, META_FILE)) as meta_file:
+                meta = json.load(meta_file)
+        except FileNotFoundError:
+            return index
+
+        if (meta.get("version") != INDEX_FORMAT_VERSION or meta.get("model") != model_name
+                or meta.get("dimension") != dimension or meta.get("dtype") != dtype):
+            if read_only:
+                # Left for the writer to discard and rebuild
+                return index
+            logger.info("Discarding vector index built with other settings", directory=directory)
+            for name in (META_FILE, VECTORS_FILE, SCALES_FILE, IVF_FILE):
+                if os.path.exists(os.path.join(directory, name)):
+                    os.remove(os.path.join(directory, name))
+            return index
+
+        with index._lock:
+            index._ids = meta["ids"]
+            index._rows = {context_id: row for row, context_id in enumerate(index._ids) if context_id is not None}
+            index.watermark = datetime.fromisoformat(meta["watermark"]) if meta.get("watermark") else None
+            if read_only:
+                index._map_read_only()
+            else:
+                index._reserve(len(index._ids))
+            index._live[:len(index._ids)] = [context_id is not None for context_id in index._ids]
+
+            ivf_path = os.path.join(directory, IVF_FILE)
+            if os.path.exists(ivf_path):
+                with np.load(ivf_path, allow_pickle=False) as ivf:
+                    index._centroids = ivf["centroids"]
+                    rows, offsets = ivf["rows"], ivf["offsets"]
+                    index._lists = [array("I", rows[offsets[i]:offsets[i + 1]].tolist())
+                                    for i in range(len(offsets) - 1)]
+
+        logger.info("Vector index opened", directory=directory, documents=len(index), read_only=read_only)
+        return index
+
+    def _meta_signature(self) -> Optional[Tuple[int, int, int]]:
+        # Every save replaces the file, so its inode changes even within one timestamp tick
+        try:
+            meta_stat = os.stat(os.path.join(self.directory, META_FILE))
+        except FileNotFoundError:
+            return None
+        return meta_stat.st_ino, meta_stat.st_mtime_ns, meta_stat.st_size
+
+    def changed_on_disk(self) -> bool:
+        """Whether the writer published a newer id list since this index was opened"""
+        return bool(self.directory) and self._meta_signature() != self._published
+
+    def _map_read_only(self):
+        """Map the backing files as written so far, which cover every published row"""
+        if not self._ids:
+            return
+        path = os.path.join(self.directory, VECTORS_FILE)
+        row_bytes = self.dimension * np.dtype(self.dtype).itemsize
+        capacity = os.path.getsize(path) // row_bytes
+        self._matrix = np.memmap(path, dtype=self.dtype, mode="r", shape=(capacity, self.dimension))
+        if self.dtype == "int8":
+            self._scales = np.memmap(os.path.join(self.directory, SCALES_FILE), dtype=np.float32,
+                                     mode="r", shape=(capacity,))
+        self._live = np.zeros(capacity, dtype=bool)
+        self._capacity = capacity
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("Vector index is open read-only")
+
+    def _reserve(self, rows: int):
+        """Grow the matrix, and its backing files, to hold at least this many rows"""
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, 2 * self._capacity, 1024)
+        self._matrix = self._grow(VECTORS_FILE, self._matrix, (capacity, self.dimension), self.dtype)
+        if self.dtype == "int8":
+            self._scales = self._grow(SCALES_FILE, self._scales, (capacity,), np.float32)
+        live = np.zeros(capacity, dtype=bool)
+        live[:len(self._live)] = self._live
+        self._live = live
+        self._capacity = capacity
+
+    def _grow(self, name: str, current: np.ndarray, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        if not self.directory:
+            grown = np.zeros(shape, dtype=dtype)
+            grown[:len(current)] = current
+            return grown
+
+        if isinstance(current, np.memmap):
+            current.flush()
+        path = os.path.join(self.directory, name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, "ab") as backing_file:
+            if backing_file.tell() < size:
+                backing_file.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _store(self, row: int, vector: np.ndarray):
+        if self.dtype == "int8":
+            scale = float(np.abs(vector).max()) / 127 or 1.0
+            self._matrix[row] = np.round(vector / scale).astype(np.int8)
+            self._scales[row] = scale
+        else:
+            self._matrix[row] = vector
+
+    def add(self, context_ids: List[str], vectors: np.ndarray, updated_at: Optional[datetime] = None):
+        """Insert or overwrite the vectors of documents"""
+        self._check_writable()
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(context_ids), self.dimension)
+        with self._lock:
+            self._reserve(len(self._ids) + len(context_ids))
+            for context_id, vector in zip(context_ids, vectors):
+                row = self._rows.get(context_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._ids.append(context_id)
+                    self._rows[context_id] = row
+                self._store(row, vector)
+                self._live[row] = True
+                if self._centroids is not None:
+                    self._lists[int(np.argmax(self._centroids @ vector))].append(row)
+            self._advance_watermark(updated_at)
+
+    def remove(self, context_id: str, updated_at: Optional[datetime] = None) -> bool:
+        """Zero a document's row so it no longer matches"""
+        self._check_writable()
+        with self._lock:
+            self._advance_watermark(updated_at)
+            row = self._rows.pop(context_id, None)
+            if row is None:
+                return False
+            self._ids[row] = None
+            self._live[row] = False
+            self._matrix[row] = 0
+            return True
+
+    def _advance_watermark(self, updated_at: Optional[datetime]):
+        if updated_at and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+
+    def _score(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        block = self._matrix[rows]
+        if self.dtype == "int8":
+            return (block.astype(np.float32) @ query) * self._scales[rows]
+        return block @ query
+
+    def search(self, vector: np.ndarray, limit: int = 20, probes: int = IVF_PROBES) -> List[Tuple[str, float]]:
+        """Get (context_id, cosine score) pairs for the rows closest to a unit-length query vector"""
+        query = np.asarray(vector, dtype=np.float32).reshape(self.dimension)
+        with self._lock:
+            if not self._rows or limit <= 0:
+                return []
+
+            if self._centroids is not None:
+                nearest = np.argsort(self._centroids @ query)[::-1][:probes]
+                rows = np.unique(np.concatenate([np.frombuffer(self._lists[i], dtype=np.uint32) for i in nearest]))
+                rows = rows[self._live[rows]]
+                scores = self._score(rows, query)
+            else:
+                count = len(self._ids)
+                rows = np.arange(count)
+                scores = np.concatenate([
+                    self._score(slice(start, min(start + SCORING_BLOCK_ROWS, count)), query)
+                    for start in range(0, count, SCORING_BLOCK_ROWS)
+                ])
+                rows = rows[self._live[:count]]
+                scores = scores[self._live[:count]]
+
+            if len(rows) > limit:
+                top = np.argpartition(scores, -limit)[-limit:]
+                rows, scores = rows[top], scores[top]
+            order = np.argsort(scores)[::-1]
+            return [(self._ids[row], float(score)) for row, score in zip(rows[order].tolist(), scores[order].tolist())]
+
+    def build_ivf(self, lists: Optional[int] = None, iterations: int = IVF_ITERATIONS, seed: int = 0):
+        """Cluster live rows with spherical k-means into inverted lists for approximate search"""
+        self._check_writable()
+        with self._lock:
+            rows = np.flatnonzero(self._live[:len(self._ids)])
+            if not len(rows):
+                return
+            lists = lists or max(1, int(np.sqrt(len(rows))))
+            vectors = self._score_vectors(rows)
+
+            generator = np.random.default_rng(seed)
+            centroids = vectors[generator.choice(len(rows), size=min(lists, len(rows)), replace=False)].copy()
+            for _ in range(iterations):
+                assignment = self._assign(vectors, centroids)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, vectors)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                # Empty clusters keep their previous centroid
+                centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+            assignment = self._assign(vectors, centroids)
+            order = np.argsort(assignment, kind="stable")
+            bounds = np.searchsorted(assignment[order], np.arange(len(centroids) + 1))
+            self._centroids = centroids.astype(np.float32)
+            self._lists = [array("I", rows[order[bounds[i]:bounds[i + 1]]].tolist()) for i in range(len(centroids))]
+            logger.info("Vector IVF index built", rows=len(rows), lists=len(centroids))
+
+    def _score_vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Dequantised float32 copies of rows"""
+        vectors = self._matrix[rows].astype(np.float32)
+        if self.dtype == "int8":
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(vectors[start:start + SCORING_BLOCK_ROWS] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), SCORING_BLOCK_ROWS)
+        ])
+
+    def save(self):
+        """Flush the matrix and atomically publish the id list readers map rows with"""
+        if not self.directory:
+            return
+        self._check_writable()
+        with self._lock:
+            for matrix in (self._matrix, self._scales):
+                if isinstance(matrix, np.memmap):
+                    matrix.flush()
+
+            if self._centroids is not None:
+                lengths = [len(rows) for rows in self._lists]
+                ivf_path = os.path.join(self.directory, IVF_FILE)
+                with open(f"{ivf_path}.tmp", "wb") as ivf_file:
+                    np.savez(
+                        ivf_file,
+                        centroids=self._centroids,
+                        rows=np.concatenate([np.frombuffer(rows, dtype=np.uint32) for rows in self._lists]),
+                        offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+                    )
+                os.replace(f"{ivf_path}.tmp", ivf_path)
+
+            meta = {
+                "version": INDEX_FORMAT_VERSION,
+                "model": self.model_name,
+                "dimension": self.dimension,
+                "dtype": self.dtype,
+                "count": len(self._ids),
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+                "ids": list(self._ids)
+            }
+
+        path = os.path.join(self.directory, META_FILE)
+        with open(f"{path}.tmp", "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(f"{path}.tmp", path)
+        self._published = self._meta_signature()
+
+    def stats(self) -> Dict[str, Any]:
+        """Row counts and storage settings"""
+        with self._lock:
+            return {
+                "documents": len(self._rows),
+                "rows": len(self._ids),
+                "dtype": self.dtype,
+                "read_only": self.read_only,
+                "ivf_lists": len(self._lists) if self._centroids is not None else 0,
+                "watermark": self.watermark.isoformat() if self.watermark else None
+            }
+
+
+class EmbeddingQueue:
+    """Collects published documents and embeds them in batches in the background
+
+    poll runs before each periodic flush, letting the owner queue changes made elsewhere.
+    """
+
+    def __init__(self, embedder: ContextEmbedder, index: VectorIndex, language: str,
+                 flush_interval: float = EMBEDDING_FLUSH_INTERVAL,
+                 on_flush: Optional[Callable[[List[str]], None]] = None,
+                 poll: Optional[Callable[[], None]] = None):
+        self.embedder = embedder
+        self.index = index
+        self.language = language
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.poll = poll
+        self._pending: Dict[str, Tuple[str, Optional[datetime]]] = {}
+        # Removals since the last save, published with the next flush
+        self._removed = False
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
+
+    def record(self, document):
+        """Queue a published document for embedding"""
+        with self._pending_lock:
+            self._pending[document.id] = (embedding_text(document, self.language), document.updated_at)
+        self.start()
+
+    def discard(self, context_id: str, updated_at: Optional[datetime] = None):
+        """Drop a document that is no longer published"""
+        with self._pending_lock:
+            self._pending.pop(context_id, None)
+        if self.index.remove(context_id, updated_at):
+            self._removed = True
+
+    def embed(self, documents: Iterable) -> int:
+        """Embed documents synchronously in model-sized batches"""
+        documents = list(documents)
+        for start in range(0, len(documents), self.embedder.batch_size):
+            batch = documents[start:start + self.embedder.batch_size]
+            vectors = self.embedder.encode([embedding_text(document, self.language) for document in batch])
+            self.index.add([document.id for document in batch], vectors,
+                           max((document.updated_at for document in batch if document.updated_at), default=None))
+        return len(documents)
+
+    def flush(self) -> int:
+        """Embed queued documents, returning how many were indexed"""
+        with self._flush_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                if self._removed:
+                    self._removed = False
+                    self.index.save()
+                return 0
+
+            try:
+                context_ids = list(pending)
+                vectors = self.embedder.encode([pending[context_id][0] for context_id in context_ids])
+            except Exception:
+                with self._pending_lock:
+                    for context_id, entry in pending.items():
+                        self._pending.setdefault(context_id, entry)
+                raise
+
+            self.index.add(context_ids, vectors,
+                           max((updated_at for _, updated_at in pending.values() if updated_at), default=None))
+            self._removed = False
+            self.index.save()
+            if self.on_flush:
+                self.on_flush(context_ids)
+            return len(context_ids)
+
+    def _flush_periodically(self):
+        """Periodically embed queued documents"""
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                if self.poll:
+                    self.poll()
+                self.flush()
+            except Exception as e:
+                logger.error("Context embedding flush failed", error=str(e))
+
+    def start(self):
+        """Start the background embedder if it is not running"""
+        if self._flush_thread is not None and self._flush_thread.is_alive():
+            return
+
+        with self._start_lock:
+            if self._flush_thread is None or not self._flush_thread.is_alive():
+                self._stop_event.clear()
+                self._flush_thread = threading.Thread(
+                    target=self._flush_periodically, name="context-embedding-flush", daemon=True
+                )
+                self._flush_thread.start()
+
+    def stop(self):
+        """Stop the background embedder and embed remaining documents"""
+        self._stop_event.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout=self.flush_interval + 1)
+            self._flush_thread = None
+
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("Context embedding flush on shutdown failed", error=str(e))
@@ -8,6 +8,9 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
 import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from typing import Dict, Any
 from datetime import datetime, timezone
 
@@ -21,10 +24,36 @@ from admin.routes import router as admin_router
 # Import security modules
 from security.cors_security import SecurityMiddleware
 from security.rate_limiting import RateLimitMiddleware
-from security.audit_logging import AuditLogger
-from security.session_management import SessionManager
 from security.jwt_auth import JWTAuthMiddleware
-from security.data_encryption import DataEncryption
+from security.rbac import RBACRequestScopeMiddleware
+from security.database_pool import get_database_pool, close_database_pools
+from security.password_hashing import password_hasher
+from security.oauth2_integration import oauth2_manager
+from security.service_registry import warm_up, shutdown_services, service_stats
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+MOTIA_SERVICE_URL = os.getenv("MOTIA_SERVICE_URL", "http://localhost:8001")
+WARM_UP_SERVICES = os.getenv("WARM_UP_SERVICES", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build service singletons concurrently at startup and release them on shutdown"""
+    if WARM_UP_SERVICES:
+        # A failed service is logged and retried on first use instead of blocking startup
+        app.state.warm_up = await warm_up()
+        for name, result in app.state.warm_up.items():
+            logger.info(f"Warm-up {name}: {result['status']} in {result['seconds'] * 1000:.1f}ms")
+
+    yield
+
+    shutdown_services()
+    await oauth2_manager.aclose()
+    password_hasher.shutdown()
+    close_database_pools()
+
 
 # Create FastAPI application
 app = FastAPI(
@@ -32,24 +61,16 @@ app = FastAPI(
     description="Multi-context SaaS platform for African agriculture with AI-powered insights",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
-# Configuration
-MOTIA_SERVICE_URL = os.getenv("MOTIA_SERVICE_URL", "http://localhost:8001")
-
-# Initialize security components
-security_middleware = SecurityMiddleware()
-rate_limit_middleware = RateLimitMiddleware()
-audit_logger = AuditLogger()
-session_manager = SessionManager()
-jwt_middleware = JWTAuthMiddleware()
-data_encryption = DataEncryption()
-
 # Security middleware stack
-app.add_middleware(jwt_middleware.__class__)
-app.add_middleware(security_middleware.__class__)
-app.add_middleware(rate_limit_middleware.__class__)
+app.add_middleware(JWTAuthMiddleware)
+app.add_middleware(SecurityMiddleware)
+app.add_middleware(RateLimitMiddleware)
+# One permission memo per request, shared by every RBAC check the request makes
+app.add_middleware(RBACRequestScopeMiddleware)
 
 # CORS middleware for frontend communication
 app.add_middleware(
@@ -172,12 +193,16 @@ async def health_check():
 
     # Check database connectivity
     try:
-        # This would check actual database connection
-        health_status["checks"]["database"] = "healthy"
+        database_pool = get_database_pool()
+        database_ok = await asyncio.to_thread(database_pool.health_check)
+        health_status["checks"]["database"] = "healthy" if database_ok else "unhealthy"
+        health_status["database_pool"] = database_pool.stats()
     except Exception:
         health_status["checks"]["database"] = "unhealthy"
         health_status["status"] = "degraded"
 
+    health_status["services"] = service_stats()
+
     # Check Redis connectivity
     try:
         # This would check actual Redis connection
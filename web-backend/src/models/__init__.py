@@ -1,7 +1,10 @@
 # Database models package
 # Contains SQLAlchemy models for the Fataplus application
 
-from .database import Base, engine, SessionLocal, get_db, create_tables, drop_tables
+from .database import (
+    Base, engine, SessionLocal, get_db, async_engine, AsyncSessionLocal, get_async_db,
+    create_tables, drop_tables
+)
 from .user import User
 from .organization import Organization
 
@@ -11,6 +14,9 @@ __all__ = [
     "engine",
     "SessionLocal",
     "get_db",
+    "async_engine",
+    "AsyncSessionLocal",
+    "get_async_db",
     "create_tables",
     "drop_tables",
     "User",
@@ -3,6 +3,7 @@ Database configuration and session management
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -23,9 +24,30 @@ engine = create_engine(
     max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", "10")),
 )
 
+# Async database URL (asyncpg driver), derived from DATABASE_URL unless set explicitly
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    DATABASE_URL.replace("postgresql+psycopg2://", "postgresql://", 1)
+    .replace("postgres://", "postgresql://", 1)
+    .replace("postgresql://", "postgresql+asyncpg://", 1)
+)
+
+# Create async SQLAlchemy engine for async route handlers
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=os.getenv("DATABASE_ECHO", "false").lower() == "true",
+    pool_pre_ping=True,
+    pool_recycle=300,
+    pool_size=int(os.getenv("DATABASE_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", "10")),
+)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create AsyncSessionLocal class; objects stay usable after commit
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
@@ -37,6 +59,11 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Dependency to get async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
@@ -3,7 +3,7 @@ Organization model for multi-tenancy
 """
 
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, UUID, Text, Float
+from sqlalchemy import Column, String, Boolean, DateTime, UUID, Text, Float, Index
 from .database import Base
 import uuid
 
@@ -11,6 +11,10 @@ class Organization(Base):
     """Organization model for multi-tenant architecture"""
 
     __tablename__ = "organizations"
+    __table_args__ = (
+        # Keyset pagination index for organization listings
+        Index("ix_organizations_created_at_id", "created_at", "id"),
+    )
 
     # Primary key
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -0,0 +1,90 @@
+"""
+Keyset pagination and row-count helpers for listing endpoints
+"""
+
+import base64
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Below this planner estimate an exact count is cheap enough to run instead
+APPROXIMATE_COUNT_THRESHOLD = int(os.getenv("APPROXIMATE_COUNT_THRESHOLD", "10000"))
+
+
+def encode_cursor(created_at: datetime, row_id: uuid.UUID) -> str:
+    """Encode a (created_at, id) position as an opaque cursor"""
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode an opaque cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), uuid.UUID(row_id)
+    except Exception as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+async def paginate(db: AsyncSession, stmt, model, cursor: Optional[str], limit: int,
+                   skip: Optional[int] = None) -> Tuple[List[Any], Optional[str]]:
+    """Fetch one page ordered by (created_at, id), returning the rows and the next cursor
+
+    skip is the deprecated offset parameter; offset pages are served in the same
+    order and return a cursor, so clients can switch to keyset paging mid-listing.
+    """
+    if cursor and skip:
+        raise ValueError("Use either cursor or skip, not both")
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) > tuple_(created_at, row_id))
+
+    stmt = stmt.order_by(model.created_at, model.id)
+    if skip:
+        stmt = stmt.offset(skip)
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = result.scalars().all()
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+async def count_rows(db: AsyncSession, stmt, approximate: bool = False) -> Tuple[int, bool]:
+    """Count rows matching a query, returning (total, is_estimate)"""
+    if approximate:
+        estimate = await estimate_rows(db, stmt)
+        if estimate is not None and estimate >= APPROXIMATE_COUNT_THRESHOLD:
+            return estimate, True
+
+    result = await db.execute(select(func.count()).select_from(stmt.order_by(None).subquery()))
+    return result.scalar_one(), False
+
+
+async def estimate_rows(db: AsyncSession, stmt) -> Optional[int]:
+    """Get the planner's row estimate for a query without executing it"""
+    try:
+        compiled = stmt.order_by(None).compile(
+            dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}
+        )
+    except Exception:
+        # Some bound values cannot be rendered inline; fall back to an exact count
+        return None
+
+    # Run as raw driver SQL so rendered literals are not parsed for bind parameters
+    connection = await db.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
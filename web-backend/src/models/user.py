@@ -3,7 +3,7 @@ User model for Fataplus platform
 """
 
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, UUID, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, DateTime, UUID, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 import uuid
@@ -12,6 +12,11 @@ class User(Base):
     """User model representing platform users"""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination indexes for user listings
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_organization_id_created_at_id", "organization_id", "created_at", "id"),
+    )
 
     # Primary key
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
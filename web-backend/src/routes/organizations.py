@@ -3,13 +3,15 @@ Organizations API routes
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 import uuid
 
-from ..models.database import get_db
+from ..models.database import get_async_db
 from ..models.organization import Organization
+from ..models.pagination import paginate, count_rows
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 
@@ -53,28 +55,45 @@ class OrganizationResponse(OrganizationBase):
 class OrganizationListResponse(BaseModel):
     organizations: List[OrganizationResponse]
     count: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_estimated: bool = False
 
 @router.get("/", response_model=OrganizationListResponse)
 async def get_organizations(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    total: Optional[str] = Query(None, pattern="^(exact|approximate)$"),
+    skip: Optional[int] = Query(None, ge=0, deprecated=True, description="Offset; use cursor instead"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all organizations with pagination"""
-    organizations = db.query(Organization).offset(skip).limit(limit).all()
-    return {
+    """Get all organizations with keyset pagination"""
+    stmt = select(Organization)
+    try:
+        organizations, next_cursor = await paginate(db, stmt, Organization, cursor, limit, skip)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    response = {
         "organizations": [OrganizationResponse.model_validate(org) for org in organizations],
-        "count": len(organizations)
+        "count": len(organizations),
+        "next_cursor": next_cursor
     }
+    if total:
+        response["total"], response["total_estimated"] = await count_rows(
+            db, stmt, approximate=total == "approximate"
+        )
+    return response
 
 @router.post("/", response_model=OrganizationResponse, status_code=status.HTTP_201_CREATED)
 async def create_organization(
     organization: OrganizationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new organization"""
     # Check if organization with same name already exists
-    existing_org = db.query(Organization).filter(Organization.name == organization.name).first()
+    result = await db.execute(select(Organization).where(Organization.name == organization.name).limit(1))
+    existing_org = result.scalars().first()
     if existing_org:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -96,15 +115,15 @@ async def create_organization(
     )
 
     db.add(db_org)
-    db.commit()
-    db.refresh(db_org)
+    await db.commit()
+    await db.refresh(db_org)
 
     return OrganizationResponse.model_validate(db_org)
 
 @router.get("/{org_id}", response_model=OrganizationResponse)
 async def get_organization(
     org_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific organization by ID"""
     try:
@@ -115,7 +134,7 @@ async def get_organization(
             detail="Invalid organization ID format"
         )
 
-    organization = db.query(Organization).filter(Organization.id == org_uuid).first()
+    organization = await db.get(Organization, org_uuid)
     if not organization:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -128,7 +147,7 @@ async def get_organization(
 async def update_organization(
     org_id: str,
     org_update: OrganizationUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an organization"""
     try:
@@ -139,7 +158,7 @@ async def update_organization(
             detail="Invalid organization ID format"
         )
 
-    organization = db.query(Organization).filter(Organization.id == org_uuid).first()
+    organization = await db.get(Organization, org_uuid)
     if not organization:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -149,10 +168,11 @@ async def update_organization(
     # Check for name conflicts if name is being updated
     update_data = org_update.model_dump(exclude_unset=True)
     if 'name' in update_data:
-        existing = db.query(Organization).filter(
+        result = await db.execute(select(Organization).where(
             Organization.name == update_data['name'],
             Organization.id != org_uuid
-        ).first()
+        ).limit(1))
+        existing = result.scalars().first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -163,15 +183,15 @@ async def update_organization(
     for field, value in update_data.items():
         setattr(organization, field, value)
 
-    db.commit()
-    db.refresh(organization)
+    await db.commit()
+    await db.refresh(organization)
 
     return OrganizationResponse.model_validate(organization)
 
 @router.delete("/{org_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_organization(
     org_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete an organization (soft delete by setting is_active to False)"""
     try:
@@ -182,7 +202,7 @@ async def delete_organization(
             detail="Invalid organization ID format"
         )
 
-    organization = db.query(Organization).filter(Organization.id == org_uuid).first()
+    organization = await db.get(Organization, org_uuid)
     if not organization:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -191,16 +211,18 @@ async def delete_organization(
 
     # Soft delete - just mark as inactive
     organization.is_active = False
-    db.commit()
+    await db.commit()
 
     return None
 
 @router.get("/{org_id}/users")
 async def get_organization_users(
     org_id: str,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    total: Optional[str] = Query(None, pattern="^(exact|approximate)$"),
+    skip: Optional[int] = Query(None, ge=0, deprecated=True, description="Offset; use cursor instead"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all users belonging to an organization"""
     try:
@@ -212,7 +234,7 @@ async def get_organization_users(
         )
 
     # Check if organization exists
-    organization = db.query(Organization).filter(Organization.id == org_uuid).first()
+    organization = await db.get(Organization, org_uuid)
     if not organization:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -222,11 +244,8 @@ async def get_organization_users(
     # Import User model here to avoid circular imports
     from ..models.user import User
 
-    users = db.query(User).filter(User.organization_id == org_uuid).offset(skip).limit(limit).all()
-
-    # Convert to response format
-    from .users import UserResponse
-    return {
-        "users": [UserResponse.model_validate(user) for user in users],
-        "count": len(users)
-    }
+    # Page through members with the shared users listing
+    from .users import list_users_page
+    return await list_users_page(
+        db, select(User).where(User.organization_id == org_uuid), cursor, limit, total, skip
+    )
@@ -3,17 +3,20 @@ Users API routes
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 import uuid
 from datetime import datetime
 
-from ..models.database import get_db
+from ..models.database import get_async_db
 from ..models.user import User
 from ..models.organization import Organization
+from ..models.pagination import paginate, count_rows
 from ..auth.dependencies import get_current_user, get_current_admin_user
-from ..auth.security import get_password_hash
+from ..auth.auth_service import auth_service
+from ..auth.security import get_password_hash_async
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -55,29 +58,49 @@ class UserResponse(UserBase):
 class UserListResponse(BaseModel):
     users: List[UserResponse]
     count: int
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_estimated: bool = False
+
+async def list_users_page(db: AsyncSession, stmt, cursor: Optional[str], limit: int,
+                          total: Optional[str] = None, skip: Optional[int] = None) -> dict:
+    """Fetch one page of users and, if requested, the total count"""
+    try:
+        users, next_cursor = await paginate(db, stmt, User, cursor, limit, skip)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    response = {
+        "users": [UserResponse.model_validate(user) for user in users],
+        "count": len(users),
+        "next_cursor": next_cursor
+    }
+    if total:
+        response["total"], response["total_estimated"] = await count_rows(
+            db, stmt, approximate=total == "approximate"
+        )
+    return response
 
 @router.get("/", response_model=UserListResponse)
 async def get_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    total: Optional[str] = Query(None, pattern="^(exact|approximate)$"),
+    skip: Optional[int] = Query(None, ge=0, deprecated=True, description="Offset; use cursor instead"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all users with pagination"""
-    users = db.query(User).offset(skip).limit(limit).all()
-    return {
-        "users": [UserResponse.model_validate(user) for user in users],
-        "count": len(users)
-    }
+    """Get all users with keyset pagination"""
+    return await list_users_page(db, select(User), cursor, limit, total, skip)
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Create a new user"""
     # Check if organization exists
-    organization = db.query(Organization).filter(Organization.id == uuid.UUID(user.organization_id)).first()
+    organization = await db.get(Organization, uuid.UUID(user.organization_id))
     if not organization:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -85,9 +108,10 @@ async def create_user(
         )
 
     # Check if username or email already exists
-    existing_user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         (User.username == user.username) | (User.email == user.email)
-    ).first()
+    ).limit(1))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -95,7 +119,7 @@ async def create_user(
         )
 
     # Hash the password
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
 
     # Create new user
     db_user = User(
@@ -111,15 +135,15 @@ async def create_user(
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return UserResponse.model_validate(db_user)
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific user by ID"""
     try:
@@ -130,7 +154,7 @@ async def get_user(
             detail="Invalid user ID format"
         )
 
-    user = db.query(User).filter(User.id == user_uuid).first()
+    user = await db.get(User, user_uuid)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -143,7 +167,7 @@ async def get_user(
 async def update_user(
     user_id: str,
     user_update: UserUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a user"""
     try:
@@ -154,7 +178,7 @@ async def update_user(
             detail="Invalid user ID format"
         )
 
-    user = db.query(User).filter(User.id == user_uuid).first()
+    user = await db.get(User, user_uuid)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -164,10 +188,11 @@ async def update_user(
     # Check for uniqueness conflicts if username or email is being updated
     update_data = user_update.model_dump(exclude_unset=True)
     if 'username' in update_data:
-        existing = db.query(User).filter(
+        result = await db.execute(select(User).where(
             User.username == update_data['username'],
             User.id != user_uuid
-        ).first()
+        ).limit(1))
+        existing = result.scalars().first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -175,10 +200,11 @@ async def update_user(
             )
 
     if 'email' in update_data:
-        existing = db.query(User).filter(
+        result = await db.execute(select(User).where(
             User.email == update_data['email'],
             User.id != user_uuid
-        ).first()
+        ).limit(1))
+        existing = result.scalars().first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -189,15 +215,16 @@ async def update_user(
     for field, value in update_data.items():
         setattr(user, field, value)
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    auth_service.invalidate_principal(user_id)
 
     return UserResponse.model_validate(user)
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a user (soft delete by setting is_active to False)"""
     try:
@@ -208,7 +235,7 @@ async def delete_user(
             detail="Invalid user ID format"
         )
 
-    user = db.query(User).filter(User.id == user_uuid).first()
+    user = await db.get(User, user_uuid)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -217,7 +244,8 @@ async def delete_user(
 
     # Soft delete - just mark as inactive
     user.is_active = False
-    db.commit()
+    await db.commit()
+    auth_service.invalidate_principal(user_id)
 
     return None
 
@@ -234,14 +262,15 @@ class LoginResponse(BaseModel):
 @router.post("/auth/login", response_model=LoginResponse)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """User login (simplified - no password hashing yet)"""
     # Find user by username or email
-    user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         (User.username == login_data.username_or_email) |
         (User.email == login_data.username_or_email)
-    ).first()
+    ).limit(1))
+    user = result.scalars().first()
 
     if not user or not user.is_active:
         raise HTTPException(
@@ -264,7 +293,7 @@ class RegisterRequest(UserBase):
 @router.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: RegisterRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """User registration"""
     # Check if organization exists
@@ -276,7 +305,7 @@ async def register(
             detail="Invalid organization ID format"
         )
 
-    organization = db.query(Organization).filter(Organization.id == org_uuid).first()
+    organization = await db.get(Organization, org_uuid)
     if not organization:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -284,9 +313,10 @@ async def register(
         )
 
     # Check if username or email already exists
-    existing_user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         (User.username == user_data.username) | (User.email == user_data.email)
-    ).first()
+    ).limit(1))
+    existing_user = result.scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -294,7 +324,7 @@ async def register(
         )
 
     # Create new user
-    # TODO: Add password hashing
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         organization_id=org_uuid,
         username=user_data.username,
@@ -304,11 +334,11 @@ async def register(
         phone=user_data.phone,
         role=user_data.role,
         is_active=user_data.is_active,
-        password_hash=user_data.password  # TODO: Hash password
+        password_hash=hashed_password
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return UserResponse.model_validate(db_user)
@@ -10,7 +10,8 @@ from pydantic import BaseModel, Field
 import structlog
 
 from .server_monitor import server_monitor
-from ..auth.auth_service import auth_service, User, Permission
+from auth.auth_service import User, Permission
+from auth.routes import get_current_user
 
 logger = structlog.get_logger(__name__)
 
@@ -45,7 +46,7 @@ class LogQuery(BaseModel):
 # Dependencies
 def require_server_permission():
     """Require server management permission"""
-    def permission_checker(current_user: User = Depends(auth_service.get_current_user)):
+    def permission_checker(current_user: User = Depends(get_current_user)):
         if not current_user.has_permission(Permission.MANAGE_SERVERS):
             raise HTTPException(
                 status_code=403,
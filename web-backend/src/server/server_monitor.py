@@ -14,6 +14,8 @@ import asyncio
 import aiohttp
 import structlog
 
+from security.service_registry import lazy_service
+
 logger = structlog.get_logger(__name__)
 
 
@@ -472,5 +474,5 @@ class ServerMonitor:
         return recommendations
 
 
-# Global server monitor instance
-server_monitor = ServerMonitor()
+# Global server monitor instance, built on first use
+server_monitor = lazy_service("server_monitor", ServerMonitor)
@@ -0,0 +1,13 @@
+"""
+Shared pytest configuration: import the backend the way the server does
+"""
+
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+# Application packages live under src/, shared security and migration modules at the root
+for path in (BACKEND_ROOT / "src", BACKEND_ROOT):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
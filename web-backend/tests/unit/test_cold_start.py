@@ -0,0 +1,109 @@
+"""
+Cold start regression tests for the main application
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from security.startup_profiler import SOURCE_ROOT, backend_env, parse_importtime, profile_imports, top_modules
+from security.service_registry import LazyService
+
+# Packages that must only load on first use, never while a worker imports the application
+DEFERRED_PACKAGES = ("sentence_transformers", "transformers", "torch")
+
+MISSING_MODULE = "ModuleNotFoundError: No module named"
+
+
+def require_application(stderr):
+    """Skip when the application needs a module this environment does not provide, failing instead in CI"""
+    missing = [line for line in stderr.splitlines() if line.startswith(MISSING_MODULE)]
+    if not missing:
+        return
+    message = f"Application cannot be imported here: {missing[-1]}"
+    if os.getenv("CI"):
+        pytest.fail(message)
+    pytest.skip(message)
+
+
+def test_import_defers_heavy_packages():
+    """Test importing the application leaves the deferred packages unloaded"""
+    try:
+        profile = profile_imports("main")
+    except RuntimeError as e:
+        require_application(str(e))
+        raise
+    loaded = {entry["module"].split(".")[0] for entry in profile["modules"]}
+    assert "main" in loaded
+    assert not loaded & set(DEFERRED_PACKAGES), (
+        f"Importing main loaded {sorted(loaded & set(DEFERRED_PACKAGES))}; "
+        f"slowest modules: {[(entry['module'], round(entry['self_seconds'], 3)) for entry in top_modules(profile, 5)]}"
+    )
+
+
+def test_import_builds_no_services():
+    """Test importing the application registers services without constructing any of them"""
+    result = subprocess.run(
+        [sys.executable, "-c",
+         "import json, main; from security.service_registry import service_stats; "
+         "print(json.dumps(service_stats()))"],
+        cwd=str(SOURCE_ROOT),
+        env=backend_env(),
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    if result.returncode != 0:
+        require_application(result.stderr)
+    assert result.returncode == 0, result.stderr
+    services = json.loads(result.stdout.strip().splitlines()[-1])
+    assert {"auth_service", "context_manager"} <= set(services)
+    assert not [name for name, state in services.items() if state["initialized"]]
+    assert all(state["init_seconds"] is None for state in services.values())
+
+
+def test_missing_modules_fail_in_ci(monkeypatch):
+    """Test a missing module skips locally but fails the run in CI"""
+    stderr = "Traceback (most recent call last):\nModuleNotFoundError: No module named 'ldap3'"
+    require_application("ImportError: something else")
+
+    monkeypatch.delenv("CI", raising=False)
+    with pytest.raises(pytest.skip.Exception):
+        require_application(stderr)
+
+    monkeypatch.setenv("CI", "true")
+    with pytest.raises(pytest.fail.Exception):
+        require_application(stderr)
+
+
+def test_lazy_service_builds_once():
+    """Test a lazy service is built on first attribute access only"""
+    calls = []
+
+    class Service:
+        def __init__(self):
+            calls.append(1)
+            self.value = 42
+
+    service = LazyService("test", Service)
+    assert not service.initialized
+    assert service.value == 42
+    assert service.value == 42
+    assert service.initialized
+    assert len(calls) == 1
+
+
+def test_parse_importtime():
+    """Test importtime output is parsed into per-module costs"""
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       150 |        150 |   _io",
+        "import time:      2000 |       2150 | main",
+    ])
+    modules = parse_importtime(output)
+    assert [entry["module"] for entry in modules] == ["_io", "main"]
+    assert modules[1]["self_seconds"] == 0.002
+    assert modules[1]["cumulative_seconds"] == 0.00215
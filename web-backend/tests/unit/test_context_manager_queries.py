@@ -0,0 +1,246 @@
+"""
+Unit tests for the SQL the context manager issues, against a recording database
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from context import context_manager as context_manager_module
+from context.context_manager import ContextManager
+
+
+class RecordingCursor:
+    """Records statements and answers them with the first response whose marker they contain"""
+
+    def __init__(self, database):
+        self.database = database
+        self.connection = database
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.database.statements.append((sql, params))
+        self.rows = next((rows for marker, rows in self.database.responses if marker in sql), [])
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class RecordingDatabase:
+
+    def __init__(self, responses=()):
+        self.responses = list(responses)
+        self.statements = []
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def commit(self):
+        pass
+
+
+def context_row(context_id, **overrides):
+    row = {
+        "id": context_id,
+        "domain": "agritech",
+        "topic": "pests",
+        "subtopic": None,
+        "title": {"en": f"Title of {context_id}"},
+        "content": {"summary": {"en": "Summary"}},
+        "metadata": {},
+        "status": "published",
+        "author": "user_1",
+        "reviewer": None,
+        "tags": ["maize"],
+        "related_contexts": [],
+        "quality_score": 0.8,
+        "created_at": datetime(2026, 10, 1, tzinfo=timezone.utc),
+        "updated_at": datetime(2026, 10, 2, tzinfo=timezone.utc),
+        "published_at": None
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def make_manager(monkeypatch):
+    """Build a context manager over a recording database and no Redis"""
+    monkeypatch.setattr(ContextManager, "_init_redis", lambda self: None)
+
+    def build(*responses):
+        database = RecordingDatabase(responses)
+        monkeypatch.setattr(context_manager_module, "get_database_pool", lambda: database)
+        return ContextManager(), database
+
+    return build
+
+
+def columns(*names):
+    return [{"column_name": name} for name in names]
+
+
+def test_fulltext_search_uses_language_column_and_collects_highlights(make_manager):
+    """Test ranked search reads search_{lang} and turns headlines into highlights"""
+    row = context_row(
+        "ctx_1", relevance_score=0.5,
+        title_headline="Fall <mark>armyworm</mark> control",
+        summary_headline="No match here",
+        details_headline="Scout <mark>early</mark> ... spray <mark>late</mark>",
+        matched_tags=["maize"]
+    )
+    manager, database = make_manager(
+        ("information_schema.columns", columns("id", "search_en", "search_fr")),
+        ("WITH ranked AS", [row])
+    )
+
+    results = manager._search_fulltext("armyworm", {"domain": "agritech"}, "en", 10)
+
+    sql, params = database.statements[-1]
+    assert "search_en @@ q" in sql
+    assert "domain = %s" in sql
+    assert params[1:4] == ["english", "armyworm", "agritech"]
+    assert results[0].document.id == "ctx_1"
+    assert results[0].relevance_score == 0.5
+    assert results[0].matched_terms == ["title", "details", "tags"]
+    assert results[0].highlights["details"] == ["Scout <mark>early</mark>", "spray <mark>late</mark>"]
+
+
+def test_fulltext_search_computes_vectors_when_migration_was_skipped(make_manager):
+    """Test a missing search column falls back to an inline vector expression"""
+    manager, database = make_manager(
+        ("information_schema.columns", columns("id", "title", "content")),
+        ("WITH ranked AS", [context_row("ctx_1", relevance_score=0.1)])
+    )
+
+    assert len(manager._search_fulltext("maize", {}, "fr", 10)) == 1
+    sql, _ = database.statements[-1]
+    assert "search_fr" not in sql
+    assert "to_tsvector('french'::regconfig, COALESCE(title->>'fr', ''))" in sql
+    assert manager._schema_warnings == {"search_fr"}
+
+
+def test_fulltext_search_without_query_lists_recent_contexts(make_manager):
+    """Test an empty query lists published contexts by recency instead of ranking"""
+    manager, database = make_manager(
+        ("information_schema.columns", columns("id", "search_en")),
+        ("ORDER BY updated_at DESC LIMIT", [context_row("ctx_1", relevance_score=0.0)])
+    )
+
+    results = manager._search_fulltext("  ", {"tags": ["maize"]}, "en", 5)
+
+    sql, params = database.statements[-1]
+    assert "websearch_to_tsquery" not in sql
+    assert "tags && %s" in sql
+    assert params == [["maize"], 5]
+    assert results[0].matched_terms == []
+
+
+def test_stats_read_rollups_and_are_cached(make_manager):
+    """Test statistics come from the rollup tables and are served from the local cache"""
+    manager, database = make_manager(
+        ("information_schema.columns", columns("domain", "status", "topic", "context_count")),
+        ("FROM context_stats_rollup WHERE context_count > 0", [{"total_contexts": 3, "published_contexts": 2}]),
+        ("FROM context_stats_rollup WHERE status", [{"domain": "agritech", "context_count": 2, "avg_quality": 0.7}]),
+        ("FROM context_activity_daily", [{"date": "2026-10-18", "contexts_created": 1}])
+    )
+
+    stats = manager.get_context_stats()
+    assert stats["overall"] == {"total_contexts": 3, "published_contexts": 2}
+    assert stats["by_domain"][0]["domain"] == "agritech"
+    assert stats["activity"] == [{"date": "2026-10-18", "contexts_created": 1}]
+    assert not any("FROM contexts" in sql for sql, _ in database.statements)
+
+    statements = len(database.statements)
+    assert manager.get_context_stats() is stats
+    assert len(database.statements) == statements
+
+    manager._stats.clear()
+    manager.get_context_stats()
+    assert len(database.statements) > statements
+
+
+def test_stats_scan_contexts_when_rollups_are_missing(make_manager):
+    """Test statistics fall back to aggregating contexts without the rollup tables"""
+    manager, database = make_manager(
+        ("information_schema.columns", []),
+        ("AVG(quality_score) as avg_quality_score", [{"total_contexts": 5}]),
+        ("GROUP BY domain", []),
+        ("GROUP BY created_at::date", [])
+    )
+
+    stats = manager.get_context_stats()
+    assert stats["overall"] == {"total_contexts": 5}
+    assert not any("context_stats_rollup" in sql for sql, _ in database.statements[1:])
+    assert database.statements[-1][1] == (context_manager_module.CONTEXT_STATS_ACTIVITY_DAYS,)
+    assert manager._schema_warnings == {"context_stats_rollup"}
+
+
+def test_catch_up_rescans_the_overlap_and_skips_applied_versions(make_manager):
+    """Test rows committed behind the watermark are picked up once and re-scanned rows are not reapplied"""
+    watermark = datetime(2026, 10, 2, tzinfo=timezone.utc)
+    late = context_row("ctx_late", updated_at=watermark - timedelta(seconds=30))
+    manager, database = make_manager(("WHERE updated_at >=", [late, context_row("ctx_1")]))
+    added, removed, applied = [], [], {}
+
+    manager._catch_up(watermark, added.append, lambda *args: removed.append(args), applied)
+    manager._catch_up(watermark, added.append, lambda *args: removed.append(args), applied)
+
+    assert database.statements[0][1] == (watermark - manager.catch_up_overlap,)
+    assert [document.id for document in added] == ["ctx_late", "ctx_1"]
+    assert removed == []
+
+    manager._catch_up(watermark + manager.catch_up_overlap * 2, added.append, removed.append, applied)
+    assert applied == {}
+
+
+def test_list_contexts_pages_by_keyset_without_content(make_manager):
+    """Test the listing filters, orders on the sort key and id, and hands out a cursor for the next page"""
+    rows = [context_row(f"ctx_{number}", updated_at=datetime(2026, 10, 10 - number, tzinfo=timezone.utc))
+            for number in range(1, 4)]
+    for row in rows:
+        del row["content"]
+    manager, database = make_manager(("ORDER BY updated_at DESC", rows))
+
+    contexts, next_cursor = manager.list_contexts(status=context_manager_module.ContentStatus.PUBLISHED, limit=2)
+
+    sql, params = database.statements[-1]
+    assert "WHERE status = %s" in sql and "content," not in sql
+    assert "ORDER BY updated_at DESC, id DESC LIMIT %s" in sql
+    assert params == ["published", 3]
+    assert [context["id"] for context in contexts] == ["ctx_1", "ctx_2"]
+    assert "content" not in contexts[0]
+
+    manager.list_contexts(status=context_manager_module.ContentStatus.PUBLISHED, cursor=next_cursor, limit=2)
+    sql, params = database.statements[-1]
+    assert "(updated_at, id) < (%s, %s)" in sql
+    assert params == ["published", rows[1]["updated_at"], "ctx_2", 3]
+
+
+def test_list_cursor_round_trips_and_is_bound_to_its_sort(make_manager):
+    """Test a cursor decodes to the position it encodes and is rejected under another sort"""
+    manager, _ = make_manager()
+    updated_at = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)
+
+    cursor = manager._encode_list_cursor("updated_at", "desc", updated_at, "ctx_1")
+    assert manager._decode_list_cursor(cursor, "updated_at", "desc") == (updated_at, "ctx_1")
+
+    score_cursor = manager._encode_list_cursor("quality_score", "asc", 0.75, "ctx_2")
+    assert manager._decode_list_cursor(score_cursor, "quality_score", "asc") == (0.75, "ctx_2")
+
+    for sort_by, sort_order in (("updated_at", "asc"), ("created_at", "desc")):
+        with pytest.raises(ValueError):
+            manager.list_contexts(sort_by=sort_by, sort_order=sort_order, cursor=cursor)
+    with pytest.raises(ValueError):
+        manager.list_contexts(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        manager.list_contexts(sort_by="title")
@@ -0,0 +1,71 @@
+"""
+Unit tests for context route registration against a stub context manager
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from auth.routes import get_current_user
+from context import routes
+
+
+class StubContextManager:
+    """Records listing calls; any context lookup by id is a routing error"""
+
+    def __init__(self):
+        self.list_calls = []
+
+    def list_contexts(self, **kwargs):
+        self.list_calls.append(kwargs)
+        if kwargs["sort_by"] not in ("updated_at", "created_at", "quality_score"):
+            raise ValueError(f"Unsupported sort field: {kwargs['sort_by']}")
+        return [{"id": "ctx_1"}], "next-page"
+
+    def get_context_stats(self):
+        return {"total_contexts": 1}
+
+    def get_context(self, context_id, *args, **kwargs):
+        raise AssertionError(f"Routed to GET /{{context_id}} with {context_id!r}")
+
+
+@pytest.fixture
+def stub_manager(monkeypatch):
+    manager = StubContextManager()
+    monkeypatch.setattr(routes, "context_manager", manager)
+    return manager
+
+
+@pytest.fixture
+def client(stub_manager):
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id="user_1")
+    return TestClient(app)
+
+
+def test_list_route_is_not_shadowed_by_context_lookup(client, stub_manager):
+    """Test /context/list reaches the keyset listing instead of GET /{context_id}"""
+    response = client.get("/context/list", params={"limit": 5, "sort_by": "created_at", "sort_order": "asc"})
+
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] == "next-page"
+    assert stub_manager.list_calls[0]["limit"] == 5
+    assert stub_manager.list_calls[0]["sort_by"] == "created_at"
+
+
+def test_list_route_rejects_invalid_sort_with_bad_request(client):
+    """Test listing argument errors surface as 400 responses"""
+    response = client.get("/context/list", params={"sort_by": "content"})
+
+    assert response.status_code == 400
+
+
+def test_stats_overview_route(client):
+    """Test /context/stats/overview reaches the stats handler"""
+    response = client.get("/context/stats/overview")
+
+    assert response.status_code == 200
+    assert response.json()["stats"] == {"total_contexts": 1}
@@ -0,0 +1,83 @@
+"""
+Unit tests for the in-process BM25 context search index
+"""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from context.search_index import BM25Index
+
+LANGUAGES = ["en", "fr", "sw", "pt", "ar", "mg"]
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def make_document(context_id, title, summary="", tags=(), domain="agritech", language="en", minutes=0):
+    return SimpleNamespace(
+        id=context_id,
+        domain=SimpleNamespace(value=domain),
+        topic="crops",
+        tags=list(tags),
+        title={language: title},
+        content={"summary": {language: summary}},
+        updated_at=NOW + timedelta(minutes=minutes)
+    )
+
+
+def make_index():
+    index = BM25Index(LANGUAGES)
+    index.add(make_document("ctx_armyworm", "Controlling fall armyworm in maize",
+                            "Integrated pest management for maize farmers", tags=["pests"]))
+    index.add(make_document("ctx_rice", "Rice irrigation scheduling", "Saving water in paddy fields",
+                            domain="agribusiness"))
+    index.add(make_document("ctx_chenille", "Lutte contre la chenille légionnaire",
+                            "Gestion des ravageurs du maïs", language="fr"))
+    return index
+
+
+def test_search_ranks_title_matches_first():
+    """Test stemmed query terms match and title hits outrank summary hits"""
+    index = make_index()
+    index.add(make_document("ctx_storage", "Grain storage", "Drying maize before storage"))
+
+    results = index.search("maize pests", "en")
+    assert [context_id for context_id, _ in results] == ["ctx_armyworm", "ctx_storage"]
+    assert index.search("ravageur", "fr")[0][0] == "ctx_chenille"
+    assert index.search("maize", "en", filters={"domain": "agribusiness"}) == []
+
+
+def test_updates_and_removals_are_incremental():
+    """Test re-adding replaces the earlier version and removed documents stop matching"""
+    index = make_index()
+    index.add(make_document("ctx_rice", "Rice drying", "Post-harvest handling", minutes=5))
+
+    assert index.search("irrigation", "en") == []
+    assert index.search("drying", "en")[0][0] == "ctx_rice"
+    assert index.remove("ctx_armyworm", NOW + timedelta(minutes=10))
+    assert index.search("armyworm", "en") == []
+    assert index.watermark == NOW + timedelta(minutes=10)
+
+    index.compact()
+    assert len(index) == 2
+    assert index.search("drying", "en")[0][0] == "ctx_rice"
+
+
+def test_snapshot_round_trip(tmp_path):
+    """Test a saved snapshot restores the same results"""
+    index = make_index()
+    path = str(tmp_path / "index.snapshot")
+    index.save(path)
+
+    restored = BM25Index.load(path, LANGUAGES)
+    assert restored is not None
+    assert restored.search("maize", "en") == index.search("maize", "en")
+    assert restored.watermark == index.watermark
+    assert BM25Index.load(str(tmp_path / "missing.snapshot"), LANGUAGES) is None
+
+
+def test_highlight_marks_query_terms():
+    """Test highlights wrap words matching the analysed query terms"""
+    index = make_index()
+    terms = set(index.query_terms("pests", "en"))
+
+    assert index.highlight("Integrated pest management", terms, "en") == "Integrated <mark>pest</mark> management"
+    assert index.highlight("Rice irrigation", terms, "en") is None
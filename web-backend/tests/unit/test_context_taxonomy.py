@@ -0,0 +1,75 @@
+"""
+Unit tests for the materialised context taxonomy tree
+"""
+
+from types import SimpleNamespace
+
+from context.taxonomy import TaxonomyTree, slugify
+
+
+def make_node(node_id, name, parent_id=None, domain="agritech", content_count=0):
+    return SimpleNamespace(
+        id=node_id,
+        name={"en": name},
+        parent_id=parent_id,
+        domain=SimpleNamespace(value=domain),
+        level=None,
+        slug=None,
+        path=None,
+        children=None,
+        content_count=content_count
+    )
+
+
+def make_tree():
+    # Children listed before their parents, as an unordered query returns them
+    return TaxonomyTree([
+        make_node("tax_armyworm", "Fall Armyworm", "tax_pests", content_count=3),
+        make_node("tax_pests", "Pests", "tax_crops", content_count=1),
+        make_node("tax_maize", "Maize", "tax_crops", content_count=2),
+        make_node("tax_crops", "Crops"),
+        make_node("tax_markets", "Markets", domain="agribusiness", content_count=4)
+    ])
+
+
+def test_tree_orders_parents_first_with_paths_and_subtree_counts():
+    """Test pre-order traversal, materialised paths and rolled-up counts"""
+    tree = make_tree()
+
+    assert list(tree.subtree("agritech")) == ["tax_crops", "tax_maize", "tax_pests", "tax_armyworm"]
+    assert tree.get("tax_armyworm").path == "/tax_crops/tax_pests/tax_armyworm/"
+    assert tree.get("tax_armyworm").level == 2
+    assert tree.get("tax_crops").subtree_count == 6
+    assert [node.id for node in tree.ancestors("tax_armyworm")] == ["tax_crops", "tax_pests"]
+
+
+def test_resolve_by_id_slug_or_topic():
+    """Test nodes resolve by id, by slug within a domain, and by topic name"""
+    tree = make_tree()
+
+    assert slugify("Fall Armyworm") == "fall-armyworm"
+    assert tree.resolve("tax_maize").id == "tax_maize"
+    assert tree.resolve("fall-armyworm", "agritech").id == "tax_armyworm"
+    assert tree.resolve("Fall Armyworm").id == "tax_armyworm"
+    assert tree.resolve("markets", "agritech") is None
+
+
+def test_apply_count_updates_ancestors_and_never_goes_negative():
+    """Test count deltas propagate up the tree and are clamped at zero"""
+    tree = make_tree()
+
+    tree.apply_count("tax_armyworm", 2)
+    assert tree.get("tax_pests").subtree_count == 6
+    assert tree.get("tax_crops").subtree_count == 8
+
+    tree.apply_count("tax_pests", -5)
+    assert tree.get("tax_pests").content_count == 0
+    assert tree.get("tax_crops").subtree_count == 7
+
+
+def test_parent_cycles_become_detached_roots():
+    """Test nodes on a parent cycle are still listed instead of looping"""
+    tree = TaxonomyTree([make_node("tax_a", "A", "tax_b"), make_node("tax_b", "B", "tax_a")])
+
+    assert set(tree.subtree()) == {"tax_a", "tax_b"}
+    assert tree.get("tax_a").path == "/tax_a/"
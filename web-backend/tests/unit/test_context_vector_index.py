@@ -0,0 +1,123 @@
+"""
+Unit tests for the context vector index and hybrid score fusion
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from context.vector_index import EmbeddingQueue, VectorIndex, acquire_writer_lock, fuse_scores
+
+DIMENSION = 16
+
+
+def unit_vectors(count, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class KeywordEmbedder:
+    """Embeds texts by hashing their words, standing in for the sentence model"""
+
+    batch_size = 2
+    model_name = "keyword"
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(len(texts))
+        vectors = np.zeros((len(texts), DIMENSION), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().replace(".", " ").split():
+                vectors[row, sum(map(ord, word)) % DIMENSION] += 1
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "int8"])
+def test_brute_force_and_ivf_find_nearest(tmp_path, dtype):
+    """Test exact and IVF search return the stored row closest to the query"""
+    vectors = unit_vectors(500)
+    index = VectorIndex(DIMENSION, str(tmp_path), dtype=dtype, model_name="test")
+    index.add([f"ctx_{row}" for row in range(500)], vectors)
+
+    assert index.search(vectors[42], 1)[0][0] == "ctx_42"
+    index.build_ivf(lists=8)
+    assert index.search(vectors[42], 1, probes=8)[0][0] == "ctx_42"
+
+    assert index.remove("ctx_42")
+    assert "ctx_42" not in [context_id for context_id, _ in index.search(vectors[42], 5)]
+
+
+def test_reopen_restores_rows_and_watermark(tmp_path):
+    """Test a saved index directory reopens with its vectors, and other settings start empty"""
+    vectors = unit_vectors(10)
+    watermark = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    index = VectorIndex(DIMENSION, str(tmp_path), model_name="test")
+    index.add([f"ctx_{row}" for row in range(10)], vectors, updated_at=watermark)
+    index.remove("ctx_3")
+    index.save()
+
+    reopened = VectorIndex.open(str(tmp_path), DIMENSION, model_name="test")
+    assert len(reopened) == 9
+    assert reopened.watermark == watermark
+    assert reopened.search(vectors[7], 1)[0][0] == "ctx_7"
+    assert len(VectorIndex.open(str(tmp_path), DIMENSION, model_name="other")) == 0
+
+
+def test_single_writer_and_read_only_reopen(tmp_path):
+    """Test one process holds the writer lock and readers see rows once the writer saves"""
+    writer_lock = acquire_writer_lock(str(tmp_path))
+    assert writer_lock is not None
+    assert acquire_writer_lock(str(tmp_path)) is None
+
+    vectors = unit_vectors(20)
+    writer = VectorIndex.open(str(tmp_path), DIMENSION, model_name="test")
+    writer.add([f"ctx_{row}" for row in range(10)], vectors[:10])
+    writer.save()
+
+    reader = VectorIndex.open(str(tmp_path), DIMENSION, model_name="test", read_only=True)
+    assert reader.search(vectors[4], 1)[0][0] == "ctx_4"
+    assert not reader.changed_on_disk()
+    with pytest.raises(RuntimeError):
+        reader.add(["ctx_new"], vectors[:1])
+
+    writer.add([f"ctx_{row}" for row in range(10, 20)], vectors[10:])
+    writer.save()
+    assert reader.changed_on_disk()
+    reader = VectorIndex.open(str(tmp_path), DIMENSION, model_name="test", read_only=True)
+    assert reader.search(vectors[15], 1)[0][0] == "ctx_15"
+
+    writer_lock.close()
+    next_lock = acquire_writer_lock(str(tmp_path))
+    assert next_lock is not None
+    next_lock.close()
+
+
+def test_embedding_queue_batches_published_documents():
+    """Test queued documents are embedded in one call and discarded ones are removed"""
+    embedder = KeywordEmbedder()
+    index = VectorIndex(DIMENSION, model_name=embedder.model_name)
+    queue = EmbeddingQueue(embedder, index, "en", flush_interval=60)
+
+    for context_id, title in [("ctx_maize", "maize armyworm"), ("ctx_rice", "rice irrigation")]:
+        queue.record(SimpleNamespace(id=context_id, title={"en": title}, content={}, tags=[], updated_at=None))
+    assert queue.flush() == 2
+    assert embedder.calls == [2]
+    assert index.search(embedder.encode(["rice irrigation"])[0], 1)[0][0] == "ctx_rice"
+
+    queue.discard("ctx_rice")
+    assert "ctx_rice" not in index
+    queue.stop()
+
+
+def test_fuse_scores_weights_normalised_scores():
+    """Test hybrid fusion favours documents found by both retrievers"""
+    lexical = [("ctx_both", 8.0), ("ctx_lexical", 10.0), ("ctx_low", 2.0)]
+    semantic = [("ctx_both", 0.9), ("ctx_semantic", 0.95), ("ctx_low", 0.1)]
+
+    fused = fuse_scores(lexical, semantic, alpha=0.5)
+    assert fused[0][0] == "ctx_both"
+    assert dict(fused)["ctx_low"] == 0.0
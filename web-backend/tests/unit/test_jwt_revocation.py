@@ -0,0 +1,108 @@
+"""
+Unit tests for the verified token cache and the Bloom-filtered revocation checks
+"""
+
+import importlib
+import logging
+import sys
+import time
+import types
+
+import fakeredis
+import pytest
+
+
+@pytest.fixture
+def jwt_auth(monkeypatch):
+    """Import security.jwt_auth with stand-ins for the hyphenated infrastructure modules authentication needs"""
+    monkeypatch.setitem(sys.modules, "infrastructure.docker.config_management",
+                        types.SimpleNamespace(get_config=lambda: None))
+    monkeypatch.setitem(sys.modules, "infrastructure.logging.logging_config",
+                        types.SimpleNamespace(get_logger=lambda name, *args: logging.getLogger(name)))
+    return importlib.import_module("security.jwt_auth")
+
+
+@pytest.fixture
+def redis_client(monkeypatch, jwt_auth):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(jwt_auth, "redis_client", client)
+    return client
+
+
+@pytest.fixture
+def manager(jwt_auth, redis_client):
+    return jwt_auth.JWTManager(secret_key="test-secret")
+
+
+def access_token(manager, user_id="user_1"):
+    token, _ = manager.generate_access_token(user_id, "tenant_1", "amina", "amina@example.com", ["user"], ["read"],
+                                             auth_method="password")
+    return token
+
+
+def test_verified_tokens_skip_signature_checks(monkeypatch, jwt_auth, manager):
+    """Test a token's signature is verified once and its payload reused afterwards"""
+    decodes = []
+    decode = jwt_auth.jwt.decode
+    monkeypatch.setattr(jwt_auth.jwt, "decode", lambda *args, **kwargs: decodes.append(1) or decode(*args, **kwargs))
+    token = access_token(manager)
+
+    first, second = manager.decode_token(token), manager.decode_token(token)
+
+    assert first.is_valid and second.is_valid
+    assert second.payload is first.payload
+    assert len(decodes) == 1
+    assert not manager.decode_token(token[:-2] + "xx").is_valid
+
+
+def test_revoked_jti_is_rejected_even_when_cached(jwt_auth, manager):
+    """Test the revocation check still runs for payloads served from the cache"""
+    token = access_token(manager)
+    payload = manager.decode_token(token).payload
+
+    manager.token_blacklist.blacklist_token(payload.jti, jwt_auth.datetime.utcnow() + jwt_auth.timedelta(minutes=5))
+
+    result = manager.decode_token(token)
+    assert not result.is_valid and result.error == "Token has been revoked"
+
+
+def test_user_revocation_cuts_off_at_the_millisecond(jwt_auth, redis_client):
+    """Test tokens issued up to the revoke-all millisecond are revoked and later ones survive"""
+    blacklist = jwt_auth.TokenBlacklist(redis_client)
+    blacklist.revoke_user_tokens("user_1")
+    cutoff = int(redis_client.get("token:user_revoked:user_1"))
+
+    assert blacklist.is_user_revoked("user_1", cutoff / 1000)
+    assert blacklist.is_user_revoked("user_1", (cutoff - 5000) / 1000)
+    assert not blacklist.is_user_revoked("user_1", (cutoff + 1) / 1000)
+    assert not blacklist.is_user_revoked("user_2", 0)
+
+
+def test_other_workers_pick_up_revocations_by_generation(monkeypatch, jwt_auth, redis_client):
+    """Test a worker's filter adds new revocations once the shared generation moves"""
+    monkeypatch.setattr(jwt_auth, "REVOCATION_SYNC_INTERVAL", 0)
+    writer, reader = jwt_auth.TokenBlacklist(redis_client), jwt_auth.TokenBlacklist(redis_client)
+    assert not reader._might_be_revoked("jti_1")
+    generation = reader._generation
+
+    writer._record_revocation("jti_1")
+
+    assert reader._might_be_revoked("jti_1")
+    assert reader._generation != generation
+    assert int(redis_client.get(writer.revocation_generation_key)) == 1
+
+
+def test_rebuild_drops_revocations_past_retention(jwt_auth, redis_client):
+    """Test a full rebuild prunes the log to the longest token lifetime"""
+    blacklist = jwt_auth.TokenBlacklist(redis_client)
+    redis_client.zadd(blacklist.revocation_log_key, {
+        "expired": time.time() - jwt_auth.REVOCATION_RETENTION - 60,
+        "recent": time.time()
+    })
+
+    blacklist._rebuild_filter()
+
+    assert "recent" in blacklist.revoked_filter
+    assert "expired" not in blacklist.revoked_filter
+    assert redis_client.zrange(blacklist.revocation_log_key, 0, -1) == [b"recent"]
+    assert blacklist._synced_until > 0
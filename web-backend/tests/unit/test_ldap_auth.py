@@ -0,0 +1,166 @@
+"""
+Unit tests for the LDAP connection pools, the DN lookup cache and LDAP user sync
+"""
+
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from ldap3.core.exceptions import LDAPCommunicationError
+from ldap3.core.results import RESULT_INVALID_CREDENTIALS, RESULT_NO_SUCH_OBJECT, RESULT_SUCCESS
+
+
+class FakeConnection:
+
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.unbound = False
+
+    def unbind(self):
+        self.unbound = True
+
+
+class FakeDirectory:
+    """Answers searches with the current DN and binds against one password"""
+
+    def __init__(self, dn="uid=amina,ou=users,dc=cloudron,dc=local", password="secret"):
+        self.dn = dn
+        self.password = password
+        self.searches = 0
+        self.binds = []
+
+    def lookup(self, username):
+        self.searches += 1
+        return {"username": username, "display_name": "Amina Yusuf", "email": "amina@example.com", "dn": self.dn}
+
+    def bind(self, dn, password):
+        self.binds.append(dn)
+        if dn != self.dn:
+            return RESULT_NO_SUCH_OBJECT
+        return RESULT_SUCCESS if password == self.password else RESULT_INVALID_CREDENTIALS
+
+
+@pytest.fixture
+def ldap_auth(monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "test-secret")
+    return importlib.import_module("src.auth.ldap_auth")
+
+
+@pytest.fixture
+def authenticator(monkeypatch, ldap_auth):
+    """Build an authenticator whose searches and binds go to a fake directory"""
+    directory = FakeDirectory()
+    authenticator = ldap_auth.LDAPAuthenticator()
+    monkeypatch.setattr(authenticator.search_pool, "run", lambda operation: directory.lookup("amina"))
+    monkeypatch.setattr(authenticator, "_bind_user", directory.bind)
+    yield authenticator, directory
+    authenticator.close()
+
+
+def test_pool_discards_dropped_connections_and_retries_once(ldap_auth):
+    """Test a communication error unbinds the connection, drops idle ones and retries on a fresh one"""
+    opened = []
+    pool = ldap_auth.LDAPConnectionPool(lambda: opened.append(FakeConnection(len(opened))) or opened[-1], max_size=2)
+    with pool.connection():
+        pass
+    attempts = []
+
+    def operation(conn):
+        attempts.append(conn.number)
+        if len(attempts) == 1:
+            raise LDAPCommunicationError("socket closed")
+        return "ok"
+
+    assert pool.run(operation) == "ok"
+    assert attempts == [0, 1]
+    assert opened[0].unbound and not opened[1].unbound
+    with pool.connection() as conn:
+        assert conn is opened[1]
+
+
+def test_pool_gives_up_after_one_retry_and_frees_its_slots(ldap_auth):
+    """Test a second communication error propagates without leaking pool slots"""
+    pool = ldap_auth.LDAPConnectionPool(lambda: FakeConnection(0), max_size=1, acquire_timeout=0.1)
+
+    def operation(conn):
+        raise LDAPCommunicationError("socket closed")
+
+    with pytest.raises(LDAPCommunicationError):
+        pool.run(operation)
+    with pool.connection() as conn:
+        assert not conn.unbound
+
+
+def test_bind_reports_the_server_result_code(ldap_auth):
+    """Test a failed bind surfaces the result code the server sent"""
+    authenticator = ldap_auth.LDAPAuthenticator()
+
+    class BindConnection(FakeConnection):
+
+        def rebind(self, user, password):
+            self.result = {"result": RESULT_SUCCESS if password == "secret" else RESULT_NO_SUCH_OBJECT}
+            return password == "secret"
+
+    authenticator.auth_pool = ldap_auth.LDAPConnectionPool(lambda: BindConnection(0))
+    try:
+        assert authenticator._bind_user("uid=amina", "secret") == RESULT_SUCCESS
+        assert authenticator._bind_user("uid=amina", "wrong") == RESULT_NO_SUCH_OBJECT
+    finally:
+        authenticator.close()
+
+
+def test_wrong_password_keeps_the_cached_lookup(authenticator):
+    """Test invalid credentials neither evict the cached DN nor search again"""
+    authenticator, directory = authenticator
+
+    assert authenticator.authenticate_user("amina", "secret")["dn"] == directory.dn
+    assert authenticator.authenticate_user("amina", "wrong") is None
+    assert authenticator.authenticate_user("amina", "secret") is not None
+
+    assert directory.searches == 1
+    assert len(directory.binds) == 3
+
+
+def test_missing_dn_looks_the_user_up_again(authenticator):
+    """Test a bind rejected because the DN is gone re-searches and binds the moved DN"""
+    authenticator, directory = authenticator
+    authenticator.authenticate_user("amina", "secret")
+
+    directory.dn = "uid=amina,ou=staff,dc=cloudron,dc=local"
+    user_info = authenticator.authenticate_user("amina", "secret")
+
+    assert user_info["dn"] == directory.dn
+    assert directory.searches == 2
+    assert authenticator.authenticate_user("amina", "secret")["dn"] == directory.dn
+    assert directory.searches == 2
+
+
+def test_sync_hashes_the_placeholder_password_off_the_event_loop(monkeypatch, ldap_auth):
+    """Test new LDAP users get their placeholder hash from the async hasher"""
+    hashed = []
+
+    async def get_password_hash_async(password):
+        hashed.append(password)
+        return "hashed"
+
+    class Query:
+
+        def filter(self, *criteria):
+            return self
+
+        def first(self):
+            return None
+
+    db = SimpleNamespace(query=lambda model: Query(), add=lambda instance: None,
+                         commit=lambda: None, refresh=lambda instance: None)
+    monkeypatch.setattr(ldap_auth, "get_password_hash_async", get_password_hash_async)
+
+    user = asyncio.run(ldap_auth.sync_ldap_user_to_db(
+        {"username": "amina", "display_name": "Amina Yusuf", "email": "", "dn": "uid=amina"}, db
+    ))
+
+    assert hashed == ["ldap_user"]
+    assert user.password_hash == "hashed"
+    assert (user.first_name, user.last_name, user.email) == ("Amina", "Yusuf", "amina@local")
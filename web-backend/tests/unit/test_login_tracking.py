@@ -0,0 +1,116 @@
+"""
+Unit tests for login lockouts and write-behind last-login bookkeeping
+"""
+
+import fakeredis
+import pytest
+
+from auth import auth_service as auth_service_module
+from auth.auth_service import AuthService
+from security.login_tracking import LOGIN_EVENTS_PER_USER, LoginAttemptTracker, LoginWriteBehind
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def make_writer(redis_client):
+    writers = []
+
+    def build(apply_batch, batch_size=500):
+        writer = LoginWriteBehind(redis_client, "test", apply_batch, flush_interval=60, batch_size=batch_size)
+        writers.append(writer)
+        return writer
+
+    yield build
+    for writer in writers:
+        writer._stop_event.set()
+
+
+def event(number):
+    return {"event": "login_successful", "number": number}
+
+
+def test_failures_lock_the_account_at_the_limit(redis_client):
+    """Test the failure script counts attempts and converts them into a lockout"""
+    tracker = LoginAttemptTracker(redis_client, max_attempts=3, lockout_seconds=900)
+
+    assert tracker.register_failure("user_1") == (1, 0)
+    assert tracker.register_failure("user_1") == (2, 0)
+    assert not tracker.is_locked("user_1")
+
+    attempts, locked_for = tracker.register_failure("user_1")
+    assert attempts == 3 and 0 < locked_for <= 900
+    assert tracker.is_locked("user_1")
+    assert not tracker.is_locked("user_2")
+
+    tracker.reset("user_1")
+    assert not tracker.is_locked("user_1")
+    assert tracker.register_failure("user_1") == (1, 0)
+
+
+def test_records_coalesce_per_user_with_capped_events(make_writer):
+    """Test repeated logins keep the newest fields and a bounded event history"""
+    batches = []
+    writer = make_writer(batches.append)
+
+    for number in range(LOGIN_EVENTS_PER_USER + 5):
+        writer.record("user_1", {"last_login": f"t{number}"}, events=[event(number)])
+    writer.record("user_2", {"last_login": "t0"})
+
+    assert writer.flush() == 2
+    entries = dict(batches[0])
+    assert entries["user_1"]["last_login"] == f"t{LOGIN_EVENTS_PER_USER + 4}"
+    assert [item["number"] for item in entries["user_1"]["events"]] == list(range(5, LOGIN_EVENTS_PER_USER + 5))
+    assert entries["user_2"]["events"] == []
+    assert writer.flush() == 0
+
+
+def test_flush_drains_in_batches(make_writer):
+    """Test pending records are applied in batch-size chunks until none are left"""
+    batches = []
+    writer = make_writer(batches.append, batch_size=2)
+    for number in range(5):
+        writer.record(f"user_{number}", {"last_login": "t"})
+
+    assert writer.flush() == 5
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert sorted(user_id for batch in batches for user_id, _ in batch) == [f"user_{number}" for number in range(5)]
+
+
+def test_failed_write_requeues_without_overwriting_newer_records(make_writer, redis_client):
+    """Test drained records go back after a failed write unless a newer one arrived meanwhile"""
+    def failing_apply(batch):
+        writer.record("user_1", {"last_login": "newer"})
+        raise RuntimeError("database unavailable")
+
+    writer = make_writer(failing_apply)
+    writer.record("user_1", {"last_login": "older"})
+    writer.record("user_2", {"last_login": "older"})
+
+    with pytest.raises(RuntimeError):
+        writer.flush()
+
+    batches = []
+    writer.apply_batch = batches.append
+    assert writer.flush() == 2
+    assert dict(batches[0])["user_1"]["last_login"] == "newer"
+    assert dict(batches[0])["user_2"]["last_login"] == "older"
+
+
+def test_successful_login_without_redis_writes_last_login_directly(monkeypatch):
+    """Test last-login still reaches the database when Redis is unavailable"""
+    monkeypatch.setattr(AuthService, "_init_redis", lambda self: None)
+    monkeypatch.setattr(auth_service_module, "get_database_pool", lambda: None)
+    service = AuthService()
+    batches = []
+    monkeypatch.setattr(service, "_apply_last_login_batch", batches.append)
+
+    service._record_successful_login("user_1", "refresh", {"ip": "10.0.0.1", "user_agent": "test"})
+
+    (user_id, entry), = batches[0]
+    assert user_id == "user_1"
+    assert entry["last_login_ip"] == "10.0.0.1"
+    assert entry["events"][0]["user_agent"] == "test"
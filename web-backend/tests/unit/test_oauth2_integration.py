@@ -0,0 +1,118 @@
+"""
+Unit tests for the OAuth2 provider client against a local stub provider
+"""
+
+import asyncio
+
+import httpx
+
+from security.oauth2_integration import OAuth2Manager, OAuth2Config
+
+STUB_PROVIDER = "https://provider.test"
+
+
+class InMemoryRedis:
+    """Just enough of the Redis API for OAuth2 state handling"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+
+def stub_provider(calls, flaky_userinfo=0):
+    """Stub provider serving discovery, token and user info endpoints"""
+    failures = {'userinfo': flaky_userinfo}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        if request.url.path == "/.well-known/openid-configuration":
+            return httpx.Response(200, json={
+                'token_endpoint': f"{STUB_PROVIDER}/oauth/token",
+                'userinfo_endpoint': f"{STUB_PROVIDER}/oauth/userinfo"
+            })
+        if request.url.path == "/oauth/token":
+            return httpx.Response(200, json={'access_token': "access", 'expires_in': 600, 'scope': "openid email"})
+        if request.url.path == "/oauth/userinfo":
+            if failures['userinfo']:
+                failures['userinfo'] -= 1
+                return httpx.Response(503)
+            return httpx.Response(200, json={'sub': "42", 'email': "farmer@fata.plus", 'name': "Farmer"})
+        if request.url.path == "/user":
+            return httpx.Response(200, json={'id': 7, 'login': "farmer", 'email': None})
+        if request.url.path == "/user/emails":
+            return httpx.Response(200, json=[{'email': "farmer@fata.plus", 'primary': True}])
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+def make_manager(calls, **kwargs):
+    manager = OAuth2Manager(InMemoryRedis(), transport=stub_provider(calls, **kwargs))
+    manager.provider_configs = {
+        'google': OAuth2Config(
+            provider='google', client_id="client", client_secret="secret",
+            auth_url=f"{STUB_PROVIDER}/oauth/authorize", token_url=f"{STUB_PROVIDER}/static/token",
+            user_info_url=f"{STUB_PROVIDER}/static/userinfo", scopes=["openid"],
+            redirect_uri="http://localhost/callback",
+            additional_config={'discovery_url': f"{STUB_PROVIDER}/.well-known/openid-configuration"}
+        ),
+        'github': OAuth2Config(
+            provider='github', client_id="client", client_secret="secret",
+            auth_url=f"{STUB_PROVIDER}/login/oauth/authorize", token_url=f"{STUB_PROVIDER}/oauth/token",
+            user_info_url=f"{STUB_PROVIDER}/user", scopes=["user:email"],
+            redirect_uri="http://localhost/callback",
+            additional_config={'emails_url': f"{STUB_PROVIDER}/user/emails"}
+        )
+    }
+    return manager
+
+
+def test_code_exchange_uses_cached_discovery():
+    """Test discovery is fetched once and its endpoints are used for the token and user info calls"""
+    calls = []
+    manager = make_manager(calls)
+
+    async def login():
+        auth_url = manager.generate_auth_url('google', tenant_id="tenant")
+        state = auth_url.split('state=')[1].split('&')[0]
+        token = await manager.exchange_code_for_token('google', "code", state)
+        user_info = await manager.get_user_info('google', token.access_token)
+        await manager.aclose()
+        return token, user_info
+
+    token, user_info = asyncio.run(login())
+    assert token.access_token == "access"
+    assert user_info.provider_user_id == "42"
+    assert calls == [
+        ('GET', "/.well-known/openid-configuration"),
+        ('POST', "/oauth/token"),
+        ('GET', "/oauth/userinfo"),
+    ]
+
+
+def test_user_info_retries_transient_failures():
+    """Test an idempotent user info request is retried after a 503"""
+    calls = []
+    manager = make_manager(calls, flaky_userinfo=1)
+
+    user_info = asyncio.run(manager.get_user_info('google', "access"))
+    assert user_info.email == "farmer@fata.plus"
+    assert calls.count(('GET', "/oauth/userinfo")) == 2
+
+
+def test_github_email_fetched_with_profile():
+    """Test the GitHub primary email fills in a private profile email"""
+    calls = []
+    manager = make_manager(calls)
+
+    user_info = asyncio.run(manager.get_user_info('github', "access"))
+    assert user_info.email == "farmer@fata.plus"
+    assert sorted(calls) == [('GET', "/user"), ('GET', "/user/emails")]
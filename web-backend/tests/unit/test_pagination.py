@@ -0,0 +1,116 @@
+"""
+Unit tests for keyset pagination cursors, page fetching and row-count estimates
+"""
+
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from models import pagination
+from models.pagination import count_rows, decode_cursor, encode_cursor, estimate_rows, paginate
+from models.user import User
+
+
+class FakeResult:
+
+    def __init__(self, rows=(), scalar=None):
+        self.rows = list(rows)
+        self.scalar = scalar
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: list(self.rows))
+
+    def scalar_one(self):
+        return self.scalar
+
+
+class FakeSession:
+    """Records statements and answers them with queued results"""
+
+    def __init__(self, *results, plan_rows=None):
+        self.results = list(results)
+        self.plan_rows = plan_rows
+        self.statements = []
+        self.bind = SimpleNamespace(dialect=postgresql.dialect())
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt.compile(dialect=self.bind.dialect)))
+        return self.results.pop(0)
+
+    async def connection(self):
+        async def exec_driver_sql(sql):
+            self.statements.append(sql)
+            return FakeResult(scalar=json.dumps([{"Plan": {"Plan Rows": self.plan_rows}}]))
+        return SimpleNamespace(exec_driver_sql=exec_driver_sql)
+
+
+def user_row(number):
+    return SimpleNamespace(created_at=datetime(2026, 10, number, tzinfo=timezone.utc), id=uuid.uuid4())
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    """Test cursors decode to the position they encode and malformed ones raise ValueError"""
+    created_at, row_id = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc), uuid.uuid4()
+
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+    for garbage in ("not-a-cursor", encode_cursor(created_at, row_id)[:-4], ""):
+        with pytest.raises(ValueError):
+            decode_cursor(garbage)
+
+
+def test_paginate_returns_cursor_only_when_another_page_exists():
+    """Test one extra row is fetched and the cursor points at the last returned row"""
+    rows = [user_row(number) for number in range(1, 4)]
+    session = FakeSession(FakeResult(rows), FakeResult(rows[2:]))
+
+    page, next_cursor = asyncio.run(paginate(session, select(User), User, None, 2))
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == (rows[1].created_at, rows[1].id)
+    assert "ORDER BY users.created_at, users.id" in session.statements[0]
+    assert "LIMIT" in session.statements[0]
+
+    page, next_cursor = asyncio.run(paginate(session, select(User), User, next_cursor, 2))
+    assert page == rows[2:] and next_cursor is None
+    assert "(users.created_at, users.id) >" in session.statements[1]
+
+
+def test_paginate_serves_deprecated_skip_as_offset():
+    """Test skip pages in the keyset order and still hands out a cursor"""
+    rows = [user_row(number) for number in range(1, 4)]
+    session = FakeSession(FakeResult(rows))
+
+    page, next_cursor = asyncio.run(paginate(session, select(User), User, None, 2, skip=10))
+
+    assert "OFFSET" in session.statements[0]
+    assert page == rows[:2] and next_cursor is not None
+    with pytest.raises(ValueError):
+        asyncio.run(paginate(session, select(User), User, next_cursor, 2, skip=10))
+
+
+def test_estimate_rows_reads_the_planner_estimate():
+    """Test the estimate comes from EXPLAIN without running the query"""
+    session = FakeSession(plan_rows=42)
+
+    assert asyncio.run(estimate_rows(session, select(User).where(User.is_active.is_(True)))) == 42
+    assert session.statements[0].startswith("EXPLAIN (FORMAT JSON) SELECT")
+
+
+def test_count_rows_uses_estimate_only_above_threshold(monkeypatch):
+    """Test approximate counts fall back to an exact count for small results"""
+    monkeypatch.setattr(pagination, "APPROXIMATE_COUNT_THRESHOLD", 100)
+
+    large = FakeSession(plan_rows=5000)
+    assert asyncio.run(count_rows(large, select(User), approximate=True)) == (5000, True)
+
+    small = FakeSession(FakeResult(scalar=7), plan_rows=10)
+    assert asyncio.run(count_rows(small, select(User), approximate=True)) == (7, False)
+    assert "count(*)" in small.statements[-1]
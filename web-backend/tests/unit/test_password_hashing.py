@@ -0,0 +1,77 @@
+"""
+Unit tests for the bounded password hashing pool, its backpressure and its metrics
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from security.password_hashing import PasswordHasher, PasswordHashingBusy
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(max_workers=1, queue_limit=1)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_saturated_pool_rejects_with_429(hasher):
+    """Test work beyond the workers and queue slots is refused with Retry-After and counted"""
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(hasher.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(PasswordHashingBusy) as busy:
+                await hasher.run(release.wait)
+            saturated = hasher.stats()
+        finally:
+            release.set()
+            await asyncio.gather(*running)
+        return busy.value, saturated
+
+    busy, saturated = asyncio.run(scenario())
+
+    assert busy.status_code == 429
+    assert busy.headers["Retry-After"] == "1"
+    assert saturated["in_flight"] == 2 and saturated["queued"] == 1
+    assert saturated["rejected"] == 1 and saturated["submitted"] == 2
+
+    # Slots are released once the work finishes
+    assert asyncio.run(hasher.run(lambda: "free")) == "free"
+
+
+def test_metrics_count_outcomes_and_timings(hasher):
+    """Test completed and failed runs are counted and timed, leaving nothing in flight"""
+    def fail():
+        raise ValueError("bad hash")
+
+    assert hasher.run_sync(lambda value: value * 2, 21) == 42
+    with pytest.raises(ValueError):
+        asyncio.run(hasher.run(fail))
+
+    stats = hasher.stats()
+    assert (stats["submitted"], stats["completed"], stats["failed"], stats["rejected"]) == (2, 1, 1, 0)
+    assert stats["in_flight"] == 0 and stats["queued"] == 0
+    assert stats["avg_wait_ms"] >= 0 and stats["avg_run_ms"] >= 0
+
+
+def test_run_sync_refuses_to_block_the_event_loop(hasher):
+    """Test coroutines must await run rather than wait on the pool"""
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            hasher.run_sync(lambda: None)
+
+    asyncio.run(scenario())
+    assert hasher.stats()["submitted"] == 0
+
+
+def test_bcrypt_round_trip(hasher):
+    """Test hashes produced on the pool verify against the same password only"""
+    hashed = asyncio.run(hasher.hash("correct horse", rounds=4))
+
+    assert asyncio.run(hasher.verify("correct horse", hashed))
+    assert not hasher.verify_sync("wrong horse", hashed)
@@ -0,0 +1,136 @@
+"""
+Unit tests for the per-process principal cache and its invalidation on user writes
+"""
+
+import asyncio
+import importlib
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from auth import auth_service as auth_service_module
+from auth.auth_service import AuthService
+
+
+class RecordingAuthService:
+
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate_principal(self, user_id):
+        self.invalidated.append(user_id)
+
+
+class FakeSession:
+
+    def __init__(self, user):
+        self.user = user
+
+    async def get(self, model, key):
+        return self.user
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, instance):
+        pass
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def services(monkeypatch, redis_client):
+    """Build auth services sharing one Redis, counting user loads"""
+    monkeypatch.setattr(AuthService, "_init_redis", lambda self: redis_client)
+    monkeypatch.setattr(auth_service_module, "get_database_pool", lambda: None)
+    loads = []
+
+    def build():
+        service = AuthService()
+        monkeypatch.setattr(service, "get_user_by_id",
+                            lambda user_id: loads.append(user_id) or SimpleNamespace(id=user_id, load=len(loads)))
+        return service
+
+    return build, loads
+
+
+@pytest.fixture
+def users_routes(monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "test-secret")
+    return importlib.import_module("src.routes.users")
+
+
+def test_principal_is_cached_until_invalidated(services):
+    """Test repeated lookups are served locally and an invalidation forces a reload"""
+    build, loads = services
+    service = build()
+
+    assert service.get_principal("user_1").load == 1
+    assert service.get_principal("user_1").load == 1
+    assert loads == ["user_1"]
+
+    service.invalidate_principal("user_1")
+    assert service.get_principal("user_1").load == 2
+
+
+def test_other_workers_reload_after_their_version_check(services):
+    """Test an invalidation on one worker reaches another once its version check expires"""
+    build, loads = services
+    writer, reader = build(), build()
+    reader.get_principal("user_1")
+
+    writer.invalidate_principal("user_1")
+    reader.get_principal("user_1")
+    assert len(loads) == 1
+
+    reader._principal_versions.clear()
+    reader.get_principal("user_1")
+    assert len(loads) == 2
+
+
+def test_user_routes_invalidate_principal(monkeypatch, users_routes):
+    """Test updating and deactivating a user drop its cached principal"""
+    recorder = RecordingAuthService()
+    monkeypatch.setattr(users_routes, "auth_service", recorder)
+    user_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    user = users_routes.User(
+        id=user_id, organization_id=uuid.uuid4(), username="amina", email="amina@example.com",
+        role="user", is_active=True, email_verified=False, phone_verified=False,
+        created_at=now, updated_at=now
+    )
+
+    asyncio.run(users_routes.update_user(str(user_id), users_routes.UserUpdate(role="admin"), FakeSession(user)))
+    asyncio.run(users_routes.delete_user(str(user_id), FakeSession(user)))
+
+    assert user.role == "admin" and user.is_active is False
+    assert recorder.invalidated == [str(user_id), str(user_id)]
+
+
+def test_admin_user_routes_invalidate_principal(monkeypatch):
+    """Test admin updates and deletions invalidate only users that exist"""
+    from admin import routes as admin_routes
+
+    recorder = RecordingAuthService()
+    monkeypatch.setattr(admin_routes, "auth_service", recorder)
+
+    async def update_user(user_id, user_data):
+        return SimpleNamespace(id=user_id)
+
+    async def delete_user(user_id):
+        return user_id == "user_1"
+
+    monkeypatch.setattr(admin_routes, "admin_db", SimpleNamespace(update_user=update_user, delete_user=delete_user))
+
+    asyncio.run(admin_routes.update_user("user_1", None))
+    asyncio.run(admin_routes.delete_user("user_1"))
+    with pytest.raises(admin_routes.HTTPException):
+        asyncio.run(admin_routes.delete_user("user_2"))
+
+    assert recorder.invalidated == ["user_1", "user_1"]
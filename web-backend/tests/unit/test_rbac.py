@@ -0,0 +1,176 @@
+"""
+Unit tests for compiled RBAC permissions, the permission caches, batch authorization and the reverse index
+"""
+
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from security import rbac
+from security.rbac import Permission, RBACManager, RBACRequestScopeMiddleware, Role
+
+
+class CountingRedis(fakeredis.FakeRedis):
+    """Counts the commands sent outside pipelines"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = 0
+
+    def execute_command(self, *args, **kwargs):
+        self.commands += 1
+        return super().execute_command(*args, **kwargs)
+
+
+@pytest.fixture
+def redis_client():
+    return CountingRedis()
+
+
+@pytest.fixture
+def manager(redis_client):
+    return RBACManager(redis_client)
+
+
+def test_roles_compile_the_transitive_hierarchy(manager):
+    """Test role masks include implied permissions and checks are bitwise over them"""
+    admin_permissions = manager.get_role_permissions(Role.TENANT_ADMIN.value)
+    assert {Permission.FARM_DELETE.value, Permission.FARM_UPDATE.value, Permission.FARM_READ.value} <= admin_permissions
+
+    mask = manager.compile_permissions([Permission.USER_DELETE.value])
+    assert manager.decode_permissions(mask) == {
+        Permission.USER_DELETE.value, Permission.USER_UPDATE.value, Permission.USER_READ.value
+    }
+
+
+def test_checks_use_the_user_mask_and_never_grant_unknown_permissions(manager):
+    """Test all/any checks against a role grant and that unknown permissions stay unregistered"""
+    manager.assign_role("user_1", "tenant_1", Role.FARM_MANAGER.value, "admin")
+
+    assert manager.check_all_permissions("user_1", "tenant_1", [Permission.FARM_READ.value, Permission.ALERT_UPDATE.value])
+    assert not manager.check_all_permissions("user_1", "tenant_1", [Permission.FARM_READ.value, Permission.FARM_DELETE.value])
+    assert manager.check_any_permission("user_1", "tenant_1", [Permission.FARM_DELETE.value, Permission.FARM_READ.value])
+    assert not manager.check_permission("user_1", "tenant_1", "farm:teleport")
+    assert "farm:teleport" not in manager.permission_bits
+
+
+def test_checks_are_served_from_the_local_cache(manager, redis_client):
+    """Test repeated checks within the version check interval make no Redis calls"""
+    manager.assign_role("user_1", "tenant_1", Role.AGRONOMIST.value, "admin")
+    manager.check_permission("user_1", "tenant_1", Permission.CONTEXT_CREATE.value)
+    commands = redis_client.commands
+
+    for _ in range(10):
+        assert manager.check_permission("user_1", "tenant_1", Permission.CONTEXT_CREATE.value)
+    assert redis_client.commands == commands
+
+
+def test_role_changes_reach_other_workers_by_version(redis_client):
+    """Test a role change on one worker is picked up by another once it rechecks the version"""
+    writer, reader = RBACManager(redis_client), RBACManager(redis_client)
+    assert not reader.check_permission("user_1", "tenant_1", Permission.FARM_UPDATE.value)
+
+    writer.assign_role("user_1", "tenant_1", Role.FARM_MANAGER.value, "admin")
+    assert not reader.check_permission("user_1", "tenant_1", Permission.FARM_UPDATE.value)
+
+    reader._local_versions.clear()
+    assert reader.check_permission("user_1", "tenant_1", Permission.FARM_UPDATE.value)
+
+
+def test_request_scope_memoizes_lookups(manager):
+    """Test lookups inside one request scope return the same grant without consulting the caches"""
+    with manager.request_scope():
+        first = manager.get_user_permissions("user_1", "tenant_1")
+        manager._local_permissions.clear()
+        manager._local_versions.clear()
+        assert manager.get_user_permissions("user_1", "tenant_1") is first
+
+    assert rbac._request_permissions.get() is None
+
+
+def test_middleware_opens_a_scope_per_request(manager):
+    """Test every HTTP request runs inside its own permission memo"""
+    app = FastAPI()
+    app.add_middleware(RBACRequestScopeMiddleware, rbac_manager=manager)
+    memos = []
+
+    @app.get("/check")
+    async def check():
+        memos.append(rbac._request_permissions.get())
+        return {}
+
+    client = TestClient(app)
+    client.get("/check")
+    client.get("/check")
+
+    assert all(memo is not None for memo in memos)
+    assert memos[0] is not memos[1]
+
+
+def test_fallback_permissions_are_not_indexed(redis_client):
+    """Test the default viewer grant neither enters the reverse index nor clobbers real grants"""
+    writer, reader = RBACManager(redis_client), RBACManager(redis_client)
+    assert Role.VIEWER.value in reader.get_user_permissions("user_1", "tenant_1").roles
+    assert writer.get_users_with_role("tenant_1", Role.VIEWER.value) == []
+
+    writer.assign_role("user_2", "tenant_1", Role.AGRONOMIST.value, "admin")
+    reader.get_user_permissions("user_3", "tenant_1")
+
+    assert writer.get_users_with_role("tenant_1", Role.AGRONOMIST.value) == ["user_2"]
+    assert writer.get_users_with_permission("tenant_1", Permission.CONTEXT_CREATE.value) == ["user_2"]
+
+
+def test_reverse_index_follows_role_changes_and_expiry(manager):
+    """Test role removal and grant expiry drop users from the index"""
+    manager.assign_role("user_1", "tenant_1", Role.AGRONOMIST.value, "admin")
+    manager.assign_role("user_2", "tenant_1", Role.FIELD_WORKER.value, "admin")
+    assert sorted(manager.get_users_with_any_permission(
+        "tenant_1", [Permission.CONTEXT_CREATE.value, Permission.ALERT_CREATE.value]
+    )) == ["user_1", "user_2"]
+
+    manager.remove_role("user_1", "tenant_1", Role.AGRONOMIST.value, "admin")
+    assert manager.get_users_with_permission("tenant_1", Permission.CONTEXT_CREATE.value) == []
+
+    grant = manager.get_user_permissions("user_2", "tenant_1", use_cache=False)
+    grant.expiry_date = datetime.utcnow() + timedelta(seconds=1)
+    manager._cache_user_permissions(grant)
+    manager.redis_client.zadd(f"{rbac.GRANT_EXPIRY_PREFIX}:tenant_1", {"user_2": 0})
+    assert manager.get_users_with_role("tenant_1", Role.FIELD_WORKER.value) == []
+
+
+def test_batch_validation_honours_resource_scoped_grants(manager):
+    """Test one batch call evaluates role grants and per-resource custom grants"""
+    manager.assign_role("user_1", "tenant_1", Role.FIELD_WORKER.value, "admin")
+    manager.grant_custom_permission("user_1", "tenant_1", Permission.FARM_DELETE.value,
+                                    context={"resource_ids": ["farm_1"]}, granted_by="admin")
+
+    allowed = manager.validate_permission_requests("user_1", "tenant_1", [
+        ("farm", "read", "farm_2"),
+        ("farm", "delete", "farm_1"),
+        ("farm", "delete", "farm_2"),
+        ("tenant", "delete", None),
+    ])
+
+    assert allowed == [True, True, False, False]
+    assert manager.build_sql_filter("user_1", "tenant_1", "farm", "delete") == ("id::text = ANY(%s)", [["farm_1"]])
+
+
+def test_sql_filter_restricts_by_tenant(manager):
+    """Test raw SQL filters add the tenant condition alongside any resource restriction"""
+    manager.assign_role("user_1", "tenant_1", Role.FIELD_WORKER.value, "admin")
+    manager.grant_custom_permission("user_1", "tenant_1", Permission.FARM_DELETE.value,
+                                    context={"resource_ids": ["farm_1"]}, granted_by="admin")
+
+    assert manager.build_sql_filter("user_1", "tenant_1", "farm", "read") == ("TRUE", [])
+    assert manager.build_sql_filter("user_1", "tenant_1", "farm", "read", tenant_column="organization_id") == (
+        "organization_id::text = %s", ["tenant_1"]
+    )
+    assert manager.build_sql_filter("user_1", "tenant_1", "farm", "delete", "f.id", "f.organization_id") == (
+        "f.organization_id::text = %s AND f.id::text = ANY(%s)", ["tenant_1", ["farm_1"]]
+    )
+    assert manager.build_sql_filter("user_1", "tenant_1", "tenant", "delete", tenant_column="organization_id") == (
+        "FALSE", []
+    )
@@ -0,0 +1,123 @@
+"""
+Unit tests for session counters, active-user sketches, the duration histogram and expiry accounting
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import fakeredis
+import pytest
+
+from security import session_management
+from security.session_management import SessionManager, SessionStatus, SessionType
+
+
+class CountingRedis(fakeredis.FakeRedis):
+    """Counts the pipelines executed against it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pipelines = 0
+
+    def pipeline(self, *args, **kwargs):
+        self.pipelines += 1
+        return super().pipeline(*args, **kwargs)
+
+
+@pytest.fixture
+def redis_client():
+    return CountingRedis()
+
+
+@pytest.fixture
+def manager(redis_client):
+    return SessionManager(redis_client)
+
+
+def create(manager, user_id="user_1", tenant_id="tenant_1", session_type=SessionType.WEB):
+    return manager.create_session(user_id, tenant_id, session_type, ip_address="127.0.0.1")
+
+
+def test_counters_follow_created_and_revoked_sessions(manager):
+    """Test totals, active counts, type and per-user breakdowns move with session lifecycle"""
+    first = create(manager)
+    create(manager, user_id="user_2", session_type=SessionType.MOBILE)
+    manager.revoke_session(first.session_id, "admin", "test")
+
+    tenant = manager.get_session_stats("tenant_1")
+    assert (tenant.total_sessions, tenant.active_sessions, tenant.revoked_sessions) == (2, 1, 1)
+    assert tenant.sessions_by_type == {"mobile": 1}
+    assert tenant.sessions_by_user == {"user_2": 1}
+    assert [login["user_id"] for login in tenant.recent_logins] == ["user_2", "user_1"]
+
+    overall = manager.get_session_stats()
+    assert overall.active_sessions == 1
+    assert overall.sessions_by_tenant == {"tenant_1": 1}
+
+
+def test_active_users_are_counted_once_in_the_sketches(manager):
+    """Test daily and monthly active users count distinct users, not sessions"""
+    create(manager)
+    create(manager)
+    create(manager, user_id="user_2")
+
+    stats = manager.get_session_stats("tenant_1")
+    assert (stats.daily_active_users, stats.monthly_active_users) == (2, 2)
+    assert manager.get_active_user_counts(day=datetime.utcnow() - timedelta(days=40)) == {
+        "daily_active_users": 0, "monthly_active_users": 0
+    }
+
+
+def test_validation_updates_the_sketches_at_most_once_per_interval(manager, redis_client):
+    """Test repeated validations skip the sketch pipeline until the throttle expires"""
+    session = create(manager)
+    pipelines = redis_client.pipelines
+
+    for _ in range(5):
+        assert manager.validate_session(session.session_id) is not None
+    assert redis_client.pipelines == pipelines
+
+    manager._active_users_recorded.clear()
+    manager.validate_session(session.session_id)
+    assert redis_client.pipelines == pipelines + 1
+
+
+def test_duration_histogram_buckets_ended_sessions(manager):
+    """Test ended sessions land in the bucket of their duration and feed the average"""
+    for duration in (600, 45):
+        session = create(manager)
+        manager._finalize_session_stats(manager._expiry_member(session), "tenant_1", "user_1",
+                                        "web", SessionStatus.REVOKED, duration)
+
+    stats = manager.get_session_stats("tenant_1")
+    assert stats.duration_histogram == {"le_900": 1, "le_60": 1}
+    assert stats.average_session_duration == 322.5
+    assert manager._duration_bucket(86400 * 2) == "inf"
+
+
+def test_sessions_are_finalized_exactly_once(manager, redis_client):
+    """Test revoking and then expiring a session only moves it out of the counters once"""
+    session = create(manager)
+    manager.revoke_session(session.session_id, "admin", "test")
+    manager.revoke_session(session.session_id, "admin", "again")
+    manager._record_session_ended(session, SessionStatus.EXPIRED)
+
+    stats = manager.get_session_stats("tenant_1")
+    assert (stats.active_sessions, stats.revoked_sessions, stats.expired_sessions) == (0, 1, 0)
+    assert sum(stats.duration_histogram.values()) == 1
+
+
+def test_cleanup_accounts_for_expired_sessions_with_any_ids(manager, redis_client):
+    """Test IDs containing the old separator survive the expiry index round trip"""
+    session = create(manager, user_id="user|1", tenant_id="tenant|1")
+    member = manager._expiry_member(session)
+    assert json.loads(member)[:3] == [session.session_id, "user|1", "tenant|1"]
+    redis_client.zadd(session_management.SESSION_EXPIRY_INDEX, {member: 0})
+
+    asyncio.run(manager._cleanup_sessions())
+    asyncio.run(manager._cleanup_sessions())
+
+    stats = manager.get_session_stats("tenant|1")
+    assert (stats.active_sessions, stats.expired_sessions) == (0, 1)
+    assert redis_client.zcard(f"{session_management.SESSION_TENANT_PREFIX}:tenant|1") == 0
@@ -0,0 +1,162 @@
+"""
+Unit tests for bulk API key updates, rate limit counters, expiry cleanup and cached lookups
+"""
+
+import uuid
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from auth import token_service as token_service_module
+from auth.token_service import TokenService
+
+
+class TokenCursor:
+
+    def __init__(self, database):
+        self.database = database
+        self.connection = database
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params=None):
+        self.database.statements.append((" ".join(sql.split()), params))
+        self.rowcount = self.database.rowcounts.pop(0) if self.database.rowcounts else 0
+
+    def fetchall(self):
+        return [{"id": token_id} for token_id in self.database.updated]
+
+
+class TokenDatabase:
+    """Answers UPDATE ... RETURNING with a fixed set of ids and reports queued row counts"""
+
+    def __init__(self, updated=(), rowcounts=()):
+        self.updated = list(updated)
+        self.rowcounts = list(rowcounts)
+        self.statements = []
+
+    def cursor(self):
+        return TokenCursor(self)
+
+    def commit(self):
+        pass
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+@pytest.fixture
+def make_service(monkeypatch, redis_client):
+    monkeypatch.setattr(TokenService, "_init_redis", lambda self: redis_client)
+
+    def build(database):
+        monkeypatch.setattr(token_service_module, "get_database_pool", lambda: database)
+        service = TokenService()
+        # Every token has the default limits
+        monkeypatch.setattr(service, "_get_cached_token",
+                            lambda lookup, value: SimpleNamespace(get_rate_limit=lambda limit_type: None))
+        return service
+
+    return build
+
+
+def test_bulk_revoke_reports_per_token_and_clears_counters(make_service, redis_client):
+    """Test one UPDATE covers every valid id and only revoked tokens lose their counters"""
+    revoked, missing = str(uuid.uuid4()), str(uuid.uuid4())
+    database = TokenDatabase(updated=[revoked])
+    service = make_service(database)
+    for token_id in (revoked, missing):
+        service.check_rate_limit(token_id, "/ai/chat")
+        service.check_rate_limit(token_id, "/ai/vision")
+    assert service._get_realtime_usage_stats(revoked)["current_minute"] == 2
+
+    results = service.bulk_revoke_tokens([revoked, missing, "not-a-uuid", revoked], "admin_1")
+
+    assert results == {
+        revoked: None,
+        missing: "Token not found or not active",
+        "not-a-uuid": "Invalid token ID"
+    }
+    (sql, params), = database.statements
+    assert "status = 'revoked'" in sql and "AND status = 'active'" in sql
+    assert params[-1] == [revoked, missing]
+
+    assert service._get_realtime_usage_stats(revoked)["current_minute"] == 0
+    assert not redis_client.exists(service._rate_limit_index_key(revoked))
+    assert service._get_realtime_usage_stats(missing)["current_minute"] == 2
+    assert int(redis_client.get(service._token_version_key(revoked))) == 1
+    assert not redis_client.exists(service._token_version_key(missing))
+
+
+def test_bulk_update_with_no_valid_ids_skips_the_database(make_service):
+    """Test invalid ids are reported without running the UPDATE"""
+    database = TokenDatabase()
+    service = make_service(database)
+
+    assert service.bulk_extend_tokens(["bad"], 30, "admin_1") == {"bad": "Invalid token ID"}
+    assert database.statements == []
+
+
+def test_cleanup_expires_in_chunks_until_a_short_chunk(make_service, redis_client):
+    """Test expiry runs one short transaction per chunk without bumping cached token versions"""
+    database = TokenDatabase(rowcounts=[2, 2, 1])
+    service = make_service(database)
+
+    assert service.cleanup_expired_tokens(chunk_size=2, pause_seconds=0) == 5
+    assert len(database.statements) == 3
+    assert all("FOR UPDATE SKIP LOCKED" in sql and params[1] == 2 for sql, params in database.statements)
+    assert not redis_client.keys(f"{service.redis_prefix}cache_version:*")
+
+
+@pytest.fixture
+def make_worker(monkeypatch, redis_client):
+    """Build token services sharing one Redis whose lookups return a fresh copy per database read"""
+    monkeypatch.setattr(TokenService, "_init_redis", lambda self: redis_client)
+    monkeypatch.setattr(token_service_module, "get_database_pool", lambda: TokenDatabase())
+    loads = []
+
+    def build():
+        service = TokenService()
+        monkeypatch.setattr(service, "_query_token",
+                            lambda lookup, value: loads.append(value) or SimpleNamespace(id=value, load=len(loads)))
+        return service
+
+    return build, loads
+
+
+def test_token_change_invalidates_only_that_token(make_worker):
+    """Test a change bumps the version of the changed token and leaves other cached tokens alone"""
+    build, loads = make_worker
+    worker, other_worker = build(), build()
+    for token_id in ("token_1", "token_2"):
+        worker._get_cached_token("id", token_id)
+
+    other_worker.invalidate_token_cache(["token_1"])
+    # Cached copies are used until the worker rechecks token versions
+    assert worker._get_cached_token("id", "token_1").load == 1
+
+    worker._token_versions.clear()
+    assert worker._get_cached_token("id", "token_1").load == 3
+    assert worker._get_cached_token("id", "token_2").load == 2
+    assert loads == ["token_1", "token_2", "token_1"]
+
+
+def test_version_checks_on_every_lookup_close_the_revocation_window(monkeypatch, make_worker):
+    """Test a zero check interval makes another worker's change visible on the next lookup"""
+    monkeypatch.setattr(token_service_module, "API_KEY_VERSION_CHECK_INTERVAL", 0)
+    build, loads = make_worker
+    worker, other_worker = build(), build()
+    worker._get_cached_token("hash", "token_1")
+    assert worker._get_cached_token("hash", "token_1").load == 1
+
+    other_worker.invalidate_token_cache(["token_1"])
+
+    assert worker._get_cached_token("hash", "token_1").load == 2